@@ -18,24 +18,32 @@
 # ═══════════════════════════════════════════════════════════════
 
 
+# 콜드 스타트 기준 시각 — 다른 임포트보다 먼저 (modules/coldstart.py)
+from modules.coldstart import lazy_module, mark as _cs_mark
 import re
 import os
 import html as html_mod
 import threading
-import requests
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import hashlib
 import calendar
 import io
 from datetime import datetime, timezone, timedelta, date
-from supabase import create_client, Client
-from streamlit_autorefresh import st_autorefresh
-from modules.realtime import start_realtime, pop_changed_tables, is_running
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseUpload
+from modules.realtime import start_realtime, register_tables, is_running, get_health
+from modules.metrics import start_metrics_server
+from modules.worklist import page_slice, goto_row, selection_editor
+from modules.render_cache import render_cached
+from modules.kpi import kpi_snapshot, compute_kpis, scope_metrics
+from modules.assets import inject_head_assets, cached_html, read_text_asset, publish_file
+from modules.live import (
+    live_fragment, sync_realtime, bump_local_rev, data_version,
+    refresh_controller,
+)
+
+# 페이지 전용 무거운 의존성은 첫 사용 시 로드 (로그인 화면 전 임포트 제외)
+# Google Drive 클라이언트는 upload_img_to_drive 안에서, openpyxl 은 엑셀 처리 시점에 임포트
+px = lazy_module("plotly.express")
 
 # ── 모듈 임포트 ──────────────────────────────────────────────────
 from modules.utils import (
@@ -44,14 +52,17 @@ from modules.utils import (
     _TELEGRAM_BOT_TOKEN, _TELEGRAM_CHAT_ID, _TG_SENT_CACHE,
 )
 from modules.auth import (
-    hash_pw, verify_pw, get_master_pw_hash,
+    hash_pw_pooled, verify_pw_pooled, get_master_pw_hash,
     _parse_custom_perms, check_perm, _BCRYPT_AVAILABLE,
+    issue_session_token, verify_session_token, read_session_token,
+    remember_session, forget_session, flush_session_cookie,
 )
 from modules.database import (
     get_supabase, keep_supabase_alive,
+    sync_session_user_db, invalidate_user_directory,
     _clear_production_cache, _clear_schedule_cache, _clear_plan_cache,
     _clear_master_cache, _clear_audit_cache, _clear_all_cache,
-    _clear_help_request_cache, _clear_access_request_cache,
+    _clear_help_request_cache, _clear_access_request_cache, _clear_material_cache,
     clear_cache_for_tables,
     load_realtime_ledger, load_production_history, load_production_by_serials, archive_old_completed,
     insert_row, update_row,
@@ -62,16 +73,17 @@ from modules.database import (
     insert_audit_log, load_audit_log, load_audit_log_by_date, load_oqc_fail_audit_log, load_oqc_entry_dates,
     delete_all_audit_log, delete_audit_log_row,
     insert_material_serials, load_material_serials,
-    load_material_serials_bulk, search_material_by_sn,
+    load_material_serial_pairs, insert_material_serials_batch,
+    get_material_summary, search_material_by_sn,
     update_material_serial_sn,
     delete_all_material_serial, delete_material_serial_row,
-    load_schedule, insert_schedule, update_schedule, delete_schedule,
+    load_schedule, load_schedule_months, insert_schedule, update_schedule, delete_schedule,
     delete_all_production_schedule,
     insert_schedule_change_log,
     delete_all_schedule_change_log, delete_schedule_change_log_row,
     load_model_master, upsert_model_master,
     delete_model_from_master, delete_item_from_master,
-    delete_all_master_by_group, sync_master_to_session,
+    delete_all_master_by_group, get_master_models, get_master_items,
     load_production_plan, save_production_plan,
     delete_production_plan_row, delete_all_production_plan,
     insert_plan_change_log, load_plan_change_log,
@@ -84,7 +96,10 @@ from modules.calendar_view import (
     show_inline_day_panel, render_calendar_weekly, render_calendar_monthly,
     _xp, _rerun, clear_cal,
 )
-from modules.kpi_dashboard import render_kpi_dashboard
+from modules.bulk_import import (
+    MAT_IMPORT_COLS, parse_material_serial_excel, validate_material_serials,
+    build_reject_report,
+)
 from modules.constants import (
     PRODUCTION_GROUPS, CALENDAR_EDIT_ROLES, SCHEDULE_COLORS,
     PLAN_CATEGORIES, ACTIVE_STATES, SCH_CHANGE_REASONS,
@@ -95,7 +110,6 @@ from modules.constants import (
 # 상수 정의
 # =================================================================
 # 성능 설정
-AUTO_REFRESH_INTERVAL_MS = 15000  # Realtime 폴백용 15초 폴링 (변경 감지는 Realtime이 담당)
 MAX_FUNCTION_LINES = 200  # 함수 최대 라인 수 가이드
 
 # UI 설정
@@ -171,29 +185,24 @@ KST = timezone(timedelta(hours=9))
 try:
     _sb_url = st.secrets["supabase"]["url"]
     _sb_key = st.secrets["supabase"]["key"]
+    register_tables("users")   # 사용자 디렉터리 무효화용
     start_realtime(_sb_url, _sb_key)
 except Exception as _rt_err:
     pass  # secrets 없는 환경(로컬 테스트 등)에서는 무시
 
-# ── 폴링 트리거 (Realtime 폴백 / 탭 wake-up 대비) ────────────────
-# 마스터 관리 페이지는 자동 새로고침 제외 (입력 중 끊김 방지)
-_on_master_page = st.session_state.get("current_line") == "마스터 관리"
-_refresh_count = st_autorefresh(
-    interval=86400000 if _on_master_page else AUTO_REFRESH_INTERVAL_MS,
-    key="pms_auto_refresh"
-)
-if _refresh_count:
-    st.session_state["_last_refresh_count"] = _refresh_count
+# ── Prometheus /metrics 사이드카 (metrics_port 설정 시, 프로세스 1회) ──
+start_metrics_server()
+
+# ── 적응형 자동 갱신 (Realtime 폴백 / 탭 wake-up 대비) ────────────
+# 페이지별 정책: modules/constants.py REFRESH_POLICIES
+# (탭 숨김·무입력 시 감속, 스캔 중 가속, 감시 테이블 변경 없으면 rerun 생략,
+#  마스터 관리 등은 자동 갱신 제외, 라이브 섹션 페이지는 fragment 만 갱신)
+refresh_controller(st.session_state.get("current_line", "현황판"))
 
 # ── Realtime 변경 감지 → 해당 테이블 캐시만 초기화 ───────────────
-_rt_changed = pop_changed_tables()
-if _rt_changed:
-    clear_cache_for_tables(_rt_changed)
-    # production 변경 시 session_state도 즉시 갱신
-    if "production" in _rt_changed and st.session_state.get("login_status"):
-        st.session_state.production_db = load_realtime_ledger()
-    if "production_schedule" in _rt_changed and st.session_state.get("login_status"):
-        st.session_state.schedule_db = load_schedule()
+# 캐시 무효화는 변경당 프로세스 1회, session_state 갱신은 세션 커서 기준으로 세션마다 1회
+# (라이브 fragment 도 틱마다 같은 함수로 반영)
+_rt_changed = sync_realtime()
 
 # ── 일별 아카이브: 완료 후 30일 이상 된 레코드를 production_history로 이동 ──
 # 로그인한 세션에서 하루 1번만 실행 (UI 차단 없음 — 실패해도 무시)
@@ -202,16 +211,10 @@ if (st.session_state.get("login_status")
     archive_old_completed(days=30)
     st.session_state["_archive_date"] = str(date.today())
 
-# ── 사용 설명서 PDF (외부 파일 로드) ────────────────────────────────
+# ── 사용 설명서 PDF (외부 파일) ──────────────────────────────────────
 # PDF 파일을 소스 코드와 같은 폴더에 위치시키세요: PMS_v1.0.0_사용설명서.pdf
-import os as _os, base64 as _b64_loader
-_PDF_PATH = _os.path.join(_os.path.dirname(_os.path.abspath(__file__)), "PMS_v1.0.0_사용설명서.pdf")
-def _load_manual_pdf_b64() -> str:
-    if _os.path.exists(_PDF_PATH):
-        with open(_PDF_PATH, "rb") as _f:
-            return _b64_loader.b64encode(_f.read()).decode("utf-8")
-    return ""
-_MANUAL_PDF_B64 = _load_manual_pdf_b64()
+# 작업자 매뉴얼 페이지에서 정적 파일(내용 해시 URL)로 제공 — rerun 마다 읽거나 인코딩하지 않음
+_PDF_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "PMS_v1.0.0_사용설명서.pdf")
 
 ROLES = {
     "master":           ["생산 지표 관리", "조립 라인", "검사 라인", "포장 라인", "OQC 라인", "생산 현황 리포트", "불량 공정", "수리 현황 리포트", "생산 중단 일지", "마스터 관리", "작업자 매뉴얼", "관리자 매뉴얼", "플로우차트"],
@@ -283,6 +286,7 @@ STATUS_BG = {
 from modules.styles import inject_styles, inject_js
 inject_styles()
 inject_js()
+_cs_mark("imports")
 
 # =================================================================
 # 2. 보안 유틸리티
@@ -299,8 +303,16 @@ if "supabase_alive_checked" not in st.session_state:
 
 # ── 사이드바 Realtime 연결 상태 표시 ─────────────────────────────
 with st.sidebar:
-    if is_running():
-        st.caption(" 실시간 연결")
+    _rt_health = get_health()
+    if is_running() and _rt_health["connected"]:
+        _rt_lag = _rt_health["lag_ms_avg"]
+        st.caption(
+            " 실시간 연결"
+            + (f" · 지연 {_rt_lag:,.0f}ms" if _rt_lag is not None else "")
+            + (f" · 재연결 {_rt_health['reconnects']}회" if _rt_health["reconnects"] else "")
+        )
+    elif is_running():
+        st.caption(" 실시간 재연결 중 (폴링 모드)")
     else:
         st.caption(" 폴링 모드")
 
@@ -330,6 +342,7 @@ def _prod_update(sn: str, data: dict) -> None:
     for col, val in data.items():
         if col in _db.columns:
             st.session_state.production_db.loc[_mask, col] = val
+    bump_local_rev()
 
 
 def _prod_bulk_update(updates: list) -> None:
@@ -348,6 +361,7 @@ def _prod_bulk_update(updates: list) -> None:
         for col, val in item["data"].items():
             if col in _db.columns:
                 st.session_state.production_db.loc[_mask, col] = val
+    bump_local_rev()
 
 
 def _run_bulk_db_ops(ops: list) -> list:
@@ -367,6 +381,166 @@ def _run_bulk_db_ops(ops: list) -> list:
     return [{"sn": o["sn"], "data": o["data"]} for o in ops]
 
 
+# =================================================================
+# 현황판 라이브 섹션 빌더 (fragment 에서 데이터 버전별 메모)
+# =================================================================
+
+def _build_dashboard_figs(db_all: pd.DataFrame) -> tuple:
+    """현황판 차트 3종 (반별 공정 진행 / 상태 비중 / 반별 투입) figure 생성."""
+    fig = px.bar(
+        db_all.groupby(['반','라인']).size().reset_index(name='수량'),
+        x='라인', y='수량', color='반', barmode='group',
+        title="반별 공정 진행 현황", template="plotly_white",
+        text='수량',
+        category_orders={"라인": ["조립 라인", "검사 라인", "OQC 라인", "포장 라인"]}
+    )
+    fig.update_traces(textposition='outside', textfont_size=11)
+    fig.update_yaxes(dtick=5)
+    fig.update_layout(
+        margin=dict(t=50, b=50, l=20, r=30),
+        legend=dict(orientation="h", yanchor="top", y=-0.15, xanchor="center", x=0.5),
+        title=dict(font=dict(size=13), x=0, xanchor='left', pad=dict(t=4)),
+        uniformtext_minsize=9, uniformtext_mode='hide'
+    )
+    fig2 = px.pie(
+        db_all.groupby('상태').size().reset_index(name='수량'),
+        values='수량', names='상태', hole=0.5, title="<b>전체 상태 비중</b>"
+    )
+    fig2.update_traces(
+        textposition='auto',
+        textinfo='percent',
+    )
+    fig2.update_layout(margin=dict(t=40, b=40, l=40, r=40))
+    fig3 = px.bar(
+        db_all.groupby('반').size().reset_index(name='수량'),
+        x='반', y='수량', color='반',
+        title="<b>반별 총 투입</b>", template="plotly_white",
+        text='수량'
+    )
+    fig3.update_traces(textposition='outside', textfont_size=12)
+    fig3.update_yaxes(dtick=5)
+    fig3.update_layout(margin=dict(t=50, b=20), showlegend=False)
+    return fig, fig2, fig3
+
+
+def _build_model_table_html(db_all: pd.DataFrame) -> str:
+    """현황판 모델별 실시간 생산 현황 HTML 테이블 (데이터 없으면 빈 문자열)."""
+    _m_total  = db_all.groupby(['반', '모델']).size().rename('투입')
+    _m_active = db_all[db_all['상태'].isin(ACTIVE_STATES)].groupby(['반', '모델']).size().rename('진행중')
+    _m_done   = db_all[(db_all['라인'] == '포장 라인') & (db_all['상태'] == '완료')].groupby(['반', '모델']).size().rename('완료')
+    _m_ng     = db_all[db_all['상태'].str.contains('불량|부적합', na=False)].groupby(['반', '모델']).size().rename('불량')
+    _mdl_df   = pd.concat([_m_total, _m_active, _m_done, _m_ng], axis=1).fillna(0).astype(int).reset_index()
+    _mdl_df   = _mdl_df[_mdl_df['투입'] > 0].sort_values(['반', '투입'], ascending=[True, False]).reset_index(drop=True)
+
+    if _mdl_df.empty:
+        return ""
+
+    _BAN_HDR = {"제조1반": "#2471a3", "제조2반": "#1e8449", "제조3반": "#6c3483"}
+    _tbl = (
+        "<div style='overflow-x:auto;'>"
+        "<table style='width:100%;border-collapse:collapse;font-size:0.82rem;'>"
+        "<tr style='background:#1B3A5C;color:#fff;font-weight:700;'>"
+        "<th style='padding:7px 10px;text-align:left;'>반</th>"
+        "<th style='padding:7px 10px;text-align:left;'>모델</th>"
+        "<th style='padding:7px 10px;text-align:center;'>투입</th>"
+        "<th style='padding:7px 10px;text-align:center;'>진행중</th>"
+        "<th style='padding:7px 10px;text-align:center;'>완료</th>"
+        "<th style='padding:7px 10px;text-align:center;'>불량</th>"
+        "<th style='padding:7px 10px;text-align:left;min-width:120px;'>진행률</th>"
+        "</tr>"
+    )
+    for _ri, _mr in _mdl_df.iterrows():
+        _bg = "#f8f9fa" if _ri % 2 == 0 else "#ffffff"
+        _hc = _BAN_HDR.get(_mr['반'], "#888")
+        _ng_bg = "background:#fde8e7;" if _mr['불량'] > 0 else ""
+        _ng_cl = "color:#c0392b;font-weight:bold;" if _mr['불량'] > 0 else "color:#aaa;"
+        _pct  = round(_mr['완료'] / max(_mr['투입'], 1) * 100)
+        _pc   = "#1e8449" if _pct >= 80 else "#d68910" if _pct >= 50 else "#c0392b"
+        _tbl += (
+            f"<tr style='background:{_bg};'>"
+            f"<td style='padding:6px 10px;'><span style='background:{_hc}22;color:{_hc};font-weight:700;"
+            f"padding:2px 8px;border-radius:5px;font-size:0.78rem;'>{html_mod.escape(str(_mr['반'])[:3])}</span></td>"
+            f"<td style='padding:6px 10px;font-weight:600;'>{html_mod.escape(str(_mr['모델']))}</td>"
+            f"<td style='padding:6px 10px;text-align:center;'>{_mr['투입']}</td>"
+            f"<td style='padding:6px 10px;text-align:center;color:#d68910;font-weight:600;'>{_mr['진행중']}</td>"
+            f"<td style='padding:6px 10px;text-align:center;color:#1e8449;font-weight:600;'>{_mr['완료']}</td>"
+            f"<td style='padding:6px 10px;text-align:center;{_ng_bg}'><span style='{_ng_cl}'>{_mr['불량']}</span></td>"
+            f"<td style='padding:6px 12px;'>"
+            f"<div style='display:flex;align-items:center;gap:6px;'>"
+            f"<div style='flex:1;background:#e8e2d8;border-radius:99px;height:5px;overflow:hidden;'>"
+            f"<div style='background:{_pc};width:{_pct}%;height:100%;border-radius:99px;'></div></div>"
+            f"<span style='font-size:0.75rem;color:{_pc};font-weight:700;min-width:32px;'>{_pct}%</span>"
+            f"</div></td>"
+            f"</tr>"
+        )
+    _tbl += "</table></div>"
+    return _tbl
+
+
+def _build_dashboard_cards(db_all: pd.DataFrame, today: date, version) -> tuple:
+    """현황판 이번달 요약 박스 4개 + 반별 카드 HTML. Returns (boxes, cards).
+    이번달 실적·계획은 KPI 엔진(kpi_snapshot), 반별 진행 중·불량은 현재 원장 기준."""
+    _month_end = today.replace(day=calendar.monthrange(today.year, today.month)[1])
+    _kpi  = kpi_snapshot(today.strftime('%Y-%m-01'), today.strftime('%Y-%m-%d'), version,
+                         plan_to=_month_end.strftime('%Y-%m-%d'))
+    _live = compute_kpis(db_all)
+    _tot  = _kpi["전체"]
+    boxes = [
+        f"<div class='stat-box'><div class='stat-label'> 총 투입</div><div class='stat-value'>{_tot['총투입']}</div><div class='stat-sub'>이번달 전체 반 투입 건</div></div>",
+        f"<div class='stat-box'><div class='stat-label'> 최종 완료</div><div class='stat-value'>{_tot['최종완료']}</div><div class='stat-sub'>이번달 포장 라인 완료 기준</div></div>",
+        f"<div class='stat-box'><div class='stat-label'> 작업 중</div><div class='stat-value'>{_tot['진행중']}</div><div class='stat-sub'>이번달 조립~포장 진행 중</div></div>",
+        f"<div class='stat-box'><div class='stat-label'> 불량 이슈</div><div class='stat-value'>{_tot['불량']}</div><div class='stat-sub'>이번달 불량·부적합 상태 건</div></div>",
+    ]
+
+    _BAN_CLR_CARD = {"제조1반": "#2471a3", "제조2반": "#1e8449", "제조3반": "#6c3483"}
+    cards = []
+    for _g in PRODUCTION_GROUPS:
+        _h = _kpi["반"][_g]
+        _d = _live["반"][_g]
+
+        _총투입   = _h["총투입"]
+        _누적완료 = _h["최종완료"]
+        _진행중   = _d["진행중"]
+        _불량     = _d["불량"]
+
+        # 이번달 달성률 (조립계획 기준)
+        _ban_plan = _h["계획"]
+        _달성률   = _h["달성률"]
+        _gauge_w  = min(int(_달성률), 100)
+        _gauge_c  = "#1e8449" if _달성률 >= 100 else "#d68910" if _달성률 >= 70 else "#c0392b"
+        _pct_txt  = f"{_달성률}%" if _ban_plan > 0 else "계획 미등록"
+        _clr      = _BAN_CLR_CARD.get(_g, "#888")
+        cards.append(
+            f"<div style='background:#fffdf8;border:1.5px solid {_clr}44;border-radius:14px;padding:14px 16px;box-sizing:border-box;'>"
+            f"<div style='display:flex;justify-content:space-between;align-items:center;margin-bottom:6px;'>"
+            f"<div style='font-size:clamp(0.85rem,1.2vw,1rem);font-weight:bold;color:{_clr};'>{_g}</div>"
+            f"<div style='font-size:clamp(1rem,1.8vw,1.35rem);font-weight:bold;color:{_gauge_c};'>{_pct_txt}</div>"
+            f"</div>"
+            f"<div style='background:#e8e2d8;border-radius:99px;height:6px;margin-bottom:10px;overflow:hidden;'>"
+            f"<div style='background:{_gauge_c};width:{_gauge_w}%;height:100%;border-radius:99px;'></div>"
+            f"</div>"
+            f"<div style='display:grid;grid-template-columns:1fr 1fr;gap:6px;'>"
+            f"<div style='background:#f0f4f8;border-radius:8px;padding:8px 6px;text-align:center;'>"
+            f"<div style='font-size:0.62rem;color:#8a7f72;font-weight:bold;margin-bottom:3px;'>이번달 투입</div>"
+            f"<div style='font-size:clamp(1.1rem,2vw,1.6rem);color:#5a96c8;font-weight:bold;'>{_총투입}</div>"
+            f"<div style='font-size:0.58rem;color:#aaa;margin-top:2px;'>완료 이력 기준</div></div>"
+            f"<div style='background:#f0f4f8;border-radius:8px;padding:8px 6px;text-align:center;'>"
+            f"<div style='font-size:0.62rem;color:#8a7f72;font-weight:bold;margin-bottom:3px;'>최종 완료</div>"
+            f"<div style='font-size:clamp(1.1rem,2vw,1.6rem);color:#4da875;font-weight:bold;'>{_누적완료}</div>"
+            f"<div style='font-size:0.58rem;color:#aaa;margin-top:2px;'>포장 완료 기준</div></div>"
+            f"<div style='background:#f0f4f8;border-radius:8px;padding:8px 6px;text-align:center;'>"
+            f"<div style='font-size:0.62rem;color:#8a7f72;font-weight:bold;margin-bottom:3px;'>진행 중</div>"
+            f"<div style='font-size:clamp(1.1rem,2vw,1.6rem);color:#e8a838;font-weight:bold;'>{_진행중}</div>"
+            f"<div style='font-size:0.58rem;color:#aaa;margin-top:2px;'>현재 공정 대기·작업 중</div></div>"
+            f"<div style='background:{'#fde8e7' if _불량 > 0 else '#f0f4f8'};border-radius:8px;padding:8px 6px;text-align:center;'>"
+            f"<div style='font-size:0.62rem;color:#8a7f72;font-weight:bold;margin-bottom:3px;'>불량·부적합</div>"
+            f"<div style='font-size:clamp(1.1rem,2vw,1.6rem);color:{'#c8605a' if _불량 > 0 else '#aaa'};font-weight:bold;'>{_불량}</div>"
+            f"<div style='font-size:0.58rem;color:#aaa;margin-top:2px;'>현재 불량·부적합 상태</div></div>"
+            f"</div></div>"
+        )
+    return boxes, cards
+
+
 # =================================================================
 # 5. 캘린더 다이얼로그
 # =================================================================
@@ -390,7 +564,6 @@ def _run_bulk_db_ops(ops: list) -> list:
 # 5. 세션 상태 초기화
 # =================================================================
 
-if 'schedule_db'     not in st.session_state: st.session_state.schedule_db     = load_schedule()
 if 'production_plan' not in st.session_state: st.session_state.production_plan = load_production_plan()
 if 'production_db'   not in st.session_state: st.session_state.production_db   = pd.DataFrame()
 if 'cal_year'         not in st.session_state: st.session_state.cal_year         = datetime.now(KST).year
@@ -437,46 +610,27 @@ if 'cal_action_data' not in st.session_state: st.session_state.cal_action_data =
 if 'cal_action_sub'      not in st.session_state: st.session_state.cal_action_sub      = None
 if 'cal_action_sub_data' not in st.session_state: st.session_state.cal_action_sub_data = None
 
-if 'user_db' not in st.session_state:
-    #  보안 개선: secrets.toml에서 비밀번호 해시 로드
-    # .streamlit/secrets.toml에 다음 내용 추가 필요:
-    # [default_users]
-    # admin_hash = "your_bcrypt_hash_here"
-    # master_hash = "your_bcrypt_hash_here"
-    # control_tower_hash = "your_bcrypt_hash_here"
-    
-    try:
-        # Supabase에서 사용자 정보 로드 시도
-        sb = get_supabase()
-        # users 테이블에서 로드
-        result = sb.table("users").select("*").execute()
-        if result.data:
-            # DB에서 로드 성공
-            import json as _json
-            _user_db = {}
-            for user in result.data:
-                _entry = {
-                    'pw_hash': user['password_hash'],
-                    'role': user['role'],
-                }
-                if user.get('custom_permissions'):
-                    try:
-                        _entry['custom_permissions'] = _json.loads(user['custom_permissions'])
-                    except (_json.JSONDecodeError, ValueError):
-                        pass  # 잘못된 JSON은 무시하고 커스텀 권한 없이 로그인 허용
-                _user_db[user['username']] = _entry
-            st.session_state.user_db = _user_db
+#  보안 개선: secrets.toml에서 비밀번호 해시 로드
+# .streamlit/secrets.toml에 다음 내용 추가 필요:
+# [default_users]
+# admin_hash = "your_bcrypt_hash_here"
+# master_hash = "your_bcrypt_hash_here"
+# control_tower_hash = "your_bcrypt_hash_here"
+#
+# 사용자 목록은 프로세스 공유 디렉터리에서 가져옴 (세션별 users 전체 조회 없음)
+# users 변경 시 Realtime 이 디렉터리 버전을 올리고, 세션 사본은 다음 rerun 에 교체된다.
+try:
+    if sync_session_user_db() and not st.session_state.user_db:
+        # DB에 데이터 없으면 secrets.toml의 해시 사용 (기본 패스워드 사용 금지)
+        _admin_hash = st.secrets.get("default_users", {}).get("admin_hash")
+        if _admin_hash:
+            st.session_state.user_db = {
+                "admin": {"pw_hash": _admin_hash, "role": "admin"},
+            }
         else:
-            # DB에 데이터 없으면 secrets.toml의 해시 사용 (기본 패스워드 사용 금지)
-            _admin_hash = st.secrets.get("default_users", {}).get("admin_hash")
-            if _admin_hash:
-                st.session_state.user_db = {
-                    "admin": {"pw_hash": _admin_hash, "role": "admin"},
-                }
-            else:
-                st.session_state.user_db = {}
-                st.sidebar.error(" DB에 사용자 없음 & secrets에 admin_hash 미설정: [default_users] admin_hash를 추가하세요.")
-    except Exception as e:
+            st.sidebar.error(" DB에 사용자 없음 & secrets에 admin_hash 미설정: [default_users] admin_hash를 추가하세요.")
+except Exception as e:
+    if 'user_db' not in st.session_state:
         # Supabase 연결 실패 시 임시 계정 (경고 표시)
         # 보안: 평문 비밀번호 하드코딩 제거 → secrets.toml 또는 환경변수에서 해시 로드
         st.sidebar.warning(" Supabase 연결 실패: 로컬 임시 계정으로 실행 중입니다.")
@@ -493,17 +647,6 @@ if 'user_db' not in st.session_state:
             st.sidebar.error(" Supabase 미연결 & 임시 계정 미설정: secrets.toml에 [fallback_users] 섹션을 추가하세요.")
         st.session_state.user_db = _fb_users
 
-if 'group_master_models' not in st.session_state:
-    st.session_state.group_master_models = {"제조1반": [], "제조2반": [], "제조3반": []}
-
-if 'group_master_items' not in st.session_state:
-    st.session_state.group_master_items = {"제조1반": {}, "제조2반": {}, "제조3반": {}}
-
-# DB model_master → session 동기화 (앱 시작 시 1회)
-if 'master_synced' not in st.session_state:
-    sync_master_to_session()
-    st.session_state.master_synced = True
-
 if 'login_status'            not in st.session_state: st.session_state.login_status            = False
 if 'user_role'               not in st.session_state: st.session_state.user_role               = None
 if 'user_id'                 not in st.session_state: st.session_state.user_id                 = None
@@ -525,6 +668,32 @@ if 'wt_queues'          not in st.session_state: st.session_state.wt_queues
 
 if 'show_signup' not in st.session_state: st.session_state.show_signup = False
 
+
+def _complete_login(uid: str, user_info: dict) -> bool:
+    """로그인 성공 처리 (비밀번호 인증·세션 토큰 복원 공통). 허용되지 않은 역할이면 False."""
+    _role = user_info.get("role", "")
+    if _role not in ROLES:
+        st.error(f" 허용되지 않은 계정 권한입니다. (role={_role})")
+        return False
+    st.session_state.user_id       = uid
+    st.session_state.user_role     = _role
+    _pages, _levels = _parse_custom_perms(user_info.get("custom_permissions", None))
+    st.session_state.user_custom_permissions = _pages
+    st.session_state.user_permission_levels  = _levels
+    # 원장은 프로세스 캐시(st.cache_data) 적중 — 새로고침 복원 시 DB 재조회 없음
+    st.session_state.production_db = load_realtime_ledger()
+    st.session_state.login_status  = True
+    return True
+
+
+flush_session_cookie()   # 로그인/로그아웃 직후 실행에서 브라우저 세션 토큰 저장·삭제
+
+# ── 새로고침 복원: 서명 세션 토큰이 유효하면 비밀번호 재입력 없이 로그인 ──
+if not st.session_state.login_status:
+    _sid_uid = verify_session_token(read_session_token(), st.session_state.user_db)
+    if _sid_uid and not _complete_login(_sid_uid, st.session_state.user_db[_sid_uid]):
+        forget_session()
+
 if not st.session_state.login_status:
     _, c_col, _ = st.columns([1, 1.2, 1])
     with c_col:
@@ -542,30 +711,28 @@ if not st.session_state.login_status:
                         st.error(f" 로그인 잠금 중입니다. {_remain_sec}초 후 다시 시도하세요.")
                         st.stop()
                     user_info = st.session_state.user_db.get(in_id)
-                    if user_info and verify_pw(in_pw, user_info["pw_hash"]):
+                    # bcrypt 는 작업 풀에서 실행 (동시 실행 수 제한) — None 이면 혼잡
+                    _pw_ok = verify_pw_pooled(in_pw, user_info["pw_hash"]) if user_info else False
+                    if _pw_ok is None:
+                        st.error(" 로그인 요청이 많습니다. 잠시 후 다시 시도하세요.")
+                        st.stop()
+                    if _pw_ok:
                         clear_login_attempts(in_id)
                         if _BCRYPT_AVAILABLE and not user_info["pw_hash"].startswith("$2"):
-                            new_hash = hash_pw(in_pw)
-                            st.session_state.user_db[in_id]["pw_hash"] = new_hash
-                            try:
-                                get_supabase().table("users").update(
-                                    {"password_hash": new_hash}
-                                ).eq("username", in_id).execute()
-                            except Exception:
-                                pass
-                        _role = user_info.get("role", "")
-                        if _role not in ROLES:
-                            st.error(f" 허용되지 않은 계정 권한입니다. (role={_role})")
+                            new_hash = hash_pw_pooled(in_pw)
+                            if new_hash:
+                                st.session_state.user_db[in_id]["pw_hash"] = new_hash
+                                try:
+                                    get_supabase().table("users").update(
+                                        {"password_hash": new_hash}
+                                    ).eq("username", in_id).execute()
+                                    invalidate_user_directory()
+                                except Exception:
+                                    pass
+                        if not _complete_login(in_id, user_info):
                             st.stop()
-                        st.session_state.user_id       = in_id
-                        st.session_state.user_role     = _role
-                        _raw_perms = user_info.get("custom_permissions", None)
-                        _pages, _levels = _parse_custom_perms(_raw_perms)
-                        st.session_state.user_custom_permissions = _pages
-                        st.session_state.user_permission_levels  = _levels
-                        st.session_state.production_db = load_realtime_ledger()
-                        st.session_state.schedule_db   = load_schedule()
-                        st.session_state.login_status  = True
+                        remember_session(issue_session_token(
+                            in_id, st.session_state.user_db[in_id]["pw_hash"]))
                         st.rerun()
                     else:
                         _attempts = record_login_failure(in_id, MAX_LOGIN_ATTEMPTS, LOGIN_LOCKOUT_SECONDS)
@@ -623,15 +790,20 @@ if not st.session_state.login_status:
                     elif rq_id.strip() in st.session_state.user_db:
                         st.error("이미 사용 중인 아이디입니다.")
                     else:
-                        _ok = submit_access_request(
-                            username=rq_id.strip(), pw_hash=hash_pw(rq_pw),
-                            name=rq_name.strip(), department=rq_dept,
-                            requested_role=rq_role, reason=rq_reason.strip()
-                        )
-                        if _ok is True:
-                            st.success(" 신청 완료! 관리자 승인 후 로그인 가능합니다.")
+                        _rq_hash = hash_pw_pooled(rq_pw)
+                        if _rq_hash is None:
+                            st.error(" 요청이 많습니다. 잠시 후 다시 시도하세요.")
                         else:
-                            st.error(f"신청 중 오류가 발생했습니다: {_ok}")
+                            _ok = submit_access_request(
+                                username=rq_id.strip(), pw_hash=_rq_hash,
+                                name=rq_name.strip(), department=rq_dept,
+                                requested_role=rq_role, reason=rq_reason.strip()
+                            )
+                            if _ok is True:
+                                st.success(" 신청 완료! 관리자 승인 후 로그인 가능합니다.")
+                            else:
+                                st.error(f"신청 중 오류가 발생했습니다: {_ok}")
+    _cs_mark("login_screen", log_summary=True)   # 기동 후 첫 로그인 화면까지 (프로세스 1회)
     st.stop()
 
 # =================================================================
@@ -653,7 +825,6 @@ if st.sidebar.button(" 메인 현황판", use_container_width=True,
     type="primary" if st.session_state.current_line == "현황판" else "secondary"):
     clear_cal()
     st.session_state.production_db = load_realtime_ledger()
-    st.session_state.schedule_db   = load_schedule()
     st.session_state.current_line  = "현황판"
     st.rerun()
 
@@ -813,6 +984,7 @@ else:
 if st.sidebar.button(" 로그아웃", use_container_width=True):
     for k in ['login_status','user_role','user_id','admin_authenticated']:
         st.session_state[k] = False if k == 'login_status' else None
+    forget_session()
     st.rerun()
 # =================================================================
 # 10. 페이지 렌더링
@@ -850,14 +1022,11 @@ _adm_caller   = st.session_state.get("user_id", "미상")
 
 import json as _json
 _adm_vars_js = (
-    f"<script>"
     f"var _ADM_TG_TOKEN={_json.dumps(_adm_tg_token)};"
     f"var _ADM_TG_CHAT={_json.dumps(_adm_tg_chat)};"
     f"var _ADM_CALLER={_json.dumps(_adm_caller)};"
-    f"</script>"
 )
 _adm_main_js = """
-<script>
 (function(){
     var pdoc = window.parent.document;
     var _old = pdoc.getElementById('adm_float_btn');
@@ -962,203 +1131,66 @@ _adm_main_js = """
         if (e.key === 'Escape') window.parent._admClose();
     });
 })();
-</script>
 """
-st.components.v1.html(_adm_vars_js + _adm_main_js, height=0)
+# 부모 문서 head 에 세션당 1회 설치 (호출자 변경 시에만 재설치) — modules.assets
+inject_head_assets([("adm_call", "js", _adm_vars_js + _adm_main_js)])
 
 # ── 현황판 ──────────────────────────────────────────────────────
 if curr_l == "현황판":
     st.markdown("<h2 class='centered-title'> 생산 통합 현황판</h2>", unsafe_allow_html=True)
-    st.caption(f" 마지막 업데이트: {get_now_kst_str()}")
-
-    db_all = st.session_state.production_db
-
-    # 차트 (데이터 있을 때만)
-    if not db_all.empty:
-        st.markdown("<div class='section-title'> 실시간 차트</div>", unsafe_allow_html=True)
-        ch1, ch2, ch3 = st.columns([2.5, 1.5, 1.2])
-        with ch1:
-            fig = px.bar(
-                db_all.groupby(['반','라인']).size().reset_index(name='수량'),
-                x='라인', y='수량', color='반', barmode='group',
-                title="반별 공정 진행 현황", template="plotly_white",
-                text='수량',
-                category_orders={"라인": ["조립 라인", "검사 라인", "OQC 라인", "포장 라인"]}
-            )
-            fig.update_traces(textposition='outside', textfont_size=11)
-            fig.update_yaxes(dtick=5)
-            fig.update_layout(
-                margin=dict(t=50, b=50, l=20, r=30),
-                legend=dict(orientation="h", yanchor="top", y=-0.15, xanchor="center", x=0.5),
-                title=dict(font=dict(size=13), x=0, xanchor='left', pad=dict(t=4)),
-                uniformtext_minsize=9, uniformtext_mode='hide'
-            )
-            st.plotly_chart(fig, use_container_width=True, key="dashboard_bar")
-        with ch2:
-            fig2 = px.pie(
-                db_all.groupby('상태').size().reset_index(name='수량'),
-                values='수량', names='상태', hole=0.5, title="<b>전체 상태 비중</b>"
-            )
-            fig2.update_traces(
-                textposition='auto',
-                textinfo='percent',
-            )
-            fig2.update_layout(margin=dict(t=40, b=40, l=40, r=40))
-            st.plotly_chart(fig2, use_container_width=True, key="dashboard_pie")
-        with ch3:
-            fig3 = px.bar(
-                db_all.groupby('반').size().reset_index(name='수량'),
-                x='반', y='수량', color='반',
-                title="<b>반별 총 투입</b>", template="plotly_white",
-                text='수량'
-            )
-            fig3.update_traces(textposition='outside', textfont_size=12)
-            fig3.update_yaxes(dtick=5)
-            fig3.update_layout(margin=dict(t=50, b=20), showlegend=False)
-            st.plotly_chart(fig3, use_container_width=True, key="dashboard_bar2")
 
-    st.divider()
+    @live_fragment()
+    def _render_dashboard_live():
+        """현황판 라이브 섹션 (차트·요약 카드·모델별 현황) — fragment 단위 갱신."""
+        sync_realtime()
+        _ver = data_version(("production", "production_schedule"))
+        db_all = st.session_state.production_db
 
-    # 이번달 이력 (요약 카드 + 반별 상세 공통 사용)
-    from datetime import date as _date
-    _today    = _date.today()
-    _mth_from = _today.strftime('%Y-%m-01')
-    _mth_to   = _today.strftime('%Y-%m-%d')
-    _hist = load_production_history(_mth_from, _mth_to)
-
-    # 요약 카드 (이번달 기준 전체 반 합계)
-    st.markdown("<div class='section-title'> 전체 반 생산 요약 (이번달)</div>", unsafe_allow_html=True)
-    col1, col2, col3, col4 = st.columns(4)
-    total      = len(_hist)
-    completed  = len(_hist[(_hist['라인']=='포장 라인')&(_hist['상태']=='완료')]) if not _hist.empty else 0
-    in_prog    = len(_hist[_hist['상태'].isin(ACTIVE_STATES)]) if not _hist.empty else 0
-    defects    = len(_hist[_hist['상태'].str.contains('불량|부적합',na=False)]) if not _hist.empty else 0
-    col1.markdown(f"<div class='stat-box'><div class='stat-label'> 총 투입</div><div class='stat-value'>{total}</div><div class='stat-sub'>이번달 전체 반 투입 건</div></div>", unsafe_allow_html=True)
-    col2.markdown(f"<div class='stat-box'><div class='stat-label'> 최종 완료</div><div class='stat-value'>{completed}</div><div class='stat-sub'>이번달 포장 라인 완료 기준</div></div>", unsafe_allow_html=True)
-    col3.markdown(f"<div class='stat-box'><div class='stat-label'> 작업 중</div><div class='stat-value'>{in_prog}</div><div class='stat-sub'>이번달 조립~포장 진행 중</div></div>", unsafe_allow_html=True)
-    col4.markdown(f"<div class='stat-box'><div class='stat-label'> 불량 이슈</div><div class='stat-value'>{defects}</div><div class='stat-sub'>이번달 불량·부적합 상태 건</div></div>", unsafe_allow_html=True)
-
-    # 반별 상세 보기 토글
-    _show_ban_detail = st.toggle("반별 상세 보기", value=True, key="dash_ban_detail")
-    if _show_ban_detail:
-
-        # 이번달 조립 계획 수량 (달성률 게이지용)
-        _sch_db  = st.session_state.get('schedule_db', pd.DataFrame())
-        _mth_str = _today.strftime('%Y-%m')
-        if not _sch_db.empty:
-            _mth_sch = _sch_db[
-                _sch_db['날짜'].astype(str).str.startswith(_mth_str) &
-                (_sch_db['카테고리'] == '조립계획')
-            ]
-        else:
-            _mth_sch = pd.DataFrame()
-
-        _BAN_CLR_CARD = {"제조1반": "#2471a3", "제조2반": "#1e8449", "제조3반": "#6c3483"}
-        _ban_cols = st.columns(len(PRODUCTION_GROUPS))
-        for _bi, _g in enumerate(PRODUCTION_GROUPS):
-            _h = _hist[_hist['반'] == _g] if not _hist.empty else pd.DataFrame()
-            _d = db_all[db_all['반'] == _g]
-
-            _총투입   = len(_h)
-            _누적완료 = int(len(_h[(_h['라인'] == '포장 라인') & (_h['상태'] == '완료')])) if not _h.empty else 0
-            _진행중   = len(_d[_d['상태'].isin(ACTIVE_STATES)])
-            _불량     = len(_d[_d['상태'].str.contains('불량|부적합', na=False)])
-
-            # 이번달 달성률
-            _bp_rows  = _mth_sch[_mth_sch['반'] == _g] if not _mth_sch.empty else pd.DataFrame()
-            _ban_plan = int(pd.to_numeric(_bp_rows['조립수'], errors='coerce').fillna(0).sum()) if not _bp_rows.empty else 0
-            _달성률   = round(_누적완료 / _ban_plan * 100, 1) if _ban_plan > 0 else 0
-            _gauge_w  = min(int(_달성률), 100)
-            _gauge_c  = "#1e8449" if _달성률 >= 100 else "#d68910" if _달성률 >= 70 else "#c0392b"
-            _pct_txt  = f"{_달성률}%" if _ban_plan > 0 else "계획 미등록"
-            _clr      = _BAN_CLR_CARD.get(_g, "#888")
-
-            with _ban_cols[_bi]:
-                st.markdown(
-                    f"<div style='background:#fffdf8;border:1.5px solid {_clr}44;border-radius:14px;padding:14px 16px;box-sizing:border-box;'>"
-                    f"<div style='display:flex;justify-content:space-between;align-items:center;margin-bottom:6px;'>"
-                    f"<div style='font-size:clamp(0.85rem,1.2vw,1rem);font-weight:bold;color:{_clr};'>{_g}</div>"
-                    f"<div style='font-size:clamp(1rem,1.8vw,1.35rem);font-weight:bold;color:{_gauge_c};'>{_pct_txt}</div>"
-                    f"</div>"
-                    f"<div style='background:#e8e2d8;border-radius:99px;height:6px;margin-bottom:10px;overflow:hidden;'>"
-                    f"<div style='background:{_gauge_c};width:{_gauge_w}%;height:100%;border-radius:99px;'></div>"
-                    f"</div>"
-                    f"<div style='display:grid;grid-template-columns:1fr 1fr;gap:6px;'>"
-                    f"<div style='background:#f0f4f8;border-radius:8px;padding:8px 6px;text-align:center;'>"
-                    f"<div style='font-size:0.62rem;color:#8a7f72;font-weight:bold;margin-bottom:3px;'>이번달 투입</div>"
-                    f"<div style='font-size:clamp(1.1rem,2vw,1.6rem);color:#5a96c8;font-weight:bold;'>{_총투입}</div>"
-                    f"<div style='font-size:0.58rem;color:#aaa;margin-top:2px;'>완료 이력 기준</div></div>"
-                    f"<div style='background:#f0f4f8;border-radius:8px;padding:8px 6px;text-align:center;'>"
-                    f"<div style='font-size:0.62rem;color:#8a7f72;font-weight:bold;margin-bottom:3px;'>최종 완료</div>"
-                    f"<div style='font-size:clamp(1.1rem,2vw,1.6rem);color:#4da875;font-weight:bold;'>{_누적완료}</div>"
-                    f"<div style='font-size:0.58rem;color:#aaa;margin-top:2px;'>포장 완료 기준</div></div>"
-                    f"<div style='background:#f0f4f8;border-radius:8px;padding:8px 6px;text-align:center;'>"
-                    f"<div style='font-size:0.62rem;color:#8a7f72;font-weight:bold;margin-bottom:3px;'>진행 중</div>"
-                    f"<div style='font-size:clamp(1.1rem,2vw,1.6rem);color:#e8a838;font-weight:bold;'>{_진행중}</div>"
-                    f"<div style='font-size:0.58rem;color:#aaa;margin-top:2px;'>현재 공정 대기·작업 중</div></div>"
-                    f"<div style='background:{'#fde8e7' if _불량 > 0 else '#f0f4f8'};border-radius:8px;padding:8px 6px;text-align:center;'>"
-                    f"<div style='font-size:0.62rem;color:#8a7f72;font-weight:bold;margin-bottom:3px;'>불량·부적합</div>"
-                    f"<div style='font-size:clamp(1.1rem,2vw,1.6rem);color:{'#c8605a' if _불량 > 0 else '#aaa'};font-weight:bold;'>{_불량}</div>"
-                    f"<div style='font-size:0.58rem;color:#aaa;margin-top:2px;'>현재 불량·부적합 상태</div></div>"
-                    f"</div></div>",
-                    unsafe_allow_html=True
-                )
+        st.caption(f" 마지막 업데이트: {get_now_kst_str()}")
 
-    st.divider()
+        _today = date.today()
+        _flt = (_today.isoformat(),)   # 날짜가 바뀌면 이번달 집계도 새로 만듦
+
+        # 차트 (데이터 있을 때만) — (섹션, 날짜, 데이터 버전) 이 같으면 figure 재사용
+        if not db_all.empty:
+            fig, fig2, fig3 = render_cached("dash_figs", _flt, _ver, lambda: _build_dashboard_figs(db_all))
+            st.markdown("<div class='section-title'> 실시간 차트</div>", unsafe_allow_html=True)
+            ch1, ch2, ch3 = st.columns([2.5, 1.5, 1.2])
+            with ch1:
+                st.plotly_chart(fig, use_container_width=True, key="dashboard_bar")
+            with ch2:
+                st.plotly_chart(fig2, use_container_width=True, key="dashboard_pie")
+            with ch3:
+                st.plotly_chart(fig3, use_container_width=True, key="dashboard_bar2")
 
-    # ── 모델별 생산 현황 (혼류 대응) ─────────────────────────────────
-    if not db_all.empty:
-        st.markdown("<div class='section-title'> 모델별 실시간 생산 현황</div>", unsafe_allow_html=True)
-        _m_total  = db_all.groupby(['반', '모델']).size().rename('투입')
-        _m_active = db_all[db_all['상태'].isin(ACTIVE_STATES)].groupby(['반', '모델']).size().rename('진행중')
-        _m_done   = db_all[(db_all['라인'] == '포장 라인') & (db_all['상태'] == '완료')].groupby(['반', '모델']).size().rename('완료')
-        _m_ng     = db_all[db_all['상태'].str.contains('불량|부적합', na=False)].groupby(['반', '모델']).size().rename('불량')
-        _mdl_df   = pd.concat([_m_total, _m_active, _m_done, _m_ng], axis=1).fillna(0).astype(int).reset_index()
-        _mdl_df   = _mdl_df[_mdl_df['투입'] > 0].sort_values(['반', '투입'], ascending=[True, False]).reset_index(drop=True)
-
-        if not _mdl_df.empty:
-            _BAN_HDR = {"제조1반": "#2471a3", "제조2반": "#1e8449", "제조3반": "#6c3483"}
-            _tbl = (
-                "<div style='overflow-x:auto;'>"
-                "<table style='width:100%;border-collapse:collapse;font-size:0.82rem;'>"
-                "<tr style='background:#1B3A5C;color:#fff;font-weight:700;'>"
-                "<th style='padding:7px 10px;text-align:left;'>반</th>"
-                "<th style='padding:7px 10px;text-align:left;'>모델</th>"
-                "<th style='padding:7px 10px;text-align:center;'>투입</th>"
-                "<th style='padding:7px 10px;text-align:center;'>진행중</th>"
-                "<th style='padding:7px 10px;text-align:center;'>완료</th>"
-                "<th style='padding:7px 10px;text-align:center;'>불량</th>"
-                "<th style='padding:7px 10px;text-align:left;min-width:120px;'>진행률</th>"
-                "</tr>"
-            )
-            for _ri, _mr in _mdl_df.iterrows():
-                _bg = "#f8f9fa" if _ri % 2 == 0 else "#ffffff"
-                _hc = _BAN_HDR.get(_mr['반'], "#888")
-                _ng_bg = "background:#fde8e7;" if _mr['불량'] > 0 else ""
-                _ng_cl = "color:#c0392b;font-weight:bold;" if _mr['불량'] > 0 else "color:#aaa;"
-                _pct  = round(_mr['완료'] / max(_mr['투입'], 1) * 100)
-                _pc   = "#1e8449" if _pct >= 80 else "#d68910" if _pct >= 50 else "#c0392b"
-                _tbl += (
-                    f"<tr style='background:{_bg};'>"
-                    f"<td style='padding:6px 10px;'><span style='background:{_hc}22;color:{_hc};font-weight:700;"
-                    f"padding:2px 8px;border-radius:5px;font-size:0.78rem;'>{html_mod.escape(str(_mr['반'])[:3])}</span></td>"
-                    f"<td style='padding:6px 10px;font-weight:600;'>{html_mod.escape(str(_mr['모델']))}</td>"
-                    f"<td style='padding:6px 10px;text-align:center;'>{_mr['투입']}</td>"
-                    f"<td style='padding:6px 10px;text-align:center;color:#d68910;font-weight:600;'>{_mr['진행중']}</td>"
-                    f"<td style='padding:6px 10px;text-align:center;color:#1e8449;font-weight:600;'>{_mr['완료']}</td>"
-                    f"<td style='padding:6px 10px;text-align:center;{_ng_bg}'><span style='{_ng_cl}'>{_mr['불량']}</span></td>"
-                    f"<td style='padding:6px 12px;'>"
-                    f"<div style='display:flex;align-items:center;gap:6px;'>"
-                    f"<div style='flex:1;background:#e8e2d8;border-radius:99px;height:5px;overflow:hidden;'>"
-                    f"<div style='background:{_pc};width:{_pct}%;height:100%;border-radius:99px;'></div></div>"
-                    f"<span style='font-size:0.75rem;color:{_pc};font-weight:700;min-width:32px;'>{_pct}%</span>"
-                    f"</div></td>"
-                    f"</tr>"
-                )
-            _tbl += "</table></div>"
-            st.markdown(_tbl, unsafe_allow_html=True)
+        st.divider()
 
-    st.divider()
+        # 이번달 요약 카드 + 반별 카드 HTML
+        _boxes, _cards = render_cached("dash_cards", _flt, _ver,
+                                       lambda: _build_dashboard_cards(db_all, _today, _ver))
+
+        st.markdown("<div class='section-title'> 전체 반 생산 요약 (이번달)</div>", unsafe_allow_html=True)
+        for _col, _box in zip(st.columns(4), _boxes):
+            _col.markdown(_box, unsafe_allow_html=True)
+
+        # 반별 상세 보기 토글
+        _show_ban_detail = st.toggle("반별 상세 보기", value=True, key="dash_ban_detail")
+        if _show_ban_detail:
+            for _col, _card in zip(st.columns(len(PRODUCTION_GROUPS)), _cards):
+                _col.markdown(_card, unsafe_allow_html=True)
+
+        st.divider()
+
+        # ── 모델별 생산 현황 (혼류 대응) ─────────────────────────────────
+        if not db_all.empty:
+            _tbl = render_cached("dash_model_table", _flt, _ver, lambda: _build_model_table_html(db_all))
+            if _tbl:
+                st.markdown("<div class='section-title'> 모델별 실시간 생산 현황</div>", unsafe_allow_html=True)
+                st.markdown(_tbl, unsafe_allow_html=True)
+
+        st.divider()
+
+    _render_dashboard_live()
 
     # 캘린더 (월별)
     st.markdown("<div class='section-title'> 생산 일정 캘린더</div>", unsafe_allow_html=True)
@@ -1178,7 +1210,8 @@ elif curr_l == "조립 라인":
 
     # ── 오늘 일정 알림 & 팝업 ─────────────────────────────────
     today_str   = datetime.now(KST).strftime('%Y-%m-%d')
-    sch_all     = st.session_state.schedule_db
+    _next_mth   = (date.today().replace(day=1) + timedelta(days=32)).strftime('%Y-%m')
+    sch_all     = load_schedule_months((today_str[:7], _next_mth))   # 이번 달 + 다음 달만
     # 조립 라인은 조립계획만, 포장 라인은 포장계획만 표시
     LINE_SCH_FILTER = {"조립 라인": "조립계획", "포장 라인": "포장계획"}
     sch_cat_filter  = LINE_SCH_FILTER.get(curr_l)
@@ -1240,7 +1273,6 @@ elif curr_l == "조립 라인":
                 rc[5].caption(f" {note}" if note and note != 'nan' else "-")
 
     # 이번 달 + 다음 달 일정 (오늘 이후)
-    _next_mth = (date.today().replace(day=1) + timedelta(days=32)).strftime('%Y-%m')
     _month_sch_pre = sch_all[
         (sch_all['날짜'] >= today_str) &
         (sch_all['날짜'].str[:7].isin([today_str[:7], _next_mth])) &
@@ -1276,9 +1308,12 @@ elif curr_l == "조립 라인":
     # ──  오늘의 목표 달성 현황 ─────────────────────────────────
     # 모델 필터 적용: 선택된 모델의 품목코드(pn) 기준으로 목표/실적 집계
     # (생산 데이터의 '모델'과 일정의 '모델명'이 다를 수 있으므로 pn으로 매칭)
+    # pn 후보: 모델 마스터 인덱스의 등록 품목코드 + 실제 생산된 품목코드
     _plan_sch = today_sch
-    if _sel_model and not f_df.empty and not today_sch.empty and 'pn' in today_sch.columns:
-        _sel_pns = f_df[f_df['모델'] == _sel_model]['품목코드'].unique().tolist()
+    if _sel_model and not today_sch.empty and 'pn' in today_sch.columns:
+        _sel_pns = set(get_master_items(curr_g, _sel_model))
+        _sel_pns.update(f_df['품목코드'].unique().tolist())
+        _sel_pns.discard("")
         if _sel_pns:
             _plan_sch = today_sch[today_sch['pn'].isin(_sel_pns)]
     _plan_qty = int(pd.to_numeric(_plan_sch['조립수'], errors='coerce').fillna(0).sum()) if not _plan_sch.empty else 0
@@ -1400,11 +1435,9 @@ elif curr_l == "조립 라인":
                 if f_df_view.empty:
                     st.warning(f" **'{sn_search.strip()}'** 에 해당하는 시리얼이 없습니다.")
                 # 자동 체크는 조립 라인의 처리 가능 상태(actionable)만 적용
-                _asm_cb_ver_now = st.session_state[_asm_search_cnt]
                 _wip_mask = f_df_view['상태'].isin(WIP_STATES)
                 for _si in f_df_view.index[_wip_mask]:
                     st.session_state[_asm_chk_key][str(_si)] = True
-                    st.session_state[f"asm_cb_{curr_g}_{_si}_{_asm_cb_ver_now}"] = True
             else:
                 # 검색어 없을 때는 조립 라인 항목만 표시
                 f_df_view = f_df
@@ -1457,63 +1490,52 @@ elif curr_l == "조립 라인":
                             _prod_bulk_update(_run_bulk_db_ops(_ops))
                         _rerun("asm_hist")
 
-            # STATUS_STYLE: 모듈 상수 사용 (상단 정의 참조)
-            h = st.columns([0.4, 2.0, 1.8, 1.4, 1.6, 1.1, 1.1])
-            for col, txt in zip(h, ["","기록 시간","모델","품목","시리얼","",""]):
-                col.markdown(f"<p style='font-size:0.72rem;font-weight:700;color:#8a7f72;margin:0;text-align:center;'>{txt}</p>", unsafe_allow_html=True)
-
-            _asm_cb_ver = st.session_state[_asm_search_cnt]  # 스캔 시 변경 → 체크박스 강제 재렌더
-            # 자재 시리얼 일괄 조회 (N+1 방지)
-            _asm_bulk_sns = tuple(f_df_view['시리얼'].unique().tolist())
-            _asm_bulk_mats = load_material_serials_bulk(_asm_bulk_sns) if _asm_bulk_sns else pd.DataFrame()
-            for row in f_df_view.sort_values('시간', ascending=False).reset_index().to_dict('records'):
-                idx = row['index']
-                is_actionable = row['상태'] in WIP_STATES
-                r = st.columns([0.4, 2.0, 1.8, 1.4, 1.6, 1.1, 1.1])
-                if is_actionable:
-                    _ck = r[0].checkbox("", key=f"asm_cb_{curr_g}_{idx}_{_asm_cb_ver}",
-                        value=st.session_state[_asm_chk_key].get(str(idx), False),
-                        label_visibility="collapsed")
-                    st.session_state[_asm_chk_key][str(idx)] = _ck
-                else:
-                    _ck = False
-                r[1].caption(str(row['시간'])[:16]); r[2].caption(row['모델'])
-                r[3].caption(row['품목코드'])
-                _asm_mc = len(_asm_bulk_mats[_asm_bulk_mats['메인시리얼'] == row['시리얼']]) if not _asm_bulk_mats.empty else 0
-                _asm_tog_key = f"mat_tog_{row['시리얼']}_{curr_g}_asm"
-                _asm_btn_lbl = f"{row['시리얼']}\n자재 {_asm_mc}개" if _asm_mc > 0 else row['시리얼']
-                if r[4].button(_asm_btn_lbl, key=f"sntog_asm_{idx}_{_asm_cb_ver}",
-                               use_container_width=True, help="클릭하여 자재 시리얼 조회"):
-                    st.session_state[_asm_tog_key] = not st.session_state.get(_asm_tog_key, False)
-                if is_actionable:
-                    if r[5].button("완료", key=f"ok_{idx}", use_container_width=True, type="primary"):
-                        _upd = {'상태':'검사대기','시간':get_now_kst_str()}
-                        update_row(row['시리얼'], _upd)
-                        insert_audit_log(시리얼=row['시리얼'], 모델=row['모델'], 반=curr_g,
-                            이전상태=row['상태'], 이후상태='검사대기', 작업자=st.session_state.user_id)
-                        st.session_state[_asm_chk_key].pop(str(idx), None)
-                        st.session_state[_asm_search_cnt] += 1  # 체크박스 키 리셋
-                        _prod_update(row['시리얼'], _upd)
-                        _rerun("asm_hist")
-                    _ng_open_key = f"_ng_open_asm_{idx}"
-                    if not st.session_state.get(_ng_open_key):
-                        if r[6].button("불량", key=f"ng_{idx}", use_container_width=True):
-                            st.session_state[_ng_open_key] = True
-                            _rerun("asm_hist")
-                    else:
-                        r[6].button("불량", key=f"ng_{idx}", use_container_width=True, disabled=True)
-                else:
-                    s = row['상태']
-                    s_esc = html_mod.escape(str(s))
-                    if "불량" in str(s):
-                        r[5].markdown(f"<div style='background:#fde8e7;color:#7a2e2a;padding:2px 6px;border-radius:5px;text-align:center;font-weight:bold;font-size:0.75rem;'> {s_esc}</div>", unsafe_allow_html=True)
-                    else:
-                        bg,tc,bc,ic = STATUS_STYLE.get(s, ('#f5f2ec','#5a5048','#c8b89a','•'))
-                        ic_esc = html_mod.escape(str(ic))
-                        r[5].markdown(f"<div style='background:{bg};color:{tc};padding:2px 6px;border-radius:5px;text-align:center;font-weight:bold;border:1px solid {bc};font-size:0.75rem;'>{ic_esc} {s_esc}</div>", unsafe_allow_html=True)
-                # ── 불량 원인 선택 패널 (개별  클릭 후) ──
-                _ng_open_key = f"_ng_open_asm_{idx}"
-                if st.session_state.get(_ng_open_key):
+            # ── 작업 목록 (현재 페이지만 data_editor 1개로 표시 — 재공 수와 무관하게 렌더 일정) ──
+            _asm_cb_ver = f"{st.session_state[_asm_search_cnt]}_{sn_search.strip()}"  # 스캔·일괄 처리 시 선택 상태 재적용
+            _asm_wl_key = f"asm_hist_{curr_g}"
+            _asm_page = page_slice(f_df_view.sort_values('시간', ascending=False), _asm_wl_key)
+            # 자재 시리얼 요약 (공유 인덱스 — 현재 페이지 시리얼만)
+            _asm_mats = get_material_summary(_asm_page['시리얼'])
+            _asm_page = _asm_page.assign(
+                _시간=_asm_page['시간'].astype(str).str.slice(0, 16),
+                _자재=_asm_page['시리얼'].map(lambda sn: len(_asm_mats.get(sn, ()))),
+            )
+            selection_editor(
+                _asm_page, _asm_wl_key, st.session_state[_asm_chk_key],
+                {"기록 시간": "_시간", "모델": "모델", "품목": "품목코드",
+                 "시리얼": "시리얼", "자재": "_자재", "상태": "상태"},
+                version=_asm_cb_ver,
+                selectable=_asm_page['상태'].isin(WIP_STATES),
+            )
+            st.caption(" 작업 중 항목만 선택됩니다 — 선택 후 위의 [일괄 완료]/[일괄 불량]으로 처리하세요.")
+
+            # ── 개별 처리 (현재 페이지의 작업 중 항목 1대 — 완료 / 불량 원인 입력) ──
+            _asm_act = _asm_page[_asm_page['상태'].isin(WIP_STATES)]
+            if not _asm_act.empty:
+                _asm_can_write = check_perm(f"조립 라인::{curr_g}", "write")
+                ia1, ia2, ia3 = st.columns([2.5, 1, 1])
+                idx = ia1.selectbox(
+                    "개별 처리", _asm_act.index.tolist(), key=f"asm_one_{curr_g}",
+                    format_func=lambda i: f"{_asm_act.at[i, '시리얼']}  ·  {_asm_act.at[i, '모델']}",
+                    label_visibility="collapsed")
+                row = _asm_act.loc[idx]
+                _ng_open_key = f"_ng_open_asm_{curr_g}"
+                if ia2.button("완료", key=f"ok_one_{curr_g}", use_container_width=True, type="primary",
+                              disabled=not _asm_can_write):
+                    _upd = {'상태':'검사대기','시간':get_now_kst_str()}
+                    update_row(row['시리얼'], _upd)
+                    insert_audit_log(시리얼=row['시리얼'], 모델=row['모델'], 반=curr_g,
+                        이전상태=row['상태'], 이후상태='검사대기', 작업자=st.session_state.user_id)
+                    st.session_state[_asm_chk_key].pop(str(idx), None)
+                    st.session_state[_asm_search_cnt] += 1  # 선택 상태 재적용
+                    _prod_update(row['시리얼'], _upd)
+                    _rerun("asm_hist")
+                if ia3.button("불량", key=f"ng_one_{curr_g}", use_container_width=True,
+                              disabled=not _asm_can_write or st.session_state.get(_ng_open_key) == int(idx)):
+                    st.session_state[_ng_open_key] = int(idx)
+                    _rerun("asm_hist")
+                # ── 불량 원인 선택 패널 (개별 불량 클릭 후) ──
+                if st.session_state.get(_ng_open_key) == int(idx):
                     with st.container(border=True):
                         st.caption(f" 불량 원인 입력 — `{row['시리얼']}`")
                         _nc1, _nc2, _nc3 = st.columns([2.5, 1, 1])
@@ -1539,18 +1561,19 @@ elif curr_l == "조립 라인":
                         if _nc3.button("취소", key=f"_ng_cancel_asm_{idx}", use_container_width=True):
                             st.session_state.pop(_ng_open_key, None)
                             _rerun("asm_hist")
-                # ── 자재 시리얼 토글 표시 ──
-                if st.session_state.get(_asm_tog_key, False):
-                    _asm_row_mats = _asm_bulk_mats[_asm_bulk_mats['메인시리얼'] == row['시리얼']] if not _asm_bulk_mats.empty else pd.DataFrame()
+
+            # ── 자재 시리얼 조회 (현재 페이지 기준) ──
+            _asm_mat_sns = [sn for sn in _asm_page['시리얼'] if _asm_mats.get(sn)]
+            if _asm_mat_sns:
+                _asm_mat_sel = st.selectbox(" 자재 시리얼 조회", ["(선택)"] + _asm_mat_sns,
+                                            key=f"asm_mat_view_{curr_g}")
+                if _asm_mat_sel != "(선택)":
                     with st.container(border=True):
-                        st.caption(f" 자재 시리얼 — `{row['시리얼']}`")
-                        if not _asm_row_mats.empty:
-                            for _am in _asm_row_mats.to_dict('records'):
-                                amc1, amc2 = st.columns([2, 4])
-                                amc1.caption(_am.get('자재명', ''))
-                                amc2.caption(f"`{_am.get('자재시리얼', '')}`")
-                        else:
-                            st.caption("등록된 자재 시리얼 없음")
+                        st.caption(f" 자재 시리얼 — `{_asm_mat_sel}`")
+                        for _am_name, _am_sn in _asm_mats.get(_asm_mat_sel, ()):
+                            amc1, amc2 = st.columns([2, 4])
+                            amc1.caption(_am_name)
+                            amc2.caption(f"`{_am_sn}`")
     else:
         st.info("등록된 생산 내역이 없습니다.")
 
@@ -1567,13 +1590,13 @@ elif curr_l == "조립 라인":
     with st.container(border=True):
         st.markdown(f"####  {curr_g} 신규 생산 등록")
 
-        g_models     = st.session_state.group_master_models.get(curr_g, [])
+        g_models     = get_master_models(curr_g)
         _reg_model_opts = ["선택하세요."] + g_models
         _reg_default_idx = 0
         if _sel_model and _sel_model in g_models:
             _reg_default_idx = g_models.index(_sel_model) + 1
         target_model = st.selectbox("투입 모델 선택", _reg_model_opts, index=_reg_default_idx, key=f"model_sel_{curr_g}")
-        g_items      = st.session_state.group_master_items.get(curr_g, {}).get(target_model, [])
+        g_items      = get_master_items(curr_g, target_model)
 
         ef1, ef2 = st.columns(2)
         target_item = ef1.selectbox("품목 코드",
@@ -1909,107 +1932,127 @@ elif curr_l in ["검사 라인", "포장 라인"]:
     st.markdown(f"<h2 class='centered-title'> {curr_g_h} {curr_l_h} 현황</h2>", unsafe_allow_html=True)
     prev = "조립 라인" if curr_l == "검사 라인" else "OQC 라인"
 
-    db_s = st.session_state.production_db
-    if curr_l == "검사 라인":
-        wait_list = db_s[(db_s['반']==curr_g)&(db_s['상태'].isin(['검사대기','수리 완료(재투입)']))]
-    else:
-        wait_list = db_s[(db_s['반']==curr_g)&(db_s['상태']=='출하승인')]
-    _wait_cnt     = len(wait_list)
-    _reentry_cnt  = int(len(wait_list[wait_list['상태'] == '수리 완료(재투입)'])) if not wait_list.empty else 0
     DEFECT_CAUSES = st.session_state.get('dropdown_defect_cause', ['(선택)', '기타 (직접 입력)'])
 
-
-    _wck_key     = f"wait_ck_{curr_g}_{curr_l}"
-    _wscan_cnt   = f"wscan_cnt_{curr_g}_{curr_l}"
-    if _wck_key   not in st.session_state: st.session_state[_wck_key]   = {}
-    if _wscan_cnt not in st.session_state: st.session_state[_wscan_cnt] = 0
-
-    _wait_title = (f"  ·  {_wait_cnt}건" + (f" (수리 재투입 {_reentry_cnt}건 포함)" if _reentry_cnt else "")) if _wait_cnt else "  ·  없음"
-    with st.expander(f" 이전 공정({prev}) 완료 — 입고 대기" + _wait_title, expanded=_xp("chk_wait"), key="_xp_chk_wait"):
-        if not wait_list.empty:
-            _wscan_key = f"wscan_{curr_g}_{curr_l}_{st.session_state[_wscan_cnt]}"
-            ws1, ws2 = st.columns([3, 3])
-            w_scan = ws1.text_input(" 시리얼 스캔/검색", placeholder="스캔 또는 입력 → 자동 체크",
-                                    key=_wscan_key)
-            if st.session_state.pop("_autofocus_after_rerun", None) == _wscan_key:
-                _inject_autofocus(placeholder="스캔 또는 입력 → 자동 체크")
-            if w_scan.strip():
-                matched_sn = wait_list[wait_list['시리얼'].str.contains(
-                    w_scan.strip(), case=False, na=False)]
-                if not matched_sn.empty:
-                    for wi in matched_sn.index:
-                        st.session_state[_wck_key][str(wi)] = True
-                    st.session_state["_autofocus_after_rerun"] = f"wscan_{curr_g}_{curr_l}_{st.session_state[_wscan_cnt] + 1}"
-                    st.session_state[_wscan_cnt] += 1  # 키 변경 → 체크박스 강제 재렌더
-                    _rerun("chk_wait")
-                else:
-                    ws1.warning(f"**'{w_scan.strip()}'** — 대기 목록에 없습니다.")
-
-            w_checked = [k for k,v in st.session_state[_wck_key].items() if v]
-            if w_checked:
-                wba1, wba2, wba3 = st.columns([3, 1, 1])
-                wba1.markdown(f"<span style='color:#2E75B6;font-weight:700;'> {len(w_checked)}개 선택됨</span>",
-                              unsafe_allow_html=True)
-                if wba2.button(" 일괄 입고", key=f"wait_bulk_{curr_g}_{curr_l}",
-                               type="primary", use_container_width=True):
+    # ── 입고 대기 (fragment — 대기 목록만 주기 갱신, 아래 이력·입력 위젯은 유지) ──
+    @live_fragment()
+    def _render_wait_list():
+        sync_realtime()
+        db_s = st.session_state.production_db
+        if curr_l == "검사 라인":
+            wait_list = db_s[(db_s['반']==curr_g)&(db_s['상태'].isin(['검사대기','수리 완료(재투입)']))]
+        else:
+            wait_list = db_s[(db_s['반']==curr_g)&(db_s['상태']=='출하승인')]
+        _wait_cnt     = len(wait_list)
+        _reentry_cnt  = int(len(wait_list[wait_list['상태'] == '수리 완료(재투입)'])) if not wait_list.empty else 0
+
+        _wck_key     = f"wait_ck_{curr_g}_{curr_l}"
+        _wscan_cnt   = f"wscan_cnt_{curr_g}_{curr_l}"
+        if _wck_key   not in st.session_state: st.session_state[_wck_key]   = {}
+        if _wscan_cnt not in st.session_state: st.session_state[_wscan_cnt] = 0
+
+        _wait_title = (f"  ·  {_wait_cnt}건" + (f" (수리 재투입 {_reentry_cnt}건 포함)" if _reentry_cnt else "")) if _wait_cnt else "  ·  없음"
+        with st.expander(f" 이전 공정({prev}) 완료 — 입고 대기" + _wait_title, expanded=_xp("chk_wait"), key="_xp_chk_wait"):
+            if not wait_list.empty:
+                _w_view   = wait_list.sort_values(['모델', '품목코드', '시간'], ascending=[True, True, False])
+                _w_wl_key = f"wait_{curr_g}_{curr_l}"
+                _wscan_key = f"wscan_{curr_g}_{curr_l}_{st.session_state[_wscan_cnt]}"
+                ws1, ws2 = st.columns([3, 3])
+                w_scan = ws1.text_input(" 시리얼 스캔/검색", placeholder="스캔 또는 입력 → 자동 체크",
+                                        key=_wscan_key)
+                if st.session_state.pop("_autofocus_after_rerun", None) == _wscan_key:
+                    _inject_autofocus(placeholder="스캔 또는 입력 → 자동 체크")
+                if w_scan.strip():
+                    matched_sn = wait_list[wait_list['시리얼'].str.contains(
+                        w_scan.strip(), case=False, na=False)]
+                    if not matched_sn.empty:
+                        for wi in matched_sn.index:
+                            st.session_state[_wck_key][str(wi)] = True
+                        goto_row(_w_view, _w_wl_key, matched_sn.index[0])  # 체크된 행이 있는 페이지로 이동
+                        st.session_state["_autofocus_after_rerun"] = f"wscan_{curr_g}_{curr_l}_{st.session_state[_wscan_cnt] + 1}"
+                        st.session_state[_wscan_cnt] += 1  # 키 변경 → 체크박스 강제 재렌더
+                        _rerun("chk_wait")
+                    else:
+                        ws1.warning(f"**'{w_scan.strip()}'** — 대기 목록에 없습니다.")
+
+                w_checked = [k for k,v in st.session_state[_wck_key].items() if v]
+                if w_checked:
+                    wba1, wba2, wba3 = st.columns([3, 1, 1])
+                    wba1.markdown(f"<span style='color:#2E75B6;font-weight:700;'> {len(w_checked)}개 선택됨</span>",
+                                  unsafe_allow_html=True)
+                    if wba2.button(" 일괄 입고", key=f"wait_bulk_{curr_g}_{curr_l}",
+                                   type="primary", use_container_width=True):
+                        _next_s = '검사중' if curr_l == '검사 라인' else '포장중'
+                        _ops = []
+                        for wi in w_checked:
+                            wi_int = int(wi)
+                            if wi_int in wait_list.index:
+                                _wr = wait_list.loc[wi_int]
+                                _upd = {'시간': get_now_kst_str(),
+                                    '라인': curr_l, '상태': _next_s,
+                                    '작업자': st.session_state.user_id}
+                                _ops.append({"sn": _wr['시리얼'], "data": _upd,
+                                    "audit": {"시리얼": _wr['시리얼'], "모델": _wr['모델'],
+                                             "반": curr_g, "이전상태": _wr['상태'], "이후상태": _next_s,
+                                             "작업자": st.session_state.user_id}})
+                        st.session_state[_wck_key] = {}
+                        st.session_state[_wscan_cnt] += 1  # 체크박스 키 리셋
+                        with st.spinner("처리 중..."):
+                            _prod_bulk_update(_run_bulk_db_ops(_ops))
+                        _rerun("chk_wait")
+                    if wba3.button(" 선택 해제", key=f"wait_unck_{curr_g}_{curr_l}",
+                                   use_container_width=True):
+                        st.session_state[_wck_key] = {}
+                        st.session_state[_wscan_cnt] += 1  # 체크박스 키 리셋
+                        _rerun("chk_wait")
+
+                st.markdown("<hr style='margin:8px 0;border-color:#e0d8c8;'>", unsafe_allow_html=True)
+
+                # 모델·품목별 수량 요약 + 현재 페이지만 data_editor 로 표시 (재공 수와 무관하게 렌더 일정)
+                _w_grp = wait_list.groupby(['모델', '품목코드']).size()
+                st.markdown("  ·  ".join(
+                    f"**{html_mod.escape(str(m))}**" + (f" `{html_mod.escape(str(pn))}`" if pn else "") + f" {n}대"
+                    for (m, pn), n in _w_grp.items()))
+                _w_page = page_slice(_w_view, _w_wl_key)
+                _w_page = _w_page.assign(
+                    _시간=_w_page['시간'].astype(str).str.slice(0, 16),
+                    _구분=_w_page['상태'].map({'수리 완료(재투입)': '수리 재투입'}).fillna(''),
+                )
+                selection_editor(
+                    _w_page, _w_wl_key, st.session_state[_wck_key],
+                    {"모델": "모델", "품목": "품목코드", "시리얼": "시리얼",
+                     "완료 시간": "_시간", "구분": "_구분"},
+                    version=st.session_state[_wscan_cnt],
+                )
+                st.caption(" 선택 후 위의 [일괄 입고]로 처리하세요 (스캔 시 자동 체크).")
+
+                # ── 개별 입고 (현재 페이지 1대) ──
+                wi1, wi2 = st.columns([4, 1])
+                widx = wi1.selectbox(
+                    "개별 입고", _w_page.index.tolist(), key=f"wait_one_{curr_g}_{curr_l}",
+                    format_func=lambda i: f"{_w_page.at[i, '시리얼']}  ·  {_w_page.at[i, '모델']}"
+                                          + ("  (수리 재투입)" if _w_page.at[i, '상태'] == '수리 완료(재투입)' else ""),
+                    label_visibility="collapsed")
+                if wi2.button(" 입고", key=f"in_one_{curr_g}_{curr_l}", use_container_width=True):
+                    wrow = _w_page.loc[widx]
                     _next_s = '검사중' if curr_l == '검사 라인' else '포장중'
-                    _ops = []
-                    for wi in w_checked:
-                        wi_int = int(wi)
-                        if wi_int in wait_list.index:
-                            _wr = wait_list.loc[wi_int]
-                            _upd = {'시간': get_now_kst_str(),
-                                '라인': curr_l, '상태': _next_s,
-                                '작업자': st.session_state.user_id}
-                            _ops.append({"sn": _wr['시리얼'], "data": _upd,
-                                "audit": {"시리얼": _wr['시리얼'], "모델": _wr['모델'],
-                                         "반": curr_g, "이전상태": _wr['상태'], "이후상태": _next_s,
-                                         "작업자": st.session_state.user_id}})
-                    st.session_state[_wck_key] = {}
-                    st.session_state[_wscan_cnt] += 1  # 체크박스 키 리셋
-                    with st.spinner("처리 중..."):
-                        _prod_bulk_update(_run_bulk_db_ops(_ops))
-                    _rerun("chk_wait")
-                if wba3.button(" 선택 해제", key=f"wait_unck_{curr_g}_{curr_l}",
-                               use_container_width=True):
-                    st.session_state[_wck_key] = {}
-                    st.session_state[_wscan_cnt] += 1  # 체크박스 키 리셋
-                    _rerun("chk_wait")
+                    _upd = {'시간': get_now_kst_str(),
+                        '라인': curr_l, '상태': _next_s,
+                        '작업자': st.session_state.user_id}
+                    if update_row(wrow['시리얼'], _upd):
+                        insert_audit_log(시리얼=wrow['시리얼'], 모델=wrow['모델'],
+                            반=curr_g, 이전상태=wrow['상태'], 이후상태=_next_s,
+                            작업자=st.session_state.user_id)
+                        st.session_state[_wck_key].pop(str(widx), None)
+                        st.session_state[_wscan_cnt] += 1  # 선택 상태 재적용
+                        _prod_update(wrow['시리얼'], _upd)
+                        _rerun("chk_wait")
+            else:
+                st.info("입고 대기 물량 없음")
 
-            st.markdown("<hr style='margin:8px 0;border-color:#e0d8c8;'>", unsafe_allow_html=True)
+    _render_wait_list()
 
-            grp_w = wait_list.groupby(['모델','품목코드'])
-            for (w_model, w_pn), w_gdf in grp_w:
-                with st.container(border=True):
-                    wc1, wc2 = st.columns([4, 1])
-                    wc1.markdown(f"**{w_model}**" + (f"  `{w_pn}`" if w_pn else ""))
-                    wc2.caption(f"{len(w_gdf)}대")
-                    _wcb_ver = st.session_state[_wscan_cnt]
-                    for wrow in w_gdf.reset_index().to_dict('records'):
-                        widx = wrow['index']
-                        wr1, wr2, wr3 = st.columns([0.5, 3, 1.2])
-                        _wck = wr1.checkbox("", key=f"wck_{curr_g}_{curr_l}_{widx}_{_wcb_ver}",
-                            value=st.session_state[_wck_key].get(str(widx), False),
-                            label_visibility="collapsed")
-                        st.session_state[_wck_key][str(widx)] = _wck
-                        _is_reentry = wrow.get('상태') == '수리 완료(재투입)'
-                        _reentry_badge = "  <span style='background:#fff3cd;color:#856404;font-size:0.68rem;font-weight:700;padding:1px 6px;border-radius:8px;border:1px solid #ffc107;'>수리 재투입</span>" if _is_reentry else ""
-                        wr2.markdown(f"`{html_mod.escape(str(wrow['시리얼']))}`  <span style='color:#999;font-size:0.75rem;'>{html_mod.escape(str(wrow.get('시간',''))[:16])}</span>{_reentry_badge}",
-                                    unsafe_allow_html=True)
-                        if wr3.button(" 입고", key=f"in_{widx}", use_container_width=True):
-                            _next_s = '검사중' if curr_l == '검사 라인' else '포장중'
-                            _upd = {'시간': get_now_kst_str(),
-                                '라인': curr_l, '상태': _next_s,
-                                '작업자': st.session_state.user_id}
-                            if update_row(wrow['시리얼'], _upd):
-                                insert_audit_log(시리얼=wrow['시리얼'], 모델=wrow['모델'],
-                                    반=curr_g, 이전상태=wrow['상태'], 이후상태=_next_s,
-                                    작업자=st.session_state.user_id)
-                                st.session_state[_wck_key].pop(str(widx), None)
-                                _prod_update(wrow['시리얼'], _upd)
-                                _rerun("chk_wait")
-        else:
-            st.info("입고 대기 물량 없음")
+    db_s = st.session_state.production_db
 
     st.divider()
     f_df = db_s[(db_s['반']==curr_g)&(db_s['라인']==curr_l)]
@@ -2112,9 +2155,8 @@ elif curr_l in ["검사 라인", "포장 라인"]:
                              unsafe_allow_html=True)
 
             _hcb_ver = st.session_state[_hsrch_cnt]
-            # 자재 시리얼 일괄 조회 (N+1 방지)
-            _hist_bulk_sns = tuple(f_df_view['시리얼'].unique().tolist())
-            _hist_bulk_mats = load_material_serials_bulk(_hist_bulk_sns) if _hist_bulk_sns else pd.DataFrame()
+            # 자재 시리얼 요약 (공유 인덱스 — N+1 / 행×자재 필터 방지)
+            _hist_mats = get_material_summary(f_df_view['시리얼'])
             for row in f_df_view.sort_values('시간', ascending=False).reset_index().to_dict('records'):
                 idx = row['index']
                 is_act = row['상태'] in ["검사중","포장중","수리 완료(재투입)"]
@@ -2129,7 +2171,7 @@ elif curr_l in ["검사 라인", "포장 라인"]:
                 r[1].caption(str(row['시간'])[:16])
                 r[2].caption(row['모델'])
                 r[3].caption(row['품목코드'])
-                _hist_mc = len(_hist_bulk_mats[_hist_bulk_mats['메인시리얼'] == row['시리얼']]) if not _hist_bulk_mats.empty else 0
+                _hist_mc = len(_hist_mats.get(row['시리얼'], ()))
                 _hist_tog_key = f"mat_tog_{row['시리얼']}_{curr_g}_{curr_l}"
                 _hist_btn_lbl = f"{row['시리얼']}\n자재 {_hist_mc}개" if _hist_mc > 0 else row['시리얼']
                 if r[4].button(_hist_btn_lbl, key=f"sntog_hist_{idx}_{_hcb_ver}",
@@ -2195,14 +2237,14 @@ elif curr_l in ["검사 라인", "포장 라인"]:
                             _rerun("chk_hist")
                 # ── 자재 시리얼 토글 표시 ──
                 if st.session_state.get(_hist_tog_key, False):
-                    _hist_row_mats = _hist_bulk_mats[_hist_bulk_mats['메인시리얼'] == row['시리얼']] if not _hist_bulk_mats.empty else pd.DataFrame()
+                    _hist_row_mats = _hist_mats.get(row['시리얼'], ())
                     with st.container(border=True):
                         st.caption(f" 자재 시리얼 — `{row['시리얼']}`")
-                        if not _hist_row_mats.empty:
-                            for _hm in _hist_row_mats.to_dict('records'):
+                        if _hist_row_mats:
+                            for _hm_name, _hm_sn in _hist_row_mats:
                                 hmc1, hmc2 = st.columns([2, 4])
-                                hmc1.caption(_hm.get('자재명', ''))
-                                hmc2.caption(f"`{_hm.get('자재시리얼', '')}`")
+                                hmc1.caption(_hm_name)
+                                hmc2.caption(f"`{_hm_sn}`")
                         else:
                             st.caption("등록된 자재 시리얼 없음")
                         # ── 라벨 시리얼 (완료 항목) ──
@@ -2369,14 +2411,14 @@ elif curr_l == "생산 현황 리포트":
 
     if not df_rpt.empty:
         # ── KPI ──────────────────────────────────────────────────────
-        _rpt_done    = df_rpt[(df_rpt['라인'] == '포장 라인') & (df_rpt['상태'] == '완료')]
-        _rpt_ing     = df_rpt[df_rpt['상태'].isin(ACTIVE_STATES)]
-        _rpt_defect  = df_rpt[df_rpt['상태'].str.contains('불량|부적합', na=False)]
+        _rpt_kpi = scope_metrics(
+            kpi_snapshot(_rpt_from, _rpt_to, data_version(("production", "production_schedule"))),
+            v_group)
         kp1, kp2, kp3, kp4 = st.columns(4)
-        kp1.metric(" 총 투입",      f"{len(df_rpt)} 대")
-        kp2.metric(" 최종 완료",    f"{len(_rpt_done)} 대")
-        kp3.metric(" 진행 중",     f"{len(_rpt_ing)} 대")
-        kp4.metric(" 불량/부적합", f"{len(_rpt_defect)} 건")
+        kp1.metric(" 총 투입",      f"{_rpt_kpi['총투입']} 대")
+        kp2.metric(" 최종 완료",    f"{_rpt_kpi['최종완료']} 대")
+        kp3.metric(" 진행 중",     f"{_rpt_kpi['진행중']} 대")
+        kp4.metric(" 불량/부적합", f"{_rpt_kpi['불량']} 건")
         st.divider()
 
         # ── 차트 행 1: 상태별 분포 + 모델별 비중 ─────────────────────
@@ -2792,6 +2834,7 @@ elif curr_l == "포장 라인":
 
 # ── 생산 지표 관리 ─────────────────────────────────────────────────
 elif curr_l == "생산 지표 관리":
+    from modules.kpi_dashboard import render_kpi_dashboard
     render_kpi_dashboard()
 
 # ── OQC 라인 ─────────────────────────────────────────────────────
@@ -2801,114 +2844,124 @@ elif curr_l == "OQC 라인":
     # 부적합 사유 선택지
     OQC_DEFECT_REASONS = st.session_state.get('dropdown_oqc_defect', ['(선택)', '기타 (직접 입력)'])
 
-    db_oqc_all = st.session_state.production_db
-
     # ── 반 선택 ──────────────────────────────────────────────────
     BAN_CLR  = {"제조1반": "#2471a3", "제조2반": "#1e8449", "제조3반": "#6c3483"}
     BAN_BG   = {"제조1반": "#ddeeff", "제조2반": "#d4f0e2", "제조3반": "#ede0f5"}
     oqc_ban  = st.radio("반 선택", ["전체"] + PRODUCTION_GROUPS, horizontal=True, key="oqc_ban_radio")
-    db_oqc   = db_oqc_all[db_oqc_all['반'] == oqc_ban] if oqc_ban != "전체" else db_oqc_all
-
-    # ── 요약 KPI (선택 반 기준) ───────────────────────────────────
-    oqc_wait  = len(db_oqc[db_oqc['상태'] == 'OQC대기'])
-    oqc_ing   = len(db_oqc[db_oqc['상태'] == 'OQC중'])
-    oqc_pass  = len(db_oqc[db_oqc['상태'] == '출하승인'])
-    oqc_fail  = len(db_oqc[db_oqc['상태'] == '부적합(OQC)'])
-
-
-    # 반 색상 배지
-    if oqc_ban != "전체":
-        bc = BAN_CLR.get(oqc_ban, "#888"); bb = BAN_BG.get(oqc_ban, "#f0f0f0")
-        st.markdown(f"<span style='background:{bb};color:{bc};padding:3px 12px;border-radius:8px;font-weight:bold;font-size:0.9rem;'> {oqc_ban}</span>", unsafe_allow_html=True)
-        st.markdown("<div style='height:6px'></div>", unsafe_allow_html=True)
-
-    ok1,ok2,ok3,ok4 = st.columns(4)
-    ok1.metric(" OQC 대기", f"{oqc_wait}건")
-    ok2.metric(" 검사 중",  f"{oqc_ing}건")
-    ok3.metric(" 출하 승인", f"{oqc_pass}건")
-    ok4.metric(" 부적합",   f"{oqc_fail}건")
-    st.divider()
 
-    # ── 입고 대기 목록 (포장 완료 → OQC 대기 전환) ───────────────
-    with st.expander(f" 입고 대기 (검사 합격 제품)  {oqc_wait}건", expanded=_xp("oqc_wait"), key="_xp_oqc_wait"):
-        packing_done = db_oqc[
-            db_oqc['상태'] == 'OQC대기'
-        ].sort_values('시간', ascending=False).reset_index(drop=True)
+    # ── 요약 KPI + 입고 대기 (fragment — 이 구간만 주기 갱신) ─────────
+    @live_fragment()
+    def _render_oqc_live(oqc_ban: str):
+        sync_realtime()
+        db_oqc_all = st.session_state.production_db
+        db_oqc     = db_oqc_all[db_oqc_all['반'] == oqc_ban] if oqc_ban != "전체" else db_oqc_all
+
+        # ── 요약 KPI (선택 반 기준) ───────────────────────────────────
+        oqc_wait  = len(db_oqc[db_oqc['상태'] == 'OQC대기'])
+        oqc_ing   = len(db_oqc[db_oqc['상태'] == 'OQC중'])
+        oqc_pass  = len(db_oqc[db_oqc['상태'] == '출하승인'])
+        oqc_fail  = len(db_oqc[db_oqc['상태'] == '부적합(OQC)'])
+
+        # 반 색상 배지
+        if oqc_ban != "전체":
+            bc = BAN_CLR.get(oqc_ban, "#888"); bb = BAN_BG.get(oqc_ban, "#f0f0f0")
+            st.markdown(f"<span style='background:{bb};color:{bc};padding:3px 12px;border-radius:8px;font-weight:bold;font-size:0.9rem;'> {oqc_ban}</span>", unsafe_allow_html=True)
+            st.markdown("<div style='height:6px'></div>", unsafe_allow_html=True)
+
+        ok1,ok2,ok3,ok4 = st.columns(4)
+        ok1.metric(" OQC 대기", f"{oqc_wait}건")
+        ok2.metric(" 검사 중",  f"{oqc_ing}건")
+        ok3.metric(" 출하 승인", f"{oqc_pass}건")
+        ok4.metric(" 부적합",   f"{oqc_fail}건")
+        st.divider()
+
+        # ── 입고 대기 목록 (포장 완료 → OQC 대기 전환) ───────────────
+        with st.expander(f" 입고 대기 (검사 합격 제품)  {oqc_wait}건", expanded=_xp("oqc_wait"), key="_xp_oqc_wait"):
+            packing_done = db_oqc[
+                db_oqc['상태'] == 'OQC대기'
+            ].sort_values('시간', ascending=False).reset_index(drop=True)
     
-        _oqc_in_ck_key = f"oqc_in_ck_{oqc_ban}"
-        _oqc_in_sc_cnt = f"oqc_in_sc_cnt_{oqc_ban}"
-        if _oqc_in_ck_key not in st.session_state: st.session_state[_oqc_in_ck_key] = {}
-        if _oqc_in_sc_cnt not in st.session_state: st.session_state[_oqc_in_sc_cnt] = 0
+            _oqc_in_ck_key = f"oqc_in_ck_{oqc_ban}"
+            _oqc_in_sc_cnt = f"oqc_in_sc_cnt_{oqc_ban}"
+            if _oqc_in_ck_key not in st.session_state: st.session_state[_oqc_in_ck_key] = {}
+            if _oqc_in_sc_cnt not in st.session_state: st.session_state[_oqc_in_sc_cnt] = 0
     
-        if not packing_done.empty:
-            _oqc_in_sc_key = f"oqc_in_sc_{st.session_state[_oqc_in_sc_cnt]}"
-            oi_c1, _ = st.columns([3, 3])
-            _oqc_in_scan = oi_c1.text_input(" 시리얼 스캔/검색", placeholder="스캔 또는 입력 → 자동 체크",
-                                             key=_oqc_in_sc_key)
-            if st.session_state.pop("_autofocus_after_rerun", None) == _oqc_in_sc_key:
-                _inject_autofocus(placeholder="스캔 또는 입력 → 자동 체크")
-            if _oqc_in_scan.strip():
-                _oqc_in_matched = packing_done[packing_done['시리얼'].str.contains(
-                    _oqc_in_scan.strip(), case=False, na=False)]
-                if not _oqc_in_matched.empty:
-                    for _oi in _oqc_in_matched.index:
-                        st.session_state[_oqc_in_ck_key][str(_oi)] = True
-                    st.session_state["_autofocus_after_rerun"] = f"oqc_in_sc_{st.session_state[_oqc_in_sc_cnt] + 1}"
-                    st.session_state[_oqc_in_sc_cnt] += 1  # 키 변경 → 체크박스 강제 재렌더
-                    _rerun("oqc_wait")
-                else:
-                    oi_c1.warning(f"**'{_oqc_in_scan.strip()}'** — 입고 대기 목록에 없습니다.")
+            if not packing_done.empty:
+                _oqc_in_sc_key = f"oqc_in_sc_{st.session_state[_oqc_in_sc_cnt]}"
+                oi_c1, _ = st.columns([3, 3])
+                _oqc_in_scan = oi_c1.text_input(" 시리얼 스캔/검색", placeholder="스캔 또는 입력 → 자동 체크",
+                                                 key=_oqc_in_sc_key)
+                if st.session_state.pop("_autofocus_after_rerun", None) == _oqc_in_sc_key:
+                    _inject_autofocus(placeholder="스캔 또는 입력 → 자동 체크")
+                if _oqc_in_scan.strip():
+                    _oqc_in_matched = packing_done[packing_done['시리얼'].str.contains(
+                        _oqc_in_scan.strip(), case=False, na=False)]
+                    if not _oqc_in_matched.empty:
+                        for _oi in _oqc_in_matched.index:
+                            st.session_state[_oqc_in_ck_key][str(_oi)] = True
+                        st.session_state["_autofocus_after_rerun"] = f"oqc_in_sc_{st.session_state[_oqc_in_sc_cnt] + 1}"
+                        st.session_state[_oqc_in_sc_cnt] += 1  # 키 변경 → 체크박스 강제 재렌더
+                        _rerun("oqc_wait")
+                    else:
+                        oi_c1.warning(f"**'{_oqc_in_scan.strip()}'** — 입고 대기 목록에 없습니다.")
     
-            _oqc_in_checked = [k for k, v in st.session_state[_oqc_in_ck_key].items() if v]
-            if _oqc_in_checked:
-                oib1, oib2, oib3 = st.columns([3, 1.5, 1])
-                oib1.markdown(f"<span style='color:#2E75B6;font-weight:700;'> {len(_oqc_in_checked)}개 선택됨</span>",
-                              unsafe_allow_html=True)
-                if oib2.button("▶ 일괄 OQC 시작", key="oqc_bulk_in", type="primary", use_container_width=True):
-                    _ops = []
-                    for _oi in _oqc_in_checked:
-                        _oi_int = int(_oi)
-                        if _oi_int in packing_done.index:
-                            _orow = packing_done.loc[_oi_int]
-                            _upd = {'상태': 'OQC중', '시간': get_now_kst_str(), '라인': 'OQC 라인'}
-                            _ops.append({"sn": _orow['시리얼'], "data": _upd,
-                                "audit": {"시리얼": _orow['시리얼'], "모델": _orow['모델'], "반": _orow['반'],
-                                         "이전상태": 'OQC대기', "이후상태": 'OQC중',
-                                         "작업자": st.session_state.user_id}})
-                    st.session_state[_oqc_in_ck_key] = {}
-                    st.session_state[_oqc_in_sc_cnt] += 1  # 체크박스 키 리셋
-                    with st.spinner("처리 중..."):
-                        _prod_bulk_update(_run_bulk_db_ops(_ops))
-                    _rerun("oqc_wait")
-                if oib3.button(" 해제", key="oqc_in_unck", use_container_width=True):
-                    st.session_state[_oqc_in_ck_key] = {}
-                    st.session_state[_oqc_in_sc_cnt] += 1  # 체크박스 키 리셋
-                    _rerun("oqc_wait")
+                _oqc_in_checked = [k for k, v in st.session_state[_oqc_in_ck_key].items() if v]
+                if _oqc_in_checked:
+                    oib1, oib2, oib3 = st.columns([3, 1.5, 1])
+                    oib1.markdown(f"<span style='color:#2E75B6;font-weight:700;'> {len(_oqc_in_checked)}개 선택됨</span>",
+                                  unsafe_allow_html=True)
+                    if oib2.button("▶ 일괄 OQC 시작", key="oqc_bulk_in", type="primary", use_container_width=True):
+                        _ops = []
+                        for _oi in _oqc_in_checked:
+                            _oi_int = int(_oi)
+                            if _oi_int in packing_done.index:
+                                _orow = packing_done.loc[_oi_int]
+                                _upd = {'상태': 'OQC중', '시간': get_now_kst_str(), '라인': 'OQC 라인'}
+                                _ops.append({"sn": _orow['시리얼'], "data": _upd,
+                                    "audit": {"시리얼": _orow['시리얼'], "모델": _orow['모델'], "반": _orow['반'],
+                                             "이전상태": 'OQC대기', "이후상태": 'OQC중',
+                                             "작업자": st.session_state.user_id}})
+                        st.session_state[_oqc_in_ck_key] = {}
+                        st.session_state[_oqc_in_sc_cnt] += 1  # 체크박스 키 리셋
+                        with st.spinner("처리 중..."):
+                            _prod_bulk_update(_run_bulk_db_ops(_ops))
+                        _rerun("oqc_wait")
+                    if oib3.button(" 해제", key="oqc_in_unck", use_container_width=True):
+                        st.session_state[_oqc_in_ck_key] = {}
+                        st.session_state[_oqc_in_sc_cnt] += 1  # 체크박스 키 리셋
+                        _rerun("oqc_wait")
     
-            hh = st.columns([0.4, 2, 2, 1.5, 2, 1.5])
-            for col, txt in zip(hh, ["", "시간", "모델", "반", "시리얼", "OQC 시작"]):
-                col.markdown(f"<p style='font-size:0.72rem;font-weight:700;color:#8a7f72;margin:0;padding-bottom:3px;border-bottom:1px solid #e0d8c8;'>{txt}</p>", unsafe_allow_html=True)
-            _oqc_in_cb_ver = st.session_state[_oqc_in_sc_cnt]
-            for idx, row in enumerate(packing_done.to_dict('records')):
-                rr = st.columns([0.4, 2, 2, 1.5, 2, 1.5])
-                _oqc_in_cb = rr[0].checkbox("", key=f"oqc_in_cb_{idx}_{_oqc_in_cb_ver}",
-                    value=st.session_state[_oqc_in_ck_key].get(str(idx), False),
-                    label_visibility="collapsed")
-                st.session_state[_oqc_in_ck_key][str(idx)] = _oqc_in_cb
-                rr[1].caption(str(row.get('시간',''))[:16])
-                rr[2].write(row.get('모델',''))
-                rr[3].write(row.get('반',''))
-                rr[4].markdown(f"`{row.get('시리얼','')}`")
-                if rr[5].button("▶ OQC 시작", key=f"oqc_in_{idx}", use_container_width=True, type="primary"):
-                    _upd = {'상태': 'OQC중', '시간': get_now_kst_str(), '라인': 'OQC 라인'}
-                    update_row(row['시리얼'], _upd)
-                    insert_audit_log(시리얼=row['시리얼'], 모델=row['모델'], 반=row['반'],
-                        이전상태='OQC대기', 이후상태='OQC중', 작업자=st.session_state.user_id)
-                    st.session_state[_oqc_in_ck_key].pop(str(idx), None)
-                    _prod_update(row['시리얼'], _upd)
-                    _rerun("oqc_wait")
-        else:
-            st.info("OQC 대기 중인 제품이 없습니다.")
+                hh = st.columns([0.4, 2, 2, 1.5, 2, 1.5])
+                for col, txt in zip(hh, ["", "시간", "모델", "반", "시리얼", "OQC 시작"]):
+                    col.markdown(f"<p style='font-size:0.72rem;font-weight:700;color:#8a7f72;margin:0;padding-bottom:3px;border-bottom:1px solid #e0d8c8;'>{txt}</p>", unsafe_allow_html=True)
+                _oqc_in_cb_ver = st.session_state[_oqc_in_sc_cnt]
+                for idx, row in enumerate(packing_done.to_dict('records')):
+                    rr = st.columns([0.4, 2, 2, 1.5, 2, 1.5])
+                    _oqc_in_cb = rr[0].checkbox("", key=f"oqc_in_cb_{idx}_{_oqc_in_cb_ver}",
+                        value=st.session_state[_oqc_in_ck_key].get(str(idx), False),
+                        label_visibility="collapsed")
+                    st.session_state[_oqc_in_ck_key][str(idx)] = _oqc_in_cb
+                    rr[1].caption(str(row.get('시간',''))[:16])
+                    rr[2].write(row.get('모델',''))
+                    rr[3].write(row.get('반',''))
+                    rr[4].markdown(f"`{row.get('시리얼','')}`")
+                    if rr[5].button("▶ OQC 시작", key=f"oqc_in_{idx}", use_container_width=True, type="primary"):
+                        _upd = {'상태': 'OQC중', '시간': get_now_kst_str(), '라인': 'OQC 라인'}
+                        update_row(row['시리얼'], _upd)
+                        insert_audit_log(시리얼=row['시리얼'], 모델=row['모델'], 반=row['반'],
+                            이전상태='OQC대기', 이후상태='OQC중', 작업자=st.session_state.user_id)
+                        st.session_state[_oqc_in_ck_key].pop(str(idx), None)
+                        _prod_update(row['시리얼'], _upd)
+                        _rerun("oqc_wait")
+            else:
+                st.info("OQC 대기 중인 제품이 없습니다.")
+
+    _render_oqc_live(oqc_ban)
+
+    # 검사 진행 이하는 전체 rerun 기준 데이터 사용
+    db_oqc_all = st.session_state.production_db
+    db_oqc     = db_oqc_all[db_oqc_all['반'] == oqc_ban] if oqc_ban != "전체" else db_oqc_all
+    oqc_ing    = len(db_oqc[db_oqc['상태'] == 'OQC중'])
     
     st.divider()
 
@@ -2998,9 +3051,8 @@ elif curr_l == "OQC 라인":
 
             # 개별 항목 목록 (체크박스 + 개별 판정)
             _oqc_cb_ver = st.session_state[_oqc_sc_cnt]
-            # 자재 시리얼 일괄 조회 (N+1 방지)
-            _oqc_bulk_sns = tuple(oqc_wait_list['시리얼'].unique().tolist())
-            _oqc_bulk_mats = load_material_serials_bulk(_oqc_bulk_sns) if _oqc_bulk_sns else pd.DataFrame()
+            # 자재 시리얼 요약 (공유 인덱스)
+            _oqc_mats = get_material_summary(oqc_wait_list['시리얼'])
             for idx, row in enumerate(oqc_wait_list.to_dict('records')):
                 with st.container(border=True):
                     ic1, ic2, ic3, ic4, ic5 = st.columns([0.4, 2, 1.5, 1.5, 1.5])
@@ -3061,14 +3113,14 @@ elif curr_l == "OQC 라인":
     
                     # ── 자재 시리얼 인라인 표시 ──
                     _sn_key = row.get('시리얼', '')
-                    _row_mats = _oqc_bulk_mats[_oqc_bulk_mats['메인시리얼'] == _sn_key] if not _oqc_bulk_mats.empty else pd.DataFrame()
-                    _mat_label = f" 자재 시리얼 {len(_row_mats)}개 등록됨" if not _row_mats.empty else " 자재 시리얼 미등록 "
+                    _row_mats = _oqc_mats.get(_sn_key, ())
+                    _mat_label = f" 자재 시리얼 {len(_row_mats)}개 등록됨" if _row_mats else " 자재 시리얼 미등록 "
                     with st.expander(_mat_label, expanded=False):
-                        if not _row_mats.empty:
-                            for _rm in _row_mats.to_dict('records'):
+                        if _row_mats:
+                            for _rm_name, _rm_sn in _row_mats:
                                 rmc1, rmc2 = st.columns([2, 4])
-                                rmc1.caption(_rm.get('자재명', ''))
-                                rmc2.caption(f"`{_rm.get('자재시리얼', '')}`")
+                                rmc1.caption(_rm_name)
+                                rmc2.caption(f"`{_rm_sn}`")
                         else:
                             st.caption("등록된 자재 시리얼이 없습니다.")
         else:
@@ -3103,8 +3155,7 @@ elif curr_l == "OQC 라인":
                 col.markdown(f"<p style='font-size:0.72rem;font-weight:700;color:#8a7f72;margin:0;padding-bottom:3px;border-bottom:1px solid #e0d8c8;'>{txt}</p>", unsafe_allow_html=True)
     
             # 자재 시리얼 일괄 조회 (OQC 결과 이력)
-            _oqc_done_sns = tuple(oqc_done['시리얼'].unique().tolist())
-            _oqc_done_mats = load_material_serials_bulk(_oqc_done_sns) if _oqc_done_sns else pd.DataFrame()
+            _oqc_done_mats = get_material_summary(oqc_done['시리얼'])
             # 성능: iterrows → enumerate + to_dict('records') (idx2 → 순번 _i 로 교체)
             for _i, row in enumerate(oqc_done.to_dict('records')):
                 rr2 = st.columns([1.8, 2, 1.5, 2.2, 1.5, 2.5, 1])
@@ -3112,7 +3163,7 @@ elif curr_l == "OQC 라인":
                 rr2[1].write(row.get('모델',''))
                 rr2[2].write(row.get('반',''))
                 _oqc_done_sn = row.get('시리얼','')
-                _oqc_done_mc = len(_oqc_done_mats[_oqc_done_mats['메인시리얼'] == _oqc_done_sn]) if not _oqc_done_mats.empty else 0
+                _oqc_done_mc = len(_oqc_done_mats.get(_oqc_done_sn, ()))
                 _oqc_done_tog = f"mat_tog_oqcdone_{_oqc_done_sn}_{_i}"
                 _oqc_done_badge = f"  {_oqc_done_mc}" if _oqc_done_mc > 0 else "  "
                 if rr2[3].button(f"{_oqc_done_sn}{_oqc_done_badge}", key=f"sntog_oqcd_{_i}",
@@ -3205,14 +3256,14 @@ elif curr_l == "OQC 라인":
                             st.info("등록된 자재 시리얼 없음")
                 # ── 시리얼 클릭 자재 토글 표시 ──
                 if st.session_state.get(_oqc_done_tog, False):
-                    _oqcd_row_mats = _oqc_done_mats[_oqc_done_mats['메인시리얼'] == _oqc_done_sn] if not _oqc_done_mats.empty else pd.DataFrame()
+                    _oqcd_row_mats = _oqc_done_mats.get(_oqc_done_sn, ())
                     with st.container(border=True):
                         st.caption(f" 자재 시리얼 — `{_oqc_done_sn}`")
-                        if not _oqcd_row_mats.empty:
-                            for _dm in _oqcd_row_mats.to_dict('records'):
+                        if _oqcd_row_mats:
+                            for _dm_name, _dm_sn in _oqcd_row_mats:
                                 dmc1, dmc2 = st.columns([2, 4])
-                                dmc1.caption(_dm.get('자재명', ''))
-                                dmc2.caption(f"`{_dm.get('자재시리얼', '')}`")
+                                dmc1.caption(_dm_name)
+                                dmc2.caption(f"`{_dm_sn}`")
                         else:
                             st.caption("등록된 자재 시리얼 없음")
         else:
@@ -3584,7 +3635,7 @@ elif curr_l == "OQC 라인":
                 m_model = row_m.iloc[0]['모델'] if not row_m.empty else ""
                 m_ban   = row_m.iloc[0]['반']   if not row_m.empty else ""
                 if insert_material_serials(sn_final, m_model, m_ban, valid, st.session_state.user_id):
-                    load_material_serials.clear()
+                    _clear_material_cache()
                     st.success(f" {sn_final} → {len(valid)}개 자재 S/N 저장 완료")
             else:
                 st.warning("메인 S/N과 자재 S/N을 입력해주세요.")
@@ -3608,29 +3659,60 @@ elif curr_l == "OQC 라인":
                                key="mat_tmpl_dl")
         except Exception: st.caption("양식 다운로드 기능 준비 중")
 
-        mat_file = st.file_uploader("자재 시리얼 엑셀 업로드", type=["xlsx","xls"], key="mat_xl_upload")
+        mat_file = st.file_uploader("자재 시리얼 엑셀 업로드", type=["xlsx"], key="mat_xl_upload")
         if mat_file:
-            try:
-                import openpyxl as _xl3
-                wb2 = _xl3.load_workbook(mat_file)
-                ws2 = wb2.active
-                rows2 = list(ws2.iter_rows(min_row=2, values_only=True))
-                ok_cnt = 0; err_cnt = 0
-                for r2 in rows2:
-                    if len(r2) >= 5 and r2[0] and r2[4]:
-                        res2 = insert_material_serials(
-                            메인시리얼=str(r2[0]).strip(),
-                            모델=str(r2[1] or "").strip(),
-                            반=str(r2[2] or "").strip(),
-                            자재목록=[{"자재명": str(r2[3] or "").strip(), "자재시리얼": str(r2[4]).strip()}],
-                            작업자=st.session_state.user_id
-                        )
-                        if res2: ok_cnt += 1
-                        else:    err_cnt += 1
-                load_material_serials.clear()  # 자재 캐시만 초기화
-                st.success(f" 업로드 완료: {ok_cnt}건 성공 / {err_cnt}건 실패")
-            except Exception as e:
-                st.error(f"파일 처리 오류: {e}")
+            # 파싱·검증은 파일당 1회 (rerun 마다 재파싱/중복 조회 방지)
+            _mat_fkey = f"{mat_file.name}:{mat_file.size}:{getattr(mat_file, 'file_id', '')}"
+            _mat_imp = st.session_state.get("_mat_import")
+            if not _mat_imp or _mat_imp.get("key") != _mat_fkey:
+                try:
+                    _mat_df = parse_material_serial_excel(mat_file.getvalue())
+                    _mat_pairs = load_material_serial_pairs(tuple(_mat_df['메인시리얼']))
+                    if _mat_pairs is None:
+                        _mat_imp = None  # 기등록 조회 실패 — 중복 검사 없이 등록하지 않음
+                    else:
+                        _mat_valid, _mat_reject = validate_material_serials(_mat_df, _mat_pairs)
+                        _mat_imp = {"key": _mat_fkey, "valid": _mat_valid,
+                                    "reject": _mat_reject, "done": False}
+                        st.session_state["_mat_import"] = _mat_imp
+                except Exception as e:
+                    st.error(f"파일 처리 오류: {e}")
+                    _mat_imp = None
+
+            if _mat_imp:
+                _mv, _mr = _mat_imp["valid"], _mat_imp["reject"]
+                mi1, mi2, mi3 = st.columns(3)
+                mi1.metric("전체 행", len(_mv) + len(_mr))
+                mi2.metric("등록 대상", len(_mv))
+                mi3.metric("반려", len(_mr))
+
+                if not _mat_imp["done"] and not _mv.empty:
+                    st.dataframe(_mv.head(100), use_container_width=True, hide_index=True, height=240)
+                    if st.button(f" {len(_mv)}건 일괄 등록", type="primary", key="mat_xl_import_btn"):
+                        _now_s = get_now_kst_str()
+                        _uid   = st.session_state.user_id
+                        _rows  = [{"시간": _now_s, "작업자": _uid, **r}
+                                  for r in _mv[MAT_IMPORT_COLS].to_dict('records')]
+                        _pbar = st.progress(0.0)
+                        def _mat_progress(done, total):
+                            _pbar.progress(done / total, text=f"등록 중... {done}/{total}")
+                        ok_cnt, _failed = insert_material_serials_batch(_rows, on_progress=_mat_progress)
+                        if _failed:
+                            _fail_df = pd.DataFrame([{**r, "사유": f"등록 실패: {e}"} for r, e in _failed])
+                            _mat_imp["reject"] = pd.concat([_mr, _fail_df], ignore_index=True)
+                        _mat_imp["done"] = True
+                        _mat_imp["ok_cnt"] = ok_cnt
+                        st.rerun()
+
+                if _mat_imp["done"]:
+                    st.success(f" 업로드 완료: {_mat_imp.get('ok_cnt', 0)}건 성공 / {len(_mat_imp['reject'])}건 반려·실패")
+                elif _mv.empty:
+                    st.warning("등록 가능한 행이 없습니다. 반려 리포트를 확인해주세요.")
+                if not _mat_imp["reject"].empty:
+                    st.download_button(" 반려 리포트 다운로드", data=build_reject_report(_mat_imp["reject"]),
+                                       file_name="자재시리얼_반려.xlsx",
+                                       mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                                       key="mat_reject_dl")
 
 
 
@@ -3705,8 +3787,7 @@ elif curr_l == "불량 공정":
         has_any = True
         with st.expander(f" {g} 불량 처리 대기 ({len(wait)}건)", expanded=_xp(f"def_wait_{g}"), key=f"_xp_def_wait_{g}"):
             # N+1 방지: 불량 대기 시리얼 자재 일괄 조회
-            _def_bulk_sns = tuple(wait['시리얼'].unique().tolist())
-            _def_bulk_mats = load_material_serials_bulk(_def_bulk_sns) if _def_bulk_sns else pd.DataFrame()
+            _def_mats_idx = get_material_summary(wait['시리얼'])
             for row in wait.to_dict('records'):
                 sn_key = row['시리얼']  # idx 대신 실제 시리얼을 키로 사용 (목록 변경 시 키 밀림 방지)
                 with st.container(border=True):
@@ -3776,13 +3857,13 @@ elif curr_l == "불량 공정":
                     )
 
                     # 등록된 자재 시리얼 표시 (기존 시리얼란에 자재 S/N 입력 가능 안내)
-                    _def_mats = _def_bulk_mats[_def_bulk_mats['메인시리얼'] == row['시리얼']] if not _def_bulk_mats.empty else pd.DataFrame()
-                    if not _def_mats.empty:
+                    _def_mats = _def_mats_idx.get(row['시리얼'], ())
+                    if _def_mats:
                         with st.expander(f" 등록된 자재 시리얼 ({len(_def_mats)}개) — 자재 교체 시 기존 시리얼란에 입력", expanded=_xp(f"def_mat_{g}"), key=f"_xp_def_mat_{sn_key}"):
-                            for _, _dm in _def_mats.iterrows():
+                            for _dm_name, _dm_sn in _def_mats:
                                 _dmc1, _dmc2 = st.columns([1, 1])
-                                _dmc1.caption(f"**{_dm.get('자재명', '')}**")
-                                _dmc2.caption(f"`{_dm.get('자재시리얼', '')}`")
+                                _dmc1.caption(f"**{_dm_name}**")
+                                _dmc2.caption(f"`{_dm_sn}`")
 
                     _btn_col, _ = st.columns([1, 2])
                     if _btn_col.button(" 확정", key=f"b_{sn_key}", type="primary",
@@ -3792,18 +3873,13 @@ elif curr_l == "불량 공정":
                             _rep_sn = replace_sn.strip()
                             if _rep_sn:
                                 # 기존 시리얼이 자재 시리얼인지 확인 (bulk 데이터 재사용)
-                                _def_mats_check = _def_bulk_mats[_def_bulk_mats['메인시리얼'] == row['시리얼']] if not _def_bulk_mats.empty else pd.DataFrame()
-                                _is_mat_sn = (
-                                    not _def_mats_check.empty and
-                                    _target_sn != row['시리얼'] and
-                                    _target_sn in _def_mats_check['자재시리얼'].values
-                                )
+                                _def_mat_names = {_sn: _nm for _nm, _sn in _def_mats_idx.get(row['시리얼'], ())}
+                                _is_mat_sn = _target_sn != row['시리얼'] and _target_sn in _def_mat_names
                                 if _is_mat_sn:
                                     # 자재 시리얼 교체
-                                    _mat_info = _def_mats_check[_def_mats_check['자재시리얼'] == _target_sn].iloc[0]
-                                    _mat_name = _mat_info.get('자재명', '')
+                                    _mat_name = _def_mat_names[_target_sn]
                                     if update_material_serial_sn(row['시리얼'], _target_sn, _rep_sn):
-                                        load_material_serials.clear()
+                                        _clear_material_cache()
                                         _upd = {
                                             '상태': "수리 완료(재투입)", '시간': get_now_kst_str(),
                                             '수리': f"자재교체({_mat_name}:{_target_sn}→{_rep_sn})"
@@ -4121,6 +4197,13 @@ elif curr_l == "마스터 관리":
 # ── 사용 설명서 ──────────────────────────────────────────────────
 elif curr_l == "작업자 매뉴얼":
     from modules.manual_worker import render_worker_manual
+    _pdf_url = publish_file(_PDF_PATH)
+    if _pdf_url:
+        st.link_button(" 사용 설명서 PDF 열기", _pdf_url)
+    elif os.path.exists(_PDF_PATH):
+        with open(_PDF_PATH, "rb") as _f:
+            st.download_button(" 사용 설명서 PDF 다운로드", _f.read(),
+                               file_name=os.path.basename(_PDF_PATH), mime="application/pdf")
     render_worker_manual()
 
 elif curr_l == "관리자 매뉴얼":
@@ -4436,18 +4519,16 @@ elif curr_l == "플로우차트":
     _fc_tab1, _fc_tab2 = st.tabs(["전체 상세 플로우", "작업자 흐름도"])
 
     with _fc_tab1:
-        _fc_path1 = "assets/전체 상세 플로우 차트.html"
-        if os.path.exists(_fc_path1):
-            with open(_fc_path1, "r", encoding="utf-8") as _f:
-                st.components.v1.html(_f.read(), height=900, scrolling=True)
+        _fc_html1 = read_text_asset("assets/전체 상세 플로우 차트.html")
+        if _fc_html1 is not None:
+            cached_html("flowchart1", _fc_html1, height=900, scrolling=True)
         else:
             st.warning(" 파일을 찾을 수 없습니다: assets/전체 상세 플로우 차트.html")
 
     with _fc_tab2:
-        _fc_path2 = "assets/작업자 흐름도 플로우 차트.html"
-        if os.path.exists(_fc_path2):
-            with open(_fc_path2, "r", encoding="utf-8") as _f:
-                st.components.v1.html(_f.read(), height=900, scrolling=True)
+        _fc_html2 = read_text_asset("assets/작업자 흐름도 플로우 차트.html")
+        if _fc_html2 is not None:
+            cached_html("flowchart2", _fc_html2, height=900, scrolling=True)
         else:
             st.warning(" 파일을 찾을 수 없습니다: assets/작업자 흐름도 플로우 차트.html")
 
@@ -4484,7 +4565,7 @@ elif curr_l == "플로우차트":
 # =================================================================
 #
 #  주요 상수:
-#   AUTO_REFRESH_INTERVAL_MS = 15000  # 자동 새로고침 간격
+#   REFRESH_POLICIES (constants)      # 페이지별 자동 새로고침 정책
 #   PDF_VIEWER_HEIGHT_PX = 900         # PDF 뷰어 높이
 #   MAX_FUNCTION_LINES = 200           # 함수 최대 권장 라인
 #
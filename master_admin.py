@@ -8,22 +8,22 @@ import pandas as pd
 
 from modules.database import (
     get_supabase, keep_supabase_alive,
+    sync_session_user_db, invalidate_user_directory,
     _clear_production_cache, _clear_schedule_cache, _clear_plan_cache,
     _clear_audit_cache,
-    _clear_access_request_cache,
-    load_realtime_ledger, load_schedule, load_model_master,
+    _clear_access_request_cache, _clear_material_cache,
+    load_realtime_ledger, load_schedule,
     update_row, delete_all_rows, delete_production_row_by_sn,
     load_app_setting, load_all_app_settings, save_app_setting,
     load_access_requests, review_access_request,
     insert_audit_log,
     delete_all_audit_log, delete_audit_log_row,
-    load_material_serials,
     delete_all_material_serial, delete_material_serial_row,
     delete_schedule, delete_all_production_schedule,
     delete_all_schedule_change_log, delete_schedule_change_log_row,
     upsert_model_master,
     delete_model_from_master, delete_item_from_master,
-    delete_all_master_by_group, sync_master_to_session,
+    delete_all_master_by_group, get_master_models, get_master_items,
     load_production_plan,
     delete_production_plan_row, delete_all_production_plan,
     delete_all_plan_change_log, delete_plan_change_log_row,
@@ -539,46 +539,25 @@ if "admin_authenticated" not in st.session_state:
 if "user_id" not in st.session_state:
     st.session_state.user_id = None
 
-if "group_master_models" not in st.session_state:
-    st.session_state.group_master_models = {"제조1반": [], "제조2반": [], "제조3반": []}
-if "group_master_items" not in st.session_state:
-    st.session_state.group_master_items = {"제조1반": {}, "제조2반": {}, "제조3반": {}}
+# ─── 사용자 목록: 프로세스 공유 디렉터리 (버전이 바뀐 경우에만 세션 사본 교체) ───
+try:
+    sync_session_user_db()
+except Exception:
+    if "user_db" not in st.session_state:
+        st.session_state.user_db = {}
 
 # ─── 초기 DB 쿼리 병렬 실행 ─────────────────────────────────────────
-_need_user = "user_db" not in st.session_state
-_need_mst  = "master_synced" not in st.session_state
 _need_prod = "production_db" not in st.session_state
 _need_sch  = "schedule_db" not in st.session_state
 _need_plan = "production_plan" not in st.session_state
 _need_dd   = any(k not in st.session_state for k in _DD_DEFAULTS)
 
-if any([_need_user, _need_mst, _need_prod, _need_plan, _need_dd]):
-    def _fetch_users_raw():
-        try:
-            _r = get_supabase().table("users").select("username,password_hash,role,custom_permissions").execute()
-            return {
-                row["username"]: {
-                    "pw_hash": row.get("password_hash", ""),
-                    "role": row.get("role", "assembly_team"),
-                    **({"custom_permissions": json.loads(row["custom_permissions"])} if row.get("custom_permissions") else {})
-                }
-                for row in (_r.data or [])
-            }
-        except Exception:
-            return {}
-
+if any([_need_prod, _need_plan, _need_dd]):
     with ThreadPoolExecutor(max_workers=5) as _pool:
-        _f_users = _pool.submit(_fetch_users_raw)        if _need_user else None
-        _f_mst   = _pool.submit(load_model_master)       if _need_mst  else None
         _f_prod  = _pool.submit(load_realtime_ledger)    if _need_prod else None
         _f_plan  = _pool.submit(load_production_plan)    if _need_plan else None
         _f_dd    = _pool.submit(load_all_app_settings)   if _need_dd   else None
 
-    if _need_user:
-        st.session_state.user_db = _f_users.result()
-    if _need_mst:
-        sync_master_to_session()   # load_model_master 결과는 이미 캐시에 있음
-        st.session_state.master_synced = True
     if _need_prod:
         st.session_state.production_db = _f_prod.result()
     if _need_plan:
@@ -664,10 +643,10 @@ else:
                     if st.button(f"{g_name} 모델 저장", key=f"nb_{g_name}", use_container_width=True):
                         if nm_bulk.strip():
                             added, skipped = [], []
+                            _existing = set(get_master_models(g_name))
                             for nm in [x.strip() for x in nm_bulk.strip().splitlines() if x.strip()]:
-                                if nm not in st.session_state.group_master_models.get(g_name, []):
-                                    st.session_state.group_master_models[g_name].append(nm)
-                                    st.session_state.group_master_items[g_name][nm] = []
+                                if nm not in _existing:
+                                    _existing.add(nm)
                                     upsert_model_master(g_name, nm, nm)
                                     added.append(nm)
                                 else: skipped.append(nm)
@@ -679,18 +658,18 @@ else:
             with c2:
                 with st.container(border=True):
                     st.markdown("<h4 style='color:#2a2420; font-weight:bold; margin-bottom:6px;'>세부 품목 등록</h4>", unsafe_allow_html=True)
-                    g_mods = st.session_state.group_master_models.get(g_name, [])
+                    g_mods = get_master_models(g_name)
                     if g_mods:
                         sm = st.selectbox(f"{g_name} 모델 선택", g_mods, key=f"sm_{g_name}")
                         st.caption("여러 품목은 줄바꿈으로 구분")
                         ni_bulk = st.text_area(f"[{sm}] 품목코드", key=f"ni_{g_name}", height=120, placeholder="7150-A\n7150-B")
                         if st.button(f"{g_name} 품목 저장", key=f"ib_{g_name}", use_container_width=True):
                             if ni_bulk.strip():
-                                current = st.session_state.group_master_items[g_name].get(sm, [])
+                                current = set(get_master_items(g_name, sm))
                                 added, skipped = [], []
                                 for ni in [x.strip() for x in ni_bulk.strip().splitlines() if x.strip()]:
                                     if ni not in current:
-                                        st.session_state.group_master_items[g_name][sm].append(ni)
+                                        current.add(ni)
                                         upsert_model_master(g_name, sm, ni)
                                         added.append(ni)
                                     else: skipped.append(ni)
@@ -719,8 +698,6 @@ else:
                 am1.markdown("<p style='color:#c8605a; font-weight:bold; margin-top:8px;'>삭제 후 복구 불가</p>", unsafe_allow_html=True)
                 if am2.button(" 예, 전체 삭제", key=f"del_all_m_yes_{g_name}",
                               type="primary", use_container_width=True):
-                    st.session_state.group_master_models[g_name] = []
-                    st.session_state.group_master_items[g_name]  = {}
                     delete_all_master_by_group(g_name)
                     st.session_state[all_master_ck] = False
                     st.toast(f"{g_name} 모델/품목 전체 삭제 완료")
@@ -736,7 +713,7 @@ else:
                 with st.container(border=True):
                     st.markdown("<p style='color:#2a2420; font-weight:bold; margin-bottom:4px;'>모델 삭제</p>", unsafe_allow_html=True)
                     st.caption("삭제 시 해당 모델의 모든 품목코드도 함께 삭제됩니다")
-                    g_mods_del = st.session_state.group_master_models.get(g_name, [])
+                    g_mods_del = get_master_models(g_name)
                     if g_mods_del:
                         del_model = st.selectbox("삭제할 모델", g_mods_del, key=f"del_m_{g_name}")
                         del_m_ck  = f"del_model_ck_{g_name}_{del_model}"
@@ -748,11 +725,7 @@ else:
                             st.warning(f" [{del_model}] 모델과 품목 전체를 삭제하시겠습니까?")
                             dm1, dm2 = st.columns(2)
                             if dm1.button(" 삭제", key=f"del_m_yes_{g_name}", type="primary", use_container_width=True):
-                                # session_state 제거
-                                if del_model in st.session_state.group_master_models.get(g_name, []):
-                                    st.session_state.group_master_models[g_name].remove(del_model)
-                                st.session_state.group_master_items[g_name].pop(del_model, None)
-                                # DB 제거
+                                # DB 제거 (모델 마스터 인덱스는 함수 내부에서 무효화)
                                 delete_model_from_master(g_name, del_model)
                                 st.session_state[del_m_ck] = False
                                 st.toast(f"[{del_model}] 삭제 완료")
@@ -767,10 +740,10 @@ else:
                 with st.container(border=True):
                     st.markdown("<p style='color:#2a2420; font-weight:bold; margin-bottom:4px;'>품목 삭제</p>", unsafe_allow_html=True)
                     st.caption("선택한 모델에서 특정 품목코드만 삭제합니다")
-                    g_mods_di = st.session_state.group_master_models.get(g_name, [])
+                    g_mods_di = get_master_models(g_name)
                     if g_mods_di:
                         di_model = st.selectbox("모델 선택", g_mods_di, key=f"di_m_{g_name}")
-                        items_di = st.session_state.group_master_items.get(g_name, {}).get(di_model, [])
+                        items_di = get_master_items(g_name, di_model)
                         if items_di:
                             del_item = st.selectbox("삭제할 품목코드", items_di, key=f"del_i_{g_name}")
                             del_i_ck = f"del_item_ck_{g_name}_{di_model}_{del_item}"
@@ -782,7 +755,6 @@ else:
                                 st.warning(f" [{di_model}] 의 [{del_item}] 품목을 삭제하시겠습니까?")
                                 di1, di2 = st.columns(2)
                                 if di1.button(" 삭제", key=f"del_i_yes_{g_name}", type="primary", use_container_width=True):
-                                    st.session_state.group_master_items[g_name][di_model].remove(del_item)
                                     delete_item_from_master(g_name, di_model, del_item)
                                     st.session_state[del_i_ck] = False
                                     st.toast(f"[{del_item}] 삭제 완료")
@@ -840,6 +812,7 @@ else:
                                         {"username": _nu, "password_hash": _nh, "role": _nr},
                                         on_conflict="username"
                                     ).execute()
+                                    invalidate_user_directory()
                                 except Exception:
                                     pass
                                 review_access_request(
@@ -906,6 +879,7 @@ else:
                                 {"username": nu, "password_hash": pw_hash, "role": nr},
                                 on_conflict="username"
                             ).execute()
+                            invalidate_user_directory()
                             st.success(f"계정 [{nu}] 저장 완료 (DB 반영됨)")
                         except Exception as _e:
                             st.warning(f"계정 [{nu}] 메모리 저장됨, DB 저장 실패: {_e}")
@@ -1028,6 +1002,7 @@ else:
                         get_supabase().table("users").update(
                             {"custom_permissions": json.dumps(_new_perm, ensure_ascii=False)}
                         ).eq("username", selected_user).execute()
+                        invalidate_user_directory()
                         st.success(f" [{selected_user}] 권한 저장 완료 ({len(selected_pages)}개 메뉴) — DB 반영됨")
                     except Exception as _e:
                         st.success(f" [{selected_user}] 권한 저장 완료 ({len(selected_pages)}개 메뉴)")
@@ -1040,6 +1015,7 @@ else:
                         get_supabase().table("users").update(
                             {"custom_permissions": None}
                         ).eq("username", selected_user).execute()
+                        invalidate_user_directory()
                         st.success(f" [{selected_user}] 기본 권한으로 복원됨 — DB 반영됨")
                     except Exception:
                         st.success(f" [{selected_user}] 기본 권한으로 복원됨")
@@ -1071,6 +1047,7 @@ else:
                         try:
                             get_supabase().table("users").delete().eq(
                                 "username", confirm_target).execute()
+                            invalidate_user_directory()
                             st.toast(f" [{confirm_target}] 계정 삭제 완료")
                         except Exception as _e:
                             st.toast(f"메모리 삭제 완료, DB 삭제 실패: {_e}")
@@ -1472,7 +1449,7 @@ else:
         mat_df = _load_mat_all()
         st.caption(f"현재 **{len(mat_df)}건** (최대 500건 표시)")
         if st.button(" 새로고침", key="mat_del_refresh"):
-            load_material_serials.clear(); st.rerun()
+            _clear_material_cache(); st.rerun()
 
         ml1, ml2 = st.columns([1.5, 2])
         _m_grp = ml1.selectbox("반", ["전체"] + PRODUCTION_GROUPS, key="d_mat_grp")
@@ -1500,7 +1477,7 @@ else:
                     _mid = row.get('id')
                     if _mid and mr[5].button("삭제", key=f"del_mat_{_mid}", help="이 행 삭제"):
                         if delete_material_serial_row(_mid):
-                            load_material_serials.clear()
+                            _clear_material_cache()
                             st.session_state["_del_mgr_toast"] = " 자재 시리얼 삭제 완료"; st.rerun()
         else:
             st.info("조건에 맞는 자재 시리얼이 없습니다.")
@@ -1517,7 +1494,7 @@ else:
             _ma1.markdown("<p style='color:#c8605a;font-weight:bold;margin-top:8px;'>삭제 후 복구 불가</p>", unsafe_allow_html=True)
             if _ma2.button(" 예, 전체 삭제", key="del_mat_all_yes", type="primary", use_container_width=True):
                 if delete_all_material_serial():
-                    load_material_serials.clear()
+                    _clear_material_cache()
                     st.session_state[_ck_mat_all] = False
                     st.session_state["_del_mgr_toast"] = " 자재 시리얼 전체 삭제 완료"; st.rerun()
             if _ma3.button("취소", key="del_mat_all_no", use_container_width=True):
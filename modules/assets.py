@@ -0,0 +1,168 @@
+"""
+정적 자산 파이프라인
+====================
+rerun 마다 같은 CSS/JS/HTML/PDF 본문을 웹소켓으로 다시 보내지 않도록 내용 해시 기준으로 1회만 전송.
+
+1) 바이너리 파일 (매뉴얼 PDF 등) — publish_file
+   - static/<이름>.<해시>.<확장자> 로 1회 복사 → Streamlit 정적 파일 서빙(app/static/...)으로 제공
+     (.streamlit/config.toml [server] enableStaticServing = true)
+   - 내용이 바뀌면 파일명(해시)이 바뀌므로 브라우저 캐시를 그대로 써도 안전
+   - Streamlit 정적 서빙은 CSS/JS/HTML 을 text/plain(nosniff) 으로 내보내므로 아래 2) 방식 사용
+
+2) 텍스트 자산 (CSS/JS/플로우차트 HTML) — inject_head_assets / cached_html
+   - 부모 문서(window.parent)에 해시 id 로 1회 설치, 세션이 보낸 해시를 session_state 에 기록
+   - 이후 rerun 은 본문 없이 생략(head 자산) 또는 해시 참조만 전송(cached_html)
+   - 새로고침하면 새 세션이므로 다시 1회 전송
+"""
+
+import functools
+import hashlib
+import json
+import os
+import shutil
+from urllib.parse import quote
+
+import streamlit as st
+
+APP_DIR    = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATIC_DIR = os.path.join(APP_DIR, "static")
+STATIC_URL = "app/static"
+HASH_LEN   = 10
+
+_SENT_KEY  = "_asset_sent"   # session_state: 이 세션 브라우저에 설치한 자산 해시
+
+
+@functools.lru_cache(maxsize=64)
+def asset_digest(text: str) -> str:
+    """텍스트 내용 해시 (문자열 객체는 hash 캐시 → 같은 상수는 재계산 없음)."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:HASH_LEN]
+
+
+def static_serving_enabled() -> bool:
+    try:
+        return bool(st.get_option("server.enableStaticServing"))
+    except Exception:
+        return False
+
+
+# =================================================================
+# 1) 정적 파일 게시
+# =================================================================
+
+@functools.lru_cache(maxsize=32)
+def _publish(path: str, mtime_ns: int, size: int) -> str:
+    """path 를 static/ 에 해시 파일명으로 복사 (같은 이름의 이전 해시 파일 정리). 반환: URL."""
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    stem, ext = os.path.splitext(os.path.basename(path))
+    name = f"{stem}.{h.hexdigest()[:HASH_LEN]}{ext}"
+    dest = os.path.join(STATIC_DIR, name)
+    if not os.path.exists(dest):
+        os.makedirs(STATIC_DIR, exist_ok=True)
+        tmp = dest + ".tmp"
+        shutil.copyfile(path, tmp)
+        os.replace(tmp, dest)
+        for old in os.listdir(STATIC_DIR):
+            if old != name and old.startswith(stem + ".") and old.endswith(ext) \
+                    and len(old) == len(name):
+                try:
+                    os.remove(os.path.join(STATIC_DIR, old))
+                except OSError:
+                    pass
+    return f"{STATIC_URL}/{quote(name)}"
+
+
+def publish_file(path: str):
+    """파일을 정적 서빙 경로에 게시하고 URL 반환. 파일 없음·정적 서빙 꺼짐·쓰기 실패 시 None."""
+    if not static_serving_enabled() or not os.path.exists(path):
+        return None
+    try:
+        stt = os.stat(path)
+        return _publish(os.path.abspath(path), stt.st_mtime_ns, stt.st_size)
+    except OSError:
+        return None
+
+
+@functools.lru_cache(maxsize=8)
+def _read_text(path: str, mtime_ns: int) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def read_text_asset(path: str):
+    """텍스트 자산 읽기 (수정 시각이 같으면 디스크 재읽기 없음). 파일 없으면 None."""
+    try:
+        return _read_text(os.path.abspath(path), os.stat(path).st_mtime_ns)
+    except OSError:
+        return None
+
+
+# =================================================================
+# 2) 부모 문서 자산 (세션당 1회 전송)
+# =================================================================
+
+def _sent() -> set:
+    if _SENT_KEY not in st.session_state:
+        st.session_state[_SENT_KEY] = set()
+    return st.session_state[_SENT_KEY]
+
+
+_HEAD_LOADER_JS = """
+(function(){
+  var d = window.parent.document;
+  ASSETS.forEach(function(a){
+    var id = 'pms_asset_' + a.name, old = d.getElementById(id);
+    if (old && old.getAttribute('data-hash') === a.hash) return;
+    if (old) old.remove();
+    var el = d.createElement(a.kind === 'css' ? 'style' : 'script');
+    el.id = id; el.setAttribute('data-hash', a.hash); el.textContent = a.text;
+    d.head.appendChild(el);
+  });
+})();
+"""
+
+
+def inject_head_assets(assets) -> None:
+    """CSS/JS 를 부모 문서 head 에 설치. assets: [(이름, 'css'|'js', 본문), ...]
+    이 세션이 이미 보낸 해시는 제외하고, 보낼 것이 없으면 iframe 도 만들지 않음.
+    같은 이름의 자산 내용이 바뀌면 기존 요소를 교체 (JS 는 재실행)."""
+    sent = _sent()
+    todo = [{"name": n, "kind": k, "text": t, "hash": asset_digest(t)} for n, k, t in assets]
+    todo = [a for a in todo if f"{a['name']}:{a['hash']}" not in sent]
+    if not todo:
+        return
+    import streamlit.components.v1 as components
+    components.html(
+        "<script>var ASSETS=" + json.dumps(todo).replace("</", "<\\/") + ";"
+        + _HEAD_LOADER_JS + "</script>",
+        height=0,
+    )
+    sent.update(f"{a['name']}:{a['hash']}" for a in todo)
+
+
+_HTML_LOADER_JS = """
+(function(){
+  var store = window.parent.__pmsAssets = window.parent.__pmsAssets || {};
+  if (typeof BODY === 'string') store[HASH] = BODY;
+  var html = store[HASH];
+  if (html === undefined) { document.body.textContent = '새로고침(F5) 후 다시 열어주세요.'; return; }
+  document.open(); document.write(html); document.close();
+})();
+"""
+
+
+def cached_html(name: str, html: str, height: int, scrolling: bool = False) -> None:
+    """components.html 대체 — 본문은 세션당 1회만 전송해 부모 문서에 보관,
+    이후 방문은 해시 참조만 보내 iframe 안에서 보관본을 그림."""
+    digest = asset_digest(html)
+    key = f"html:{name}:{digest}"
+    sent = _sent()
+    body = "undefined" if key in sent else json.dumps(html).replace("</", "<\\/")
+    import streamlit.components.v1 as components
+    components.html(
+        f"<script>var HASH={json.dumps(digest)}, BODY={body};" + _HTML_LOADER_JS + "</script>",
+        height=height, scrolling=scrolling,
+    )
+    sent.add(key)
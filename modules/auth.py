@@ -1,12 +1,21 @@
 """
 인증 / 권한 모듈
 - 비밀번호 해시/검증 (bcrypt + SHA-256 fallback)
+- 비밀번호 작업 풀 (bcrypt 를 스크립트 스레드 밖, 동시 실행 수 제한)
+- 서명 세션 토큰 (새로고침 시 재로그인 없이 세션 복원)
 - 마스터 비밀번호 로드
 - 커스텀 권한 파싱 및 확인
 """
 
+import base64
 import hashlib
+import hmac
+import json
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as _FuturesTimeout
+
 import streamlit as st
 
 try:
@@ -39,6 +48,176 @@ def verify_pw(plain: str, hashed: str) -> bool:
     return hashlib.sha256(plain.encode("utf-8")).hexdigest() == hashed
 
 
+# =================================================================
+# 비밀번호 작업 풀 (로그인 폭주 대비)
+# =================================================================
+# bcrypt 는 의도적으로 느린 연산(~수백 ms) — 교대 시작 로그인 폭주 때 스크립트 스레드마다 돌리면
+# 서버 CPU 를 전부 점유해 다른 스테이션 rerun 까지 느려진다.
+# 동시 실행은 PW_POOL_WORKERS 개, 대기열은 PW_QUEUE_MAX 개로 제한하고 넘치면 즉시 "혼잡" 응답.
+
+PW_POOL_WORKERS = 2
+PW_QUEUE_MAX    = 32
+PW_TIMEOUT_SEC  = 15
+
+_PW_POOL  = ThreadPoolExecutor(max_workers=PW_POOL_WORKERS, thread_name_prefix="pw-hash")
+_PW_SLOTS = threading.BoundedSemaphore(PW_QUEUE_MAX)
+
+
+def _run_pw_task(fn, *args):
+    """fn(*args) 를 비밀번호 작업 풀에서 실행. 대기열 초과·시간 초과 시 None."""
+    if not _PW_SLOTS.acquire(blocking=False):
+        return None
+    try:
+        fut = _PW_POOL.submit(fn, *args)
+    except RuntimeError:
+        _PW_SLOTS.release()
+        return None
+    fut.add_done_callback(lambda _f: _PW_SLOTS.release())
+    try:
+        return fut.result(timeout=PW_TIMEOUT_SEC)
+    except _FuturesTimeout:
+        return None
+
+
+def verify_pw_pooled(plain: str, hashed: str):
+    """verify_pw 를 작업 풀에서 실행. Returns True / False / None(혼잡 — 잠시 후 재시도)."""
+    return _run_pw_task(verify_pw, plain, hashed)
+
+
+def hash_pw_pooled(password: str):
+    """hash_pw 를 작업 풀에서 실행. 혼잡 시 None."""
+    return _run_pw_task(hash_pw, password)
+
+
+# =================================================================
+# 서명 세션 토큰 (새로고침 복원)
+# =================================================================
+# 토큰 = base64url(JSON{u: 아이디, e: 만료 epoch, f: 비밀번호 해시 지문}) + "." + HMAC-SHA256 서명
+# - 검증은 HMAC 1회 (bcrypt 없음), 사용자 정보는 공유 사용자 디렉터리에서 조회
+# - 비밀번호가 바뀌면 지문이 달라져 기존 토큰 무효, 역할·권한은 항상 디렉터리 기준
+# - 서명 키: st.secrets["session_secret"] 또는 환경변수 PMS_SESSION_SECRET (없으면 복원 기능 꺼짐)
+# - 브라우저 보관: 쿠키 (st.context.cookies 로 읽기, Streamlit 1.37+ — requirements.txt 최소 버전)
+#   쿠키는 JS(document.cookie)로 설정하므로 HttpOnly 불가 — 페이지에 스크립트를 주입할 수 있으면 읽힘.
+#   대신 SameSite=Strict, HTTPS 접속 시 Secure, 12시간 만료, 로그아웃 시 서버 측 폐기로 노출 범위를 줄임.
+# - 로그아웃: 토큰 서명을 프로세스 폐기 목록에 올리고, 해당 세션은 복원을 건너뜀
+#   (st.context.cookies 는 웹소켓 연결 시점 스냅샷이라 삭제 후에도 같은 세션에서는 이전 값이 보임)
+
+SESSION_COOKIE  = "pms_sid"
+SESSION_TTL_SEC = 12 * 3600   # 교대 1회 + 여유
+
+_SID_PENDING_KEY = "_sid_pending"   # session_state: 다음 실행에 브라우저로 보낼 (토큰 | "" = 삭제)
+_SID_CURRENT_KEY = "_sid_current"   # session_state: 이 세션이 쓰는 토큰 (로그아웃 시 폐기)
+_SID_READ_KEY    = "_sid_read"      # session_state: 쿠키를 이미 읽었음 (세션당 1회)
+
+_revoked: dict = {}                 # 폐기된 토큰 서명 → 만료 epoch (프로세스 공유)
+_revoked_lock = threading.Lock()
+
+
+def _session_secret():
+    try:
+        secret = st.secrets.get("session_secret")
+    except Exception:
+        secret = None
+    secret = secret or os.getenv("PMS_SESSION_SECRET")
+    return secret.encode("utf-8") if secret else None
+
+
+def _b64e(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _b64d(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _pw_fingerprint(pw_hash: str) -> str:
+    return hashlib.sha256(str(pw_hash).encode("utf-8")).hexdigest()[:16]
+
+
+def issue_session_token(user_id: str, pw_hash: str):
+    """로그인 성공 시 발급. 서명 키 미설정이면 None."""
+    secret = _session_secret()
+    if not secret:
+        return None
+    body = _b64e(json.dumps({"u": user_id, "e": int(time.time()) + SESSION_TTL_SEC,
+                             "f": _pw_fingerprint(pw_hash)}, separators=(",", ":")).encode("utf-8"))
+    sig = _b64e(hmac.new(secret, body.encode("ascii"), hashlib.sha256).digest())
+    return f"{body}.{sig}"
+
+
+def _revoke(token) -> None:
+    if not token or "." not in token:
+        return
+    now = time.time()
+    with _revoked_lock:
+        for sig in [s for s, exp in _revoked.items() if exp < now]:
+            del _revoked[sig]
+        _revoked[token.rsplit(".", 1)[1]] = now + SESSION_TTL_SEC
+
+
+def verify_session_token(token, user_db: dict):
+    """유효한 토큰이면 아이디, 아니면 None (서명·만료·사용자 존재·비밀번호 지문 확인)."""
+    secret = _session_secret()
+    if not secret or not token or "." not in token:
+        return None
+    body, sig = token.rsplit(".", 1)
+    with _revoked_lock:
+        if sig in _revoked:
+            return None
+    expected = _b64e(hmac.new(secret, body.encode("ascii"), hashlib.sha256).digest())
+    if not hmac.compare_digest(sig, expected):
+        return None
+    try:
+        claims = json.loads(_b64d(body))
+    except (ValueError, TypeError):
+        return None
+    user = user_db.get(claims.get("u"))
+    if not user or claims.get("e", 0) < time.time():
+        return None
+    if not hmac.compare_digest(claims.get("f", ""), _pw_fingerprint(user.get("pw_hash", ""))):
+        return None
+    return claims["u"]
+
+
+def read_session_token():
+    """브라우저가 보낸 세션 토큰 — 세션당 1회만 반환 (이후·로그아웃 뒤에는 None)."""
+    if st.session_state.get(_SID_READ_KEY):
+        return None
+    st.session_state[_SID_READ_KEY] = True
+    token = st.context.cookies.get(SESSION_COOKIE)
+    if token:
+        st.session_state[_SID_CURRENT_KEY] = token
+    return token
+
+
+def remember_session(token) -> None:
+    """토큰을 다음 실행에 브라우저로 저장 (로그인 직후 st.rerun 으로 현재 출력이 버려지므로 지연)."""
+    if token:
+        st.session_state[_SID_PENDING_KEY] = token
+        st.session_state[_SID_CURRENT_KEY] = token
+
+
+def forget_session() -> None:
+    """로그아웃 — 현재 토큰 서버 측 폐기, 이 세션의 쿠키 복원 중단, 다음 실행에 브라우저 토큰 삭제."""
+    _revoke(st.session_state.pop(_SID_CURRENT_KEY, None))
+    st.session_state[_SID_READ_KEY] = True
+    st.session_state[_SID_PENDING_KEY] = ""
+
+
+def flush_session_cookie() -> None:
+    """대기 중인 토큰 저장/삭제를 브라우저에 반영 (스크립트 상단에서 매 실행 호출, 대기 없으면 무동작)."""
+    pending = st.session_state.pop(_SID_PENDING_KEY, None)
+    if pending is None:
+        return
+    import streamlit.components.v1 as components
+    max_age = SESSION_TTL_SEC if pending else 0
+    cookie = f"{SESSION_COOKIE}={pending}; Max-Age={max_age}; Path=/; SameSite=Strict"
+    components.html(
+        f"<script>var w = window.parent; w.document.cookie = {json.dumps(cookie)}"
+        f" + (w.location.protocol === 'https:' ? '; Secure' : '');</script>",
+        height=0)
+
+
 def get_master_pw_hash() -> str | None:
     """
     마스터 비밀번호 해시 로드
@@ -0,0 +1,118 @@
+"""
+엑셀 일괄 업로드 파이프라인
+- 읽기 전용 스트리밍 파싱 (openpyxl read_only — 대용량 파일도 메모리 일정)
+- 벡터화 검증 / 파일 내·DB 중복 제거
+- 반려 리포트 (엑셀) 생성
+- 생산 일정 중복 판정 키 (해시 집합)
+
+DB 쓰기는 modules.database 의 배치 함수가 담당한다.
+"""
+
+import io
+import pandas as pd
+
+# 자재 시리얼 업로드 양식 컬럼 (순서 = 엑셀 A~E 열)
+MAT_IMPORT_COLS = ['메인시리얼', '모델', '반', '자재명', '자재시리얼']
+
+
+# =================================================================
+# 엑셀 파싱
+# =================================================================
+
+def _cell_str(v) -> str:
+    """셀 값을 문자열로 정규화. 숫자형 시리얼(123.0)은 정수 표기로 변환."""
+    if v is None:
+        return ""
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return str(v).strip()
+
+
+def read_excel_rows(file_obj, min_row: int = 2, max_col: int = None,
+                    sheet_name: str = None) -> list:
+    """엑셀 시트를 read_only 모드로 스트리밍 파싱해 (엑셀 행 번호, 값 튜플) 목록 반환.
+    완전히 빈 행은 제외 (행 번호는 빈 행을 건너뛰어도 원본 기준 유지). file_obj: 업로드 파일 또는 bytes."""
+    import openpyxl
+    if isinstance(file_obj, (bytes, bytearray)):
+        file_obj = io.BytesIO(file_obj)
+    wb = openpyxl.load_workbook(file_obj, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet_name] if sheet_name else wb.active
+        return [
+            (row_idx, r)
+            for row_idx, r in enumerate(
+                ws.iter_rows(min_row=min_row, max_col=max_col, values_only=True), start=min_row)
+            if any(c not in (None, "") for c in r)
+        ]
+    finally:
+        wb.close()  # read_only 워크북은 파일 핸들을 직접 닫아야 함
+
+
+def parse_material_serial_excel(file_obj) -> pd.DataFrame:
+    """자재 시리얼 업로드 양식 → DataFrame (MAT_IMPORT_COLS + '행').
+    '행' 은 원본 엑셀 행 번호 (반려 리포트용)."""
+    ncol = len(MAT_IMPORT_COLS)
+    rows = read_excel_rows(file_obj, min_row=2, max_col=ncol)
+    df = pd.DataFrame(
+        [(list(r) + [None] * ncol)[:ncol] for _, r in rows],
+        columns=MAT_IMPORT_COLS, dtype=object,
+    )
+    for col in MAT_IMPORT_COLS:
+        df[col] = df[col].map(_cell_str)
+    df.insert(0, '행', [row_idx for row_idx, _ in rows])
+    return df
+
+
+# =================================================================
+# 검증 / 중복 제거
+# =================================================================
+
+def validate_material_serials(df: pd.DataFrame, existing_pairs: set) -> tuple:
+    """자재 시리얼 업로드 행 벡터화 검증.
+    existing_pairs: DB 에 이미 있는 (메인시리얼, 자재시리얼) 집합.
+    Returns (valid_df, reject_df) — reject_df 에는 '사유' 컬럼 추가."""
+    if df.empty:
+        return df, df.assign(사유=pd.Series(dtype=object))
+    reason = pd.Series("", index=df.index, dtype=object)
+
+    def _flag(mask, text):
+        reason.loc[mask & (reason == "")] = text
+
+    _flag(df['메인시리얼'] == "", "메인시리얼 누락")
+    _flag(df['자재시리얼'] == "", "자재시리얼 누락")
+    _flag(df.duplicated(subset=['메인시리얼', '자재시리얼'], keep='first'), "파일 내 중복")
+    if existing_pairs:
+        _pairs = pd.MultiIndex.from_frame(df[['메인시리얼', '자재시리얼']])
+        _flag(pd.Series(_pairs.isin(existing_pairs), index=df.index), "기등록 (메인+자재 S/N)")
+
+    ok = reason == ""
+    return df[ok].copy(), df[~ok].assign(사유=reason[~ok])
+
+
+def build_reject_report(reject_df: pd.DataFrame, sheet_name: str = "반려") -> bytes:
+    """반려 행 목록을 엑셀 bytes 로 변환 (download_button 용)."""
+    buf = io.BytesIO()
+    with pd.ExcelWriter(buf, engine='openpyxl') as writer:
+        reject_df.to_excel(writer, index=False, sheet_name=sheet_name)
+    return buf.getvalue()
+
+
+# =================================================================
+# 생산 일정 업로드
+# =================================================================
+
+# 일정 중복 판정 키 (날짜 + 모델명 + 카테고리 + 반)
+SCHEDULE_KEY_COLS = ('날짜', '모델명', '카테고리', '반')
+
+
+def schedule_key_set(sch_df: pd.DataFrame) -> set:
+    """기존 일정 DataFrame → 중복 판정 키 해시 집합 (1회 생성, 행당 O(1) 조회)."""
+    if sch_df is None or sch_df.empty or not all(c in sch_df.columns for c in SCHEDULE_KEY_COLS):
+        return set()
+    keys = sch_df[list(SCHEDULE_KEY_COLS)].astype(str)
+    return set(zip(*(keys[c].str.slice(0, 10) if c == '날짜' else keys[c] for c in SCHEDULE_KEY_COLS)))
+
+
+def schedule_key(row: dict) -> tuple:
+    return tuple(str(row.get(c, ''))[:10] if c == '날짜' else str(row.get(c, ''))
+                 for c in SCHEDULE_KEY_COLS)
@@ -5,11 +5,12 @@ import calendar
 import html as html_mod
 
 from modules.database import (
-    load_schedule, insert_schedule, update_schedule, delete_schedule,
+    load_schedule_month, insert_schedule, update_schedule, delete_schedule,
     insert_schedule_change_log,
     insert_audit_log, _clear_schedule_cache, _clear_production_cache,
     load_realtime_ledger, load_production_plan,
-    update_row,
+    update_row, get_master_models, get_master_group_pns,
+    get_schedule_window, warm_schedule_window,
 )
 from modules.auth import check_perm
 from modules.utils import get_now_kst_str
@@ -43,7 +44,9 @@ def show_inline_day_panel():
         return
 
     can_edit = st.session_state.user_role in CALENDAR_EDIT_ROLES and check_perm("생산 지표 관리", "edit")
-    sch_df   = st.session_state.schedule_db
+    # 일정은 해당 날짜가 속한 달만 조회 (월 단위 일정 저장소)
+    _day   = action_data if action in ("view_day", "add") else st.session_state.get("cal_action_day")
+    sch_df = load_schedule_month(str(_day)[:7]) if _day else pd.DataFrame()
 
     # ── 패널 컨테이너 ─────────────────────────────────────────
     with st.container(border=True):
@@ -51,7 +54,7 @@ def show_inline_day_panel():
         # ── 수정 폼 모드 ──────────────────────────────────────
         if action == "edit":
             sch_id  = action_data
-            matched = sch_df[sch_df['id'] == sch_id]
+            matched = sch_df[sch_df['id'] == sch_id] if not sch_df.empty else sch_df
             if matched.empty:
                 st.warning("일정을 찾을 수 없습니다.")
                 if st.button("닫기", key="inline_edit_notfound_close"):
@@ -113,7 +116,7 @@ def show_inline_day_panel():
                                 작업자=st.session_state.user_id
                             )
                             _clear_schedule_cache()
-                            st.session_state.schedule_db    = load_schedule()
+                            st.session_state.pop("schedule_db", None)   # 전체 이력 사본은 관리 화면에서 재조회
                             st.session_state[save_done_key] = True
                             _rerun(_dp_xp_key)
                 if c2.form_submit_button(" 목록으로", use_container_width=True):
@@ -124,7 +127,7 @@ def show_inline_day_panel():
                 if c3.form_submit_button(" 삭제", use_container_width=True):
                     delete_schedule(sch_id)
                     _clear_schedule_cache()
-                    st.session_state.schedule_db    = load_schedule()
+                    st.session_state.pop("schedule_db", None)   # 전체 이력 사본은 관리 화면에서 재조회
                     st.session_state.cal_action     = None
                     st.session_state[save_done_key] = False
                     _rerun(_dp_xp_key)
@@ -150,11 +153,8 @@ def show_inline_day_panel():
                 st.session_state[_add_ban_key] = PRODUCTION_GROUPS[0]
             ban = st.selectbox("반 *", PRODUCTION_GROUPS, key=_add_ban_key)
 
-            _ban_models  = st.session_state.group_master_models.get(ban, [])
-            _ban_all_pns = list(dict.fromkeys(
-                _pn for _m in _ban_models
-                for _pn in st.session_state.group_master_items.get(ban, {}).get(_m, [])
-            ))
+            _ban_models  = get_master_models(ban)
+            _ban_all_pns = get_master_group_pns(ban)
 
             with st.form("add_sch_form_inline"):
                 cat = st.selectbox("계획 유형 *", PLAN_CATEGORIES)
@@ -200,7 +200,7 @@ def show_inline_day_panel():
                             st.session_state.pop("_sch_add_saving", None)
                             if result:
                                 _clear_schedule_cache()
-                                st.session_state.schedule_db = load_schedule()
+                                st.session_state.pop("schedule_db", None)   # 전체 이력 사본은 관리 화면에서 재조회
                                 st.session_state.cal_action       = "view_day"
                                 st.session_state.cal_action_data  = selected_date
                                 st.session_state["_sch_add_toast"] = f" [{ban}] {selected_date} 일정 등록 완료"
@@ -287,6 +287,7 @@ def show_inline_day_panel():
                             if bc1.button("수정", key=f"mod_{row_id}", help="수정"):
                                 st.session_state.cal_action      = "edit"
                                 st.session_state.cal_action_data = int(row_id)
+                                st.session_state.cal_action_day  = selected_date
                                 st.session_state.cal_action_sub  = None
                                 _rerun(_dp_xp_key)
                             if bc2.button("삭제", key=f"del_{row_id}", help="삭제"):
@@ -300,7 +301,7 @@ def show_inline_day_panel():
                                 st.session_state[confirm_key] = False
                                 if ok:
                                     _clear_schedule_cache()
-                                    st.session_state.schedule_db = load_schedule()
+                                    st.session_state.pop("schedule_db", None)   # 전체 이력 사본은 관리 화면에서 재조회
                                     st.session_state["_sch_del_toast"] = f" [{model_v}] 일정이 삭제되었습니다."
                                 else:
                                     st.session_state["_sch_del_toast"] = " 삭제 실패 — DB 오류가 발생했습니다."
@@ -346,7 +347,8 @@ def _do_batch_entry(sn_list, curr_line):
 # =================================================================
 
 # 공통 셀 렌더링 헬퍼
-def _render_cal_cells(sch_df, cal_year, cal_month, weeks_to_show, today, can_edit, key_prefix):
+# day_index: {'YYYY-MM-DD': {카테고리: 건수}} (get_schedule_window) — 셀당 dict 조회 1회
+def _render_cal_cells(day_index, cal_year, cal_month, weeks_to_show, today, can_edit, key_prefix):
     days_kr  = ["일","월","화","수","목","금","토"]
     hdr_cols = st.columns(7)
     for i, d in enumerate(days_kr):
@@ -365,20 +367,12 @@ def _render_cal_cells(sch_df, cal_year, cal_month, weeks_to_show, today, can_edi
                     continue
 
                 day_str   = f"{cal_year}-{cal_month:02d}-{day:02d}"
-                day_data  = sch_df[sch_df['날짜'] == day_str] if not sch_df.empty else pd.DataFrame()
+                cat_counts = day_index.get(day_str, {})
                 is_today  = (today == date(cal_year, cal_month, day))
                 bg        = "#d8ede2" if is_today else "#fffdf8"
                 border    = "2px solid #7ec8a0" if is_today else "1px solid #e0d8c8"
                 today_cls = " today" if is_today else ""
 
-                # 카테고리별 건수 집계 (벡터화)
-                cat_counts = {}
-                event_count = 0
-                if not day_data.empty:
-                    _cat_col = day_data['카테고리'].fillna('기타').astype(str).replace({'': '기타', 'nan': '기타'})
-                    cat_counts = _cat_col.value_counts().to_dict()
-                    event_count = len(day_data)
-
                 today_mark = " " if is_today else ""
                 btn_label  = f"{day}{today_mark}"
 
@@ -419,7 +413,6 @@ def _render_legend():
 
 # ── 주별 캘린더
 def render_calendar_weekly():
-    sch_df    = st.session_state.schedule_db
     cal_year  = st.session_state.cal_year
     cal_month = st.session_state.cal_month
     can_edit  = st.session_state.user_role in CALENDAR_EDIT_ROLES
@@ -491,8 +484,9 @@ def render_calendar_weekly():
             _rerun("cal_weekly")
 
         _render_legend()
-        _render_cal_cells(sch_df, cal_year, cal_month,
+        _render_cal_cells(get_schedule_window(cal_year, cal_month), cal_year, cal_month,
                           [cal_weeks[week_idx]], today, can_edit, "wk")
+        warm_schedule_window()   # 이웃 월 선조회 (표시 월이 바뀐 경우만)
 
 # ── 월별 캘린더
 def render_calendar_monthly(
@@ -502,7 +496,6 @@ def render_calendar_monthly(
     # - handle_calendar_events(): 이벤트 처리
     # - save_calendar_changes(): 변경사항 저장
     ):
-    sch_df    = st.session_state.schedule_db
     cal_year  = st.session_state.cal_month_year  if 'cal_month_year'  in st.session_state else st.session_state.cal_year
     cal_month = st.session_state.cal_month_month if 'cal_month_month' in st.session_state else st.session_state.cal_month
     can_edit  = st.session_state.user_role in CALENDAR_EDIT_ROLES
@@ -534,7 +527,8 @@ def render_calendar_monthly(
             _rerun("cal_monthly")
 
         _render_legend()
-        _render_cal_cells(sch_df, cal_year, cal_month,
+        _render_cal_cells(get_schedule_window(cal_year, cal_month), cal_year, cal_month,
                           cal_weeks, today, can_edit, "mo")
+        warm_schedule_window()   # 이웃 월 선조회 (표시 월이 바뀐 경우만)
 
 
@@ -0,0 +1,140 @@
+"""
+콜드 스타트 계측 + 지연 임포트
+==============================
+- lazy_module(name): 첫 속성 접근 때 임포트하는 모듈 프록시
+  → plotly.express 처럼 특정 페이지에서만 쓰는 무거운 의존성을 로그인 화면 전에 로드하지 않음
+- mark(label): 프로세스 기동 후 첫 스크립트 실행의 구간 시각(ms) 기록 — 라벨당 프로세스 1회
+  메인 앱: "imports"(모듈 임포트 완료) / "login_screen"(로그인 화면 표시) → 로그 1줄
+- CLI: 의존성별 임포트 시간 표 (python -X importtime 집계)
+
+    python -m modules.coldstart            # 메인 앱 임포트 대상 전체
+    python -m modules.coldstart --top 15 plotly.express openpyxl
+
+주의: 이 모듈은 표준 라이브러리만 사용 — 메인 스크립트에서 가장 먼저 임포트해 기준 시각으로 삼는다.
+"""
+
+import importlib
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+_T0 = time.perf_counter()     # 첫 임포트 시각 (= 서버 기동 후 첫 스크립트 실행 시작)
+_MARKS: dict = {}
+_LOCK = threading.Lock()
+
+
+def mark(label: str, log_summary: bool = False) -> None:
+    """기준 시각 이후 경과 ms 를 label 로 1회 기록. log_summary=True 면 지금까지 구간을 로그로 출력."""
+    with _LOCK:
+        if label in _MARKS:
+            return
+        _MARKS[label] = round((time.perf_counter() - _T0) * 1000, 1)
+        marks = dict(_MARKS)
+    if log_summary:
+        log.info("cold start: %s", ", ".join(f"{k} {v:,.0f}ms" for k, v in marks.items()))
+
+
+def cold_start_marks() -> dict:
+    """{구간 라벨: 기동 후 ms} — 관리 화면·헬스 체크용."""
+    with _LOCK:
+        return dict(_MARKS)
+
+
+class _LazyModule:
+    """속성 첫 접근 시 실제 모듈을 임포트해 이후 접근은 모듈로 위임."""
+
+    __slots__ = ("_name", "_mod")
+
+    def __init__(self, name: str):
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_mod", None)
+
+    def _load(self):
+        mod = self._mod
+        if mod is None:
+            t = time.perf_counter()
+            mod = importlib.import_module(self._name)
+            object.__setattr__(self, "_mod", mod)
+            log.info("lazy import %s: %.0fms", self._name, (time.perf_counter() - t) * 1000)
+        return mod
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._mod is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_module(name: str):
+    """import name as alias 대체: alias = lazy_module(name)."""
+    return _LazyModule(name)
+
+
+# =================================================================
+# CLI — 임포트 시간 프로파일
+# =================================================================
+
+# 메인 앱이 로그인 화면 전에 임포트하는 모듈 + 페이지에서 지연 로드하는 무거운 의존성
+PROFILE_TARGETS = (
+    "streamlit", "pandas", "supabase",
+    "modules.database", "modules.auth", "modules.utils", "modules.realtime",
+    "modules.live", "modules.kpi", "modules.calendar_view", "modules.bulk_import",
+    "modules.styles", "modules.assets", "modules.worklist",
+    # 지연 로드 대상
+    "plotly.express", "plotly.graph_objects", "openpyxl",
+    "googleapiclient.discovery", "google.oauth2.service_account",
+    "modules.kpi_dashboard", "modules.manual_worker", "modules.manual_admin",
+)
+
+
+def profile_imports(targets=PROFILE_TARGETS) -> list:
+    """새 인터프리터에서 targets 를 차례로 임포트하며 -X importtime 로 측정.
+    앞 모듈이 이미 불러온 하위 의존성은 다시 세지 않음 (이 순서로 임포트할 때의 추가 비용).
+    Returns [(모듈, 누적 ms, 자체 ms)] — 누적 시간 내림차순. 임포트 실패 모듈은 누적 -1."""
+    import os
+    import subprocess
+    import sys
+
+    app_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = ";".join(
+        f"exec('try:\\n import {t}\\nexcept Exception: pass')" for t in targets
+    )
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          cwd=app_dir, capture_output=True, text=True)
+    rows = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            self_us, cum_us, name = line[len("import time:"):].split("|", 2)
+            rows[name.strip()] = (int(cum_us) / 1000, int(self_us) / 1000)
+        except ValueError:
+            continue   # 헤더 행
+    out = [(t, *rows[t]) if t in rows else (t, -1.0, -1.0) for t in targets]
+    return sorted(out, key=lambda r: r[1], reverse=True)
+
+
+def main(argv=None) -> int:
+    import argparse
+    ap = argparse.ArgumentParser(description="메인 앱 의존성 임포트 시간 프로파일")
+    ap.add_argument("modules", nargs="*", help="측정할 모듈 (기본: PROFILE_TARGETS)")
+    ap.add_argument("--top", type=int, default=0, help="상위 N개만 출력")
+    args = ap.parse_args(argv)
+
+    rows = profile_imports(tuple(args.modules) or PROFILE_TARGETS)
+    if args.top:
+        rows = rows[:args.top]
+    print(f"{'module':<36}{'cumulative':>12}{'self':>10}")
+    for name, cum, own in rows:
+        if cum < 0:
+            print(f"{name:<36}{'(import 실패)':>12}")
+        else:
+            print(f"{name:<36}{cum:>10.1f}ms{own:>8.1f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
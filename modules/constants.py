@@ -42,3 +42,31 @@ SCH_CHANGE_REASONS = [
     "계획 오입력 수정",
     "기타 (직접 입력)",
 ]
+
+# ── 페이지별 자동 갱신 정책 (초 단위) ─────────────────────────────
+# 클라이언트 상태별 주기: active(기본) / scan(스캔 입력 직후) / idle(무입력 지속) / hidden(탭 숨김)
+#   idle_after : 무입력 판정 기준 (초)
+#   tables     : 변경 감지 대상 — 주기가 돌아와도 버전이 그대로면 rerun 생략
+#   full_rerun : False 면 전체 rerun 없이 라이브 fragment 만 같은 주기로 갱신
+# 페이지 값이 None 이면 자동 갱신 안 함 (입력 중 끊김 방지)
+REFRESH_POLICY_DEFAULT = {
+    "active": 15, "scan": 5, "idle": 60, "hidden": 300, "idle_after": 300,
+    "tables": ("production", "production_schedule"),
+    "full_rerun": True,
+}
+REFRESH_POLICIES = {
+    "현황판":          {"idle": 30, "full_rerun": False},   # 무인 월 디스플레이 — 무입력 감속 완화
+    "조립 라인":       {"tables": ("production", "production_schedule", "material_serial")},
+    "검사 라인":       {"scan": 3, "full_rerun": False},
+    "포장 라인":       {"scan": 3, "full_rerun": False},
+    "OQC 라인":        {"scan": 3, "full_rerun": False},
+    "불량 공정":       {"tables": ("production", "audit_log")},
+    "생산 현황 리포트": {"active": 60, "tables": ("production", "audit_log")},
+    "수리 현황 리포트": {"active": 60, "tables": ("production", "audit_log")},
+    "생산 지표 관리":   {"active": 60, "tables": ("production_schedule", "production_plan", "plan_change_log")},
+    "생산 중단 일지":   {"tables": ("production_stoppage_log",)},
+    "마스터 관리":     None,
+    "작업자 매뉴얼":   None,
+    "관리자 매뉴얼":   None,
+    "플로우차트":      None,
+}
@@ -5,20 +5,27 @@ Supabase DB 함수 모듈
 - 생산 이력 / 감사 로그 / 자재 시리얼 / 일정 / 계획 / 마스터 CRUD
 """
 
+import html
 import re
 import threading
+import time
 import streamlit as st
 import pandas as pd
 from datetime import datetime, timezone, timedelta, date
 from supabase import create_client, Client
 
-from modules.utils import get_now_kst_str, _send_telegram
+from modules.utils import get_now_kst_str
+from modules.notify import enqueue_telegram
+from modules.metrics import timed_loader, count_transition
 
 # 모듈 내부 상수 (메인 파일 constants 미러)
 _KST              = timezone(timedelta(hours=9))
 _PRODUCTION_GROUPS = ["제조1반", "제조2반", "제조3반"]
 _DEFAULT_PAGE_SIZE = 100
 _MAX_AUDIT_LOG_ROWS = 200
+_BULK_INSERT_CHUNK  = 500   # 일괄 insert 1회 요청당 행 수
+_IN_FILTER_CHUNK    = 100   # in_() 필터 1회당 값 수 (URL 길이 제한 대응)
+_PAGE_ROWS          = 1000  # PostgREST 기본 max-rows
 
 # =================================================================
 # 서버사이드 로그인 잠금 (프로세스 공유 — session_state 우회 방지)
@@ -77,6 +84,18 @@ def keep_supabase_alive() -> None:
         st.sidebar.warning("⚠️ Supabase 연결 확인 실패 — 네트워크 상태를 확인해주세요.")
 
 
+def _select_paged(make_query, page_size: int = _PAGE_ROWS) -> list:
+    """PostgREST max-rows 제한을 넘는 조회용 range 페이징.
+    make_query: 호출할 때마다 새 select 쿼리 빌더를 반환하는 함수."""
+    rows, start = [], 0
+    while True:
+        batch = make_query().range(start, start + page_size - 1).execute().data or []
+        rows += batch
+        if len(batch) < page_size:
+            return rows
+        start += page_size
+
+
 # =================================================================
 # 캐시 초기화 헬퍼
 # =================================================================
@@ -88,6 +107,8 @@ def _clear_production_cache() -> None:
 
 def _clear_schedule_cache() -> None:
     load_schedule.clear()
+    _fetch_schedule_month.clear()
+    _schedule_day_index.clear()
 
 def _clear_plan_cache() -> None:
     load_production_plan.clear()
@@ -95,6 +116,7 @@ def _clear_plan_cache() -> None:
 
 def _clear_master_cache() -> None:
     load_model_master.clear()
+    get_model_master_index.clear()
 
 def _clear_audit_cache() -> None:
     load_audit_log.clear()
@@ -106,6 +128,11 @@ def _clear_help_request_cache() -> None:
 def _clear_access_request_cache() -> None:
     load_access_requests.clear()
 
+def _clear_material_cache() -> None:
+    load_material_serials.clear()
+    load_material_serials_bulk.clear()
+    _reset_material_index()
+
 def _clear_all_cache() -> None:
     _clear_production_cache()
     _clear_schedule_cache()
@@ -115,7 +142,8 @@ def _clear_all_cache() -> None:
     _clear_stoppage_cache()
     _clear_help_request_cache()
     _clear_access_request_cache()
-    load_material_serials.clear()
+    _clear_material_cache()
+    invalidate_user_directory()
 
 
 def clear_cache_for_tables(tables: set) -> None:
@@ -135,9 +163,11 @@ def clear_cache_for_tables(tables: set) -> None:
     if "access_requests" in tables:
         _clear_access_request_cache()
     if "material_serial" in tables:
-        load_material_serials.clear()
+        _clear_material_cache()
     if "production_stoppage_log" in tables:
         _clear_stoppage_cache()
+    if "users" in tables:
+        invalidate_user_directory()
 
 
 # =================================================================
@@ -145,6 +175,7 @@ def clear_cache_for_tables(tables: set) -> None:
 # =================================================================
 
 @st.cache_data(ttl=120)
+@timed_loader("realtime_ledger")
 def load_realtime_ledger() -> pd.DataFrame:
     """실시간 현황 전용: 오늘 생성 제품 + 이전 날짜 생성이지만 아직 미완료인 WIP 제품.
     TTL=120s — Realtime 구독이 변경 감지 시 캐시를 즉시 무효화하므로 체감 지연 없음."""
@@ -183,6 +214,7 @@ def load_realtime_ledger() -> pd.DataFrame:
 
 
 @st.cache_data(ttl=120)
+@timed_loader("production_history")
 def load_production_history(date_from: str, date_to: str, limit: int = 5000) -> pd.DataFrame:
     """이력/리포트 조회 전용.
     - 최근 30일 이내 데이터: production 테이블 조회
@@ -239,6 +271,7 @@ def load_production_history(date_from: str, date_to: str, limit: int = 5000) ->
 
 
 @st.cache_data(ttl=120)
+@timed_loader("production_by_serials")
 def load_production_by_serials(serials: tuple) -> pd.DataFrame:
     """시리얼 목록 기반 production + production_history 조회 (날짜 무관).
     생산 현황 리포트에서 실제 투입일 기준 집계 시 사용.
@@ -311,6 +344,7 @@ def insert_row(row: dict) -> bool:
     sb = get_supabase()
     try:
         sb.table("production").insert(row).execute()
+        count_transition(row.get('상태'))
         return True
     except Exception as e:
         err_str = str(e)
@@ -341,6 +375,7 @@ def insert_row(row: dict) -> bool:
 def update_row(시리얼: str, data: dict) -> bool:
     try:
         get_supabase().table("production").update(data).eq("시리얼", 시리얼).execute()
+        count_transition(data.get('상태'))
         return True
     except Exception as e:
         st.error(f"업데이트 실패: {e}"); return False
@@ -386,6 +421,86 @@ def delete_production_row_by_sn(시리얼: str) -> bool:
         st.error(f"삭제 실패: {e}"); return False
 
 
+# =================================================================
+# 사용자 디렉터리 (프로세스 공유)
+# =================================================================
+# 세션마다 users 전체를 읽지 않도록 프로세스 전역 1벌 보관 (교대 시작 로그인 폭주 시 DB 조회 1회).
+# users 변경(Realtime) 또는 계정 관리 쓰기 시 invalidate_user_directory() → 버전 +1, 다음 조회 때 재적재.
+# 세션은 사본과 버전을 들고 있다가 버전이 바뀌면 사본만 교체 (sync_session_user_db).
+
+USER_DIR_TTL_SEC = 600   # Realtime 미연결 대비 최대 보관 시간
+_USER_DIR = {"version": 1, "loaded": 0, "at": 0.0, "users": {}}
+_USER_DIR_LOCK = threading.Lock()        # 상태 읽기/쓰기
+_USER_DIR_LOAD_LOCK = threading.Lock()   # DB 적재 직렬화 (락 보유 중 조회해도 무효화는 막지 않음)
+
+
+def _parse_user_rows(rows: list) -> dict:
+    import json as _j
+    users = {}
+    for row in rows:
+        entry = {
+            "pw_hash": row.get("password_hash", ""),
+            "role": row.get("role", "assembly_team"),
+        }
+        if row.get("custom_permissions"):
+            try:
+                entry["custom_permissions"] = _j.loads(row["custom_permissions"])
+            except (_j.JSONDecodeError, ValueError, TypeError):
+                pass  # 잘못된 JSON은 무시하고 커스텀 권한 없이 로그인 허용
+        users[row["username"]] = entry
+    return users
+
+
+def invalidate_user_directory() -> None:
+    with _USER_DIR_LOCK:
+        _USER_DIR["version"] += 1
+
+
+def _user_dir_fresh(now: float):
+    if _USER_DIR["loaded"] == _USER_DIR["version"] and now - _USER_DIR["at"] < USER_DIR_TTL_SEC:
+        return _USER_DIR["version"], _USER_DIR["users"]
+    return None
+
+
+def get_user_directory() -> tuple:
+    """(버전, {username: {"pw_hash", "role", ["custom_permissions"]}}).
+    반환 dict 는 프로세스 공유본 — 수정 금지 (세션 사본은 sync_session_user_db).
+    조회 실패 시 예외 전파 (실패 결과는 보관하지 않음). 동시 적재는 1회로 합쳐짐."""
+    import time as _t
+    with _USER_DIR_LOCK:
+        hit = _user_dir_fresh(_t.monotonic())
+    if hit:
+        return hit
+    with _USER_DIR_LOAD_LOCK:
+        with _USER_DIR_LOCK:
+            hit = _user_dir_fresh(_t.monotonic())
+            ver = _USER_DIR["version"]
+        if hit:
+            return hit   # 대기 중 다른 세션이 적재 완료
+        res = (get_supabase().table("users")
+               .select("username,password_hash,role,custom_permissions").execute())
+        users = _parse_user_rows(res.data or [])
+        with _USER_DIR_LOCK:
+            _USER_DIR.update(users=users, at=_t.monotonic())
+            if _USER_DIR["version"] == ver:
+                # 새 내용 = 새 버전 (TTL 재적재 포함) → 세션 사본 교체
+                _USER_DIR["version"] = _USER_DIR["loaded"] = ver + 1
+            else:
+                _USER_DIR["loaded"] = ver   # 적재 중 무효화됨 → 다음 조회 때 다시 적재
+            return _USER_DIR["loaded"], users
+
+
+def sync_session_user_db() -> bool:
+    """세션 user_db 를 디렉터리 최신 버전 사본으로 교체. 교체했으면 True. 조회 실패 시 예외 전파."""
+    import copy as _copy
+    ver, users = get_user_directory()
+    if st.session_state.get("_user_dir_ver") == ver and "user_db" in st.session_state:
+        return False
+    st.session_state.user_db = _copy.deepcopy(users)
+    st.session_state["_user_dir_ver"] = ver
+    return True
+
+
 # =================================================================
 # 앱 설정
 # =================================================================
@@ -432,14 +547,15 @@ def save_app_setting(key: str, value):
 # =================================================================
 
 def submit_help_request(requester: str, role: str, page: str, message: str) -> tuple:
-    """도움 요청을 Supabase 에 저장하고 텔레그램으로도 알림을 보낸다.
+    """도움 요청을 Supabase 에 저장하고 텔레그램 알림을 outbox 에 등록한다 (전송은 백그라운드 — 클릭 즉시 반환).
+    같은 작업자의 연속 요청은 전송 전이면 최신 내용 1건으로 합쳐진다.
 
     Returns (delivered, status):
-      - delivered: DB 저장 또는 텔레그램 전송 중 하나라도 성공하면 True.
+      - delivered: DB 저장 또는 텔레그램 대기열 등록 중 하나라도 성공하면 True.
       - status: 결과 상세 문자열.
-          * 'ok' — DB 저장 및 텔레그램 전송 모두 성공
-          * 'db_only' — DB 저장 성공, 텔레그램은 미발송/실패
-          * 'tg_only: <사유>' — DB 저장 실패, 텔레그램은 성공
+          * 'ok' — DB 저장 및 텔레그램 대기열 등록 모두 성공
+          * 'db_only' — DB 저장 성공, 텔레그램은 미등록 (시크릿 미설정 등)
+          * 'tg_only: <사유>' — DB 저장 실패, 텔레그램은 대기열 등록
           * 'fail: <사유>' — 두 경로 모두 실패
     """
     db_err = None
@@ -457,12 +573,13 @@ def submit_help_request(requester: str, role: str, page: str, message: str) -> t
         db_err = str(e)
 
     _now = datetime.now(_KST).strftime("%Y-%m-%d %H:%M")
-    _tg_result = _send_telegram(
+    _tg_result = enqueue_telegram(
         f"🆘 <b>관리자 도움 요청</b>\n"
-        f"작업자: {requester}\n"
-        f"페이지: {page}\n"
-        f"내용: {message}\n"
-        f"시각: {_now}"
+        f"작업자: {html.escape(str(requester))}\n"
+        f"페이지: {html.escape(str(page))}\n"
+        f"내용: {html.escape(str(message))}\n"
+        f"시각: {_now}",
+        key=f"help:{requester}:{message}",   # 같은 작업자의 같은 요청 반복만 합침
     )
 
     db_ok = db_err is None
@@ -550,6 +667,7 @@ def insert_audit_log(시리얼: str, 모델: str, 반: str,
 
 
 @st.cache_data(ttl=30)
+@timed_loader("audit_log")
 def load_audit_log(limit: int = _MAX_AUDIT_LOG_ROWS) -> pd.DataFrame:
     try:
         res = get_supabase().table("audit_log").select("*").order("시간", desc=True).limit(limit).execute()
@@ -561,6 +679,7 @@ def load_audit_log(limit: int = _MAX_AUDIT_LOG_ROWS) -> pd.DataFrame:
 
 
 @st.cache_data(ttl=60)
+@timed_loader("audit_log_by_date")
 def load_audit_log_by_date(date_from: str, date_to: str) -> pd.DataFrame:
     """날짜 범위 기반 감사 로그 조회 — 수리 현황 리포트 누적 집계용."""
     _EMPTY = pd.DataFrame(columns=['시간','시리얼','모델','반','이전상태','이후상태','작업자','비고'])
@@ -654,6 +773,48 @@ def insert_material_serials(메인시리얼: str, 모델: str, 반: str,
         return False
 
 
+def load_material_serial_pairs(main_serials) -> set | None:
+    """일괄 업로드 중복 검사용: 주어진 메인시리얼들의 기등록 (메인시리얼, 자재시리얼) 집합.
+    조회 실패 시 None 반환 (중복 검사 없이 등록되는 것을 막기 위해 호출자가 중단)."""
+    serial_list = list(dict.fromkeys(s for s in main_serials if s))
+    pairs: set = set()
+    try:
+        sb = get_supabase()
+        for i in range(0, len(serial_list), _IN_FILTER_CHUNK):
+            chunk = serial_list[i:i + _IN_FILTER_CHUNK]
+            rows = _select_paged(
+                lambda: sb.table("material_serial").select("메인시리얼,자재시리얼")
+                          .in_("메인시리얼", chunk).order("id")
+            )
+            pairs.update((r.get("메인시리얼", ""), r.get("자재시리얼", "")) for r in rows)
+        return pairs
+    except Exception as e:
+        st.error(f"기등록 자재 시리얼 조회 실패: {e}")
+        return None
+
+
+def insert_material_serials_batch(rows: list, chunk_size: int = _BULK_INSERT_CHUNK,
+                                  on_progress=None) -> tuple:
+    """자재 시리얼 일괄 등록 — chunk_size 행씩 배치 insert.
+    on_progress(done, total): 청크 완료마다 호출 (진행률 표시용).
+    Returns (성공 건수, 실패 목록 [(row, 사유), ...])."""
+    sb = get_supabase()
+    ok_cnt, failed = 0, []
+    total = len(rows)
+    for i in range(0, total, chunk_size):
+        chunk = rows[i:i + chunk_size]
+        try:
+            sb.table("material_serial").insert(chunk).execute()
+            ok_cnt += len(chunk)
+        except Exception as e:
+            failed += [(r, str(e)) for r in chunk]
+        if on_progress:
+            on_progress(min(i + chunk_size, total), total)
+    if ok_cnt:
+        _clear_material_cache()
+    return ok_cnt, failed
+
+
 @st.cache_data(ttl=60)
 def load_material_serials(메인시리얼: str = "") -> pd.DataFrame:
     _MAT_COLS = ['시간','메인시리얼','모델','반','자재명','자재시리얼','작업자']
@@ -671,6 +832,7 @@ def load_material_serials(메인시리얼: str = "") -> pd.DataFrame:
 
 
 @st.cache_data(ttl=60)
+@timed_loader("material_serials_bulk")
 def load_material_serials_bulk(serials: tuple) -> pd.DataFrame:
     if not serials:
         return pd.DataFrame(columns=['시간','메인시리얼','모델','반','자재명','자재시리얼','작업자'])
@@ -683,6 +845,69 @@ def load_material_serials_bulk(serials: tuple) -> pd.DataFrame:
         return pd.DataFrame(columns=['시간','메인시리얼','모델','반','자재명','자재시리얼','작업자'])
 
 
+# ── 자재 시리얼 요약 인덱스 ─────────────────────────────────────────
+# 메인시리얼 → (조회 시각, ((자재명, 자재시리얼), ...)) — 프로세스 공유, 전 페이지 공용.
+# 처음 조회되는 시리얼만 DB 에서 채우고, material_serial 변경 시(_clear_material_cache) 세대 교체.
+# Realtime 이벤트 누락(미연결·폴링 모드) 대비 항목별로 _MAT_INDEX_TTL_SEC 가 지나면 다시 조회.
+_MAT_INDEX: dict = {}
+_MAT_INDEX_GEN = 0
+_MAT_INDEX_MAX = 50000          # 누적 시리얼 상한 (초과 시 비우고 다시 채움)
+_MAT_INDEX_TTL_SEC = 60         # 항목 유효 시간 (기존 load_material_serials_bulk ttl 과 동일)
+_MAT_INDEX_LOCK = threading.Lock()
+
+
+def _reset_material_index() -> None:
+    global _MAT_INDEX_GEN
+    with _MAT_INDEX_LOCK:
+        _MAT_INDEX.clear()
+        _MAT_INDEX_GEN += 1
+
+
+def _mat_index_get(sn: str, now: float):
+    """유효한 인덱스 항목의 자재 튜플 (없거나 만료 시 None). _MAT_INDEX_LOCK 안에서 호출."""
+    item = _MAT_INDEX.get(sn)
+    if item is None or now - item[0] >= _MAT_INDEX_TTL_SEC:
+        return None
+    return item[1]
+
+
+def get_material_summary(serials) -> dict:
+    """메인시리얼 목록 → {메인시리얼: ((자재명, 자재시리얼), ...)} (등록 순, 미등록은 빈 튜플).
+    자재 수는 len(summary[sn]). 인덱스에 없거나 만료된 시리얼만 청크 단위 in_ 조회로 채운다."""
+    want = {str(s) for s in serials if s}
+    now = time.monotonic()
+    with _MAT_INDEX_LOCK:
+        cached = {sn: _mat_index_get(sn, now) for sn in want}
+        gen = _MAT_INDEX_GEN
+    missing = sorted(sn for sn, v in cached.items() if v is None)
+    if not missing:
+        return cached
+    found = {sn: [] for sn in missing}
+    try:
+        sb = get_supabase()
+        for i in range(0, len(missing), _IN_FILTER_CHUNK):
+            chunk = missing[i:i + _IN_FILTER_CHUNK]
+            rows = _select_paged(
+                lambda: sb.table("material_serial").select("메인시리얼,자재명,자재시리얼")
+                          .in_("메인시리얼", chunk).order("시간").order("id")
+            )
+            for r in rows:
+                found.setdefault(r.get("메인시리얼", ""), []).append(
+                    (r.get("자재명") or "", r.get("자재시리얼") or ""))
+    except Exception:
+        # 조회 실패는 인덱스에 남기지 않음 — 만료된 항목이라도 있으면 그대로 사용
+        with _MAT_INDEX_LOCK:
+            return {sn: v if v is not None else (_MAT_INDEX.get(sn) or (0, ()))[1]
+                    for sn, v in cached.items()}
+    fresh = {sn: tuple(v) for sn, v in found.items()}
+    with _MAT_INDEX_LOCK:
+        if gen == _MAT_INDEX_GEN:   # 조회 중 변경(세대 교체)됐으면 결과를 인덱스에 넣지 않음
+            if len(_MAT_INDEX) + len(fresh) > _MAT_INDEX_MAX:
+                _MAT_INDEX.clear()
+            _MAT_INDEX.update({sn: (now, v) for sn, v in fresh.items()})
+    return {sn: v if v is not None else fresh.get(sn, ()) for sn, v in cached.items()}
+
+
 def search_material_by_sn(자재시리얼: str) -> pd.DataFrame:
     try:
         자재시리얼_cleaned = re.sub(r'[^\w가-힣-]', '', 자재시리얼) if 자재시리얼 else ""
@@ -726,6 +951,7 @@ def delete_material_serial_row(row_id) -> bool:
 # =================================================================
 
 @st.cache_data(ttl=60)
+@timed_loader("schedule")
 def load_schedule() -> pd.DataFrame:
     try:
         res = get_supabase().table("production_schedule").select("*").order("날짜", desc=False).execute()
@@ -738,30 +964,169 @@ def load_schedule() -> pd.DataFrame:
         return pd.DataFrame(columns=['id','날짜','반','카테고리','pn','모델명','조립수','출하계획','특이사항','작성자'])
 
 
+# ── 월 단위 일정 저장소 (캘린더·월 계획용) ───────────────────────────
+# 한 달씩 날짜 범위 조회 + 표시 월이 바뀔 때 이웃 월 선조회, 날짜 → 카테고리별 건수 인덱스.
+# 캐시 항목 수 상한(max_entries)이 슬라이딩 윈도우 역할. _clear_schedule_cache 로 함께 무효화.
+# 조회 실패는 캐시 함수 안에서 예외로 올려 캐시에 남기지 않고, 바깥 래퍼에서 경고 후 빈 결과 반환.
+SCHEDULE_WINDOW_MONTHS = 1   # 표시 월 기준 앞뒤로 선조회할 개월 수
+_SCHEDULE_EMPTY_COLS = ['id','날짜','반','카테고리','pn','모델명','조립수','출하계획','특이사항','작성자']
+
+
+def _shift_month(year: int, month: int, delta: int) -> tuple:
+    idx = year * 12 + (month - 1) + delta
+    return idx // 12, idx % 12 + 1
+
+
+def _warn_schedule_load(ym: str, e: Exception) -> None:
+    if st.session_state.get('login_status', False):
+        st.warning(f"{ym} 일정 로드 실패: {e}")
+
+
+@st.cache_data(ttl=300, max_entries=24)
+@timed_loader("schedule_month")
+def _fetch_schedule_month(ym: str) -> pd.DataFrame:
+    """'YYYY-MM' 한 달치 일정 (날짜 범위 조회 + range 페이징). 실패 시 예외 — 캐시되지 않음."""
+    ny, nm = _shift_month(int(ym[:4]), int(ym[5:7]), 1)
+    sb = get_supabase()
+    rows = _select_paged(
+        lambda: sb.table("production_schedule").select("*")
+                  .gte("날짜", f"{ym}-01").lt("날짜", f"{ny:04d}-{nm:02d}-01")
+                  .order("날짜", desc=False).order("id")
+    )
+    if rows:
+        return pd.DataFrame(rows).fillna("")
+    return pd.DataFrame(columns=_SCHEDULE_EMPTY_COLS)
+
+
+def load_schedule_month(ym: str) -> pd.DataFrame:
+    """'YYYY-MM' 한 달치 일정 (전체 이력 로드 없음). 조회 실패 시 경고 + 빈 DataFrame."""
+    try:
+        return _fetch_schedule_month(ym)
+    except Exception as e:
+        _warn_schedule_load(ym, e)
+        return pd.DataFrame(columns=_SCHEDULE_EMPTY_COLS)
+
+
+def load_schedule_months(yms) -> pd.DataFrame:
+    """여러 달 일정 ('YYYY-MM' 목록, 월 캐시 조합)."""
+    frames = [f for f in (load_schedule_month(ym) for ym in dict.fromkeys(yms)) if not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=_SCHEDULE_EMPTY_COLS)
+    return pd.concat(frames, ignore_index=True)
+
+
+@st.cache_data(ttl=300, max_entries=24)
+def _schedule_day_index(ym: str) -> dict:
+    df = _fetch_schedule_month(ym)
+    if df.empty:
+        return {}
+    cat = df['카테고리'].fillna('기타').astype(str).replace({'': '기타', 'nan': '기타'})
+    counts = (pd.DataFrame({'d': df['날짜'].astype(str).str.slice(0, 10), 'c': cat})
+              .groupby(['d', 'c']).size().sort_values(ascending=False, kind='stable'))
+    index: dict = {}
+    for (d, c), n in counts.items():
+        index.setdefault(d, {})[c] = int(n)
+    return index
+
+
+def get_schedule_day_index(ym: str) -> dict:
+    """{'YYYY-MM-DD': {카테고리: 건수}} — 건수 많은 카테고리 순. 캘린더 셀당 dict 조회 1회.
+    조회 실패 시 경고 + 빈 인덱스 (실패 결과는 캐시하지 않음)."""
+    try:
+        return _schedule_day_index(ym)
+    except Exception as e:
+        _warn_schedule_load(ym, e)
+        return {}
+
+
+def get_schedule_window(year: int, month: int, radius: int = SCHEDULE_WINDOW_MONTHS) -> dict:
+    """표시 월의 날짜 인덱스 반환. 표시 월이 이 세션에서 처음이면 앞뒤 radius 개월을
+    선조회 대상으로 등록 — 렌더링 후 warm_schedule_window() 가 스크립트 스레드에서 채움."""
+    ym = f"{year:04d}-{month:02d}"
+    seen = st.session_state.setdefault("_sch_window_seen", [])
+    if ym not in seen:
+        seen.append(ym)
+        del seen[:-12]                     # 최근 표시 월만 기억
+        pending = st.session_state.setdefault("_sch_window_pending", [])
+        for d in range(-radius, radius + 1):
+            if d:
+                py, pm = _shift_month(year, month, d)
+                if f"{py:04d}-{pm:02d}" not in pending:
+                    pending.append(f"{py:04d}-{pm:02d}")
+    return get_schedule_day_index(ym)
+
+
+def warm_schedule_window() -> None:
+    """get_schedule_window 가 등록한 이웃 월 인덱스를 캐시에 채움 (화면 렌더링 뒤 호출).
+    선조회 실패는 무시 — 해당 월을 실제로 표시할 때 다시 조회·경고."""
+    pending = st.session_state.pop("_sch_window_pending", [])
+    for ym in pending:
+        try:
+            _schedule_day_index(ym)
+        except Exception:
+            pass
+
+
+_SCHEDULE_COLS = {'날짜', '반', '카테고리', 'pn', '모델명', '조립수', '출하계획', '특이사항', '작성자'}
+
+
+def _clean_schedule_row(row: dict) -> dict:
+    clean_row = {k: v for k, v in row.items() if k in _SCHEDULE_COLS}
+    if '날짜' in clean_row and hasattr(clean_row['날짜'], 'strftime'):
+        clean_row['날짜'] = clean_row['날짜'].strftime('%Y-%m-%d')
+    return clean_row
+
+
+def _schedule_master_entries(rows: list) -> list:
+    """일정 행 → model_master 등록 대상 (반, 모델명, 품목코드) 목록 (순서 유지·중복 제거)."""
+    entries = {}
+    for r in rows:
+        반   = str(r.get('반', '')).strip()
+        모델 = str(r.get('모델명', '')).strip()
+        pn   = str(r.get('pn', '')).strip()
+        if 반 in _PRODUCTION_GROUPS and 모델:
+            entries[(반, 모델, pn)] = True
+    return list(entries)
+
+
 def insert_schedule(row: dict) -> bool:
     try:
-        allowed = {'날짜', '반', '카테고리', 'pn', '모델명', '조립수', '출하계획', '특이사항', '작성자'}
-        clean_row = {k: v for k, v in row.items() if k in allowed}
-        if '날짜' in clean_row and hasattr(clean_row['날짜'], 'strftime'):
-            clean_row['날짜'] = clean_row['날짜'].strftime('%Y-%m-%d')
+        clean_row = _clean_schedule_row(row)
         get_supabase().table("production_schedule").insert(clean_row).execute()
-        반   = str(clean_row.get('반', '')).strip()
-        모델 = str(clean_row.get('모델명', '')).strip()
-        pn   = str(clean_row.get('pn', '')).strip()
-        if 반 in _PRODUCTION_GROUPS and 모델:
+        entries = _schedule_master_entries([clean_row])
+        for 반, 모델, pn in entries:
             upsert_model_master(반, 모델, pn if pn else 모델)
-            if 모델 not in st.session_state.group_master_models.get(반, []):
-                st.session_state.group_master_models.setdefault(반, []).append(모델)
-            if 모델 not in st.session_state.group_master_items.get(반, {}):
-                st.session_state.group_master_items.setdefault(반, {})[모델] = []
-            if pn and pn not in st.session_state.group_master_items[반][모델]:
-                st.session_state.group_master_items[반][모델].append(pn)
         return True
     except Exception as e:
         st.error(f"일정 등록 실패: {e}")
         return False
 
 
+def insert_schedules_batch(rows: list, chunk_size: int = _BULK_INSERT_CHUNK,
+                           on_progress=None) -> tuple:
+    """일정 일괄 등록 — chunk_size 행씩 배치 insert 후 모델 마스터를 1회 upsert.
+    on_progress(done, total): 청크 완료마다 호출.
+    Returns (성공 건수, 실패 목록 [(row, 사유), ...], 모델 마스터 등록 성공 여부)."""
+    sb = get_supabase()
+    clean_rows = [_clean_schedule_row(r) for r in rows]
+    ok_rows, failed = [], []
+    total = len(clean_rows)
+    for i in range(0, total, chunk_size):
+        chunk = clean_rows[i:i + chunk_size]
+        try:
+            sb.table("production_schedule").insert(chunk).execute()
+            ok_rows += chunk
+        except Exception as e:
+            failed += [(r, str(e)) for r in chunk]
+        if on_progress:
+            on_progress(min(i + chunk_size, total), total)
+    master_ok = True
+    if ok_rows:
+        master_ok = upsert_model_master_batch(_schedule_master_entries(ok_rows))
+        _clear_schedule_cache()
+    return len(ok_rows), failed, master_ok
+
+
 def update_schedule(row_id: int, data: dict) -> bool:
     try:
         get_supabase().table("production_schedule").update(data).eq("id", row_id).execute()
@@ -832,6 +1197,7 @@ def delete_schedule_change_log_row(row_id) -> bool:
 # =================================================================
 
 @st.cache_data(ttl=300)
+@timed_loader("model_master")
 def load_model_master() -> pd.DataFrame:
     try:
         res = get_supabase().table("model_master").select("*").execute()
@@ -848,14 +1214,32 @@ def upsert_model_master(반: str, 모델명: str, 품목코드: str) -> bool:
             {"반": 반, "모델명": 모델명, "품목코드": 품목코드},
             on_conflict="반,모델명,품목코드"
         ).execute()
+        _clear_master_cache()
         return True
     except Exception:
         return False
 
 
+def upsert_model_master_batch(entries: list) -> bool:
+    """(반, 모델명, 품목코드) 목록을 한 번의 요청으로 upsert. 품목코드가 비면 모델명 사용."""
+    rows = {(반, 모델, pn or 모델): None for 반, 모델, pn in entries}
+    if not rows:
+        return True
+    try:
+        get_supabase().table("model_master").upsert(
+            [{"반": 반, "모델명": 모델, "품목코드": pn} for 반, 모델, pn in rows],
+            on_conflict="반,모델명,품목코드"
+        ).execute()
+        _clear_master_cache()
+        return True
+    except Exception as e:
+        st.error(f"모델 마스터 등록 실패: {e}"); return False
+
+
 def delete_model_from_master(반: str, 모델명: str) -> bool:
     try:
         get_supabase().table("model_master").delete().eq("반", 반).eq("모델명", 모델명).execute()
+        _clear_master_cache()
         return True
     except Exception:
         return False
@@ -864,6 +1248,7 @@ def delete_model_from_master(반: str, 모델명: str) -> bool:
 def delete_item_from_master(반: str, 모델명: str, 품목코드: str) -> bool:
     try:
         get_supabase().table("model_master").delete().eq("반", 반).eq("모델명", 모델명).eq("품목코드", 품목코드).execute()
+        _clear_master_cache()
         return True
     except Exception:
         return False
@@ -872,35 +1257,47 @@ def delete_item_from_master(반: str, 모델명: str, 품목코드: str) -> bool
 def delete_all_master_by_group(반: str) -> bool:
     try:
         get_supabase().table("model_master").delete().eq("반", 반).execute()
+        _clear_master_cache()
         return True
     except Exception:
         return False
 
 
-def sync_master_to_session():
-    """DB model_master → session_state group_master_models/items 동기화"""
+@st.cache_resource(ttl=300)
+def get_model_master_index() -> dict:
+    """model_master → 프로세스 공유 인덱스 (변경 시 1회 생성, 모든 세션이 같은 객체 참조).
+    _clear_master_cache() 로 무효화된다.
+    구조: {"models": {반: {모델명: (품목코드, ...)}}}   # 품목코드는 DB 순서 유지·중복 제거
+    세션 간 공유 객체이므로 호출자는 수정하지 말 것 (조회는 get_master_* 헬퍼 사용)."""
     df = load_model_master()
-    if df.empty:
-        return
-    models_map = {g: [] for g in _PRODUCTION_GROUPS}
-    items_map  = {g: {} for g in _PRODUCTION_GROUPS}
-    valid_df = df[df['반'].isin(_PRODUCTION_GROUPS)].copy()
-    valid_df['반']      = valid_df['반'].astype(str)
-    valid_df['모델명']   = valid_df['모델명'].astype(str)
-    valid_df['품목코드'] = valid_df['품목코드'].astype(str)
-    for g, gdf in valid_df.groupby('반'):
-        for m, mdf in gdf.groupby('모델명'):
-            models_map[g].append(m)
-            items_map[g][m] = [pn for pn in mdf['품목코드'].unique() if pn and pn != 'nan']
-    for g in _PRODUCTION_GROUPS:
-        for m in models_map[g]:
-            if m not in st.session_state.group_master_models[g]:
-                st.session_state.group_master_models[g].append(m)
-            if m not in st.session_state.group_master_items[g]:
-                st.session_state.group_master_items[g][m] = []
-            for pn in items_map[g].get(m, []):
-                if pn not in st.session_state.group_master_items[g][m]:
-                    st.session_state.group_master_items[g][m].append(pn)
+    models = {g: {} for g in _PRODUCTION_GROUPS}
+    if not df.empty:
+        valid_df = df[df['반'].isin(_PRODUCTION_GROUPS)]
+        for g, m, pn in zip(valid_df['반'].astype(str), valid_df['모델명'].astype(str),
+                            valid_df['품목코드'].astype(str)):
+            items = models[g].setdefault(m, {})
+            if pn and pn != 'nan':
+                items[pn] = None
+    return {
+        "models": {g: {m: tuple(items) for m, items in sorted(mm.items())} for g, mm in models.items()},
+    }
+
+
+def get_master_models(반: str) -> list:
+    """반의 등록 모델 목록 (정렬)."""
+    return list(get_model_master_index()["models"].get(반, {}))
+
+
+def get_master_items(반: str, 모델명: str) -> list:
+    """반·모델의 품목코드 목록."""
+    return list(get_model_master_index()["models"].get(반, {}).get(모델명, ()))
+
+
+def get_master_group_pns(반: str) -> list:
+    """반 전체 품목코드 목록 (모델 순서 기준 중복 제거)."""
+    return list(dict.fromkeys(
+        pn for items in get_model_master_index()["models"].get(반, {}).values() for pn in items
+    ))
 
 
 # =================================================================
@@ -908,6 +1305,7 @@ def sync_master_to_session():
 # =================================================================
 
 @st.cache_data(ttl=300)
+@timed_loader("production_plan")
 def load_production_plan() -> dict:
     try:
         res = get_supabase().table("production_plan").select("*").execute()
@@ -0,0 +1,141 @@
+"""
+생산 KPI 집계 엔진
+==================
+- 총 투입 / 최종 완료 / 진행 중 / 불량 / 달성률 정의를 한 곳에 모음
+  (현황판·생산 지표 관리·생산 현황 리포트가 같은 기준으로 집계)
+- 상태 판정 bool 배열을 1회 계산 → (반, 모델) 범주 코드 groupby 1회로 전 그룹 집계
+  반별·모델별·전체 합계는 작은 집계표에서 롤업 (원본 재스캔 없음)
+- kpi_snapshot: 기간 KPI 를 데이터 버전 단위로 렌더 캐시에 보관 → 모든 세션·페이지가 공유
+
+지표 정의:
+    총투입       : 기간 내 전체 행
+    최종완료     : 라인 == '포장 라인' & 상태 == '완료'
+    진행중       : 상태 ∈ ACTIVE_STATES
+    불량         : 상태에 '불량|부적합' 포함
+    수리포함불량 : 불량 OR 수리 이력 있음 (모델별 불량 분석·불량률 기준)
+    계획         : 조립계획 조립수 합계 (포장·출하계획은 같은 제품이므로 합산 제외)
+    달성률       : 최종완료 / 계획 × 100 (계획 없으면 0)
+"""
+
+import pandas as pd
+
+from modules.constants import ACTIVE_STATES, PRODUCTION_GROUPS
+from modules.database import load_production_history, load_schedule_month
+from modules.render_cache import render_cached
+
+KPI_COUNTS = ("총투입", "최종완료", "진행중", "불량", "수리포함불량")
+DEFECT_PATTERN = "불량|부적합"
+PLAN_CATEGORY = "조립계획"
+
+
+def _flags(df: pd.DataFrame) -> pd.DataFrame:
+    """행별 지표 판정 (0/1) — 지표당 벡터 연산 1회."""
+    state = df['상태'].fillna('').astype(str)
+    ng = state.str.contains(DEFECT_PATTERN, na=False)
+    if '수리' in df.columns:
+        repaired = df['수리'].fillna('').astype(str).str.strip() != ''
+    else:
+        repaired = False
+    return pd.DataFrame({
+        "총투입":       1,
+        "최종완료":     (df['라인'] == '포장 라인') & (state == '완료'),
+        "진행중":       state.isin(ACTIVE_STATES),
+        "불량":         ng,
+        "수리포함불량": ng | repaired,
+    }, index=df.index).astype('int64')
+
+
+def _plan_by_ban(plan_df: pd.DataFrame) -> pd.Series:
+    """조립계획 수량 반별 합계."""
+    if plan_df is None or plan_df.empty or '카테고리' not in plan_df.columns:
+        return pd.Series(dtype='int64')
+    p = plan_df[plan_df['카테고리'] == PLAN_CATEGORY]
+    qty = pd.to_numeric(p['조립수'], errors='coerce').fillna(0)
+    return qty.groupby(p['반'].astype(str)).sum().astype('int64')
+
+
+def _metrics(counts, plan: int) -> dict:
+    m = {k: int(counts.get(k, 0)) for k in KPI_COUNTS}
+    m["계획"] = int(plan)
+    m["달성률"] = round(m["최종완료"] / plan * 100, 1) if plan > 0 else 0
+    m["불량률"] = round(m["수리포함불량"] / m["총투입"] * 100, 1) if m["총투입"] > 0 else 0
+    return m
+
+
+def compute_kpis(df: pd.DataFrame, plan_df: pd.DataFrame = None) -> dict:
+    """df(생산 이력/원장) 전체 KPI 를 1회 집계.
+
+    Returns:
+        {"전체": {지표: 값}, "반": {반: {지표: 값}}, "모델": {모델: {지표: 값}},
+         "반모델": DataFrame (index=(반, 모델), columns=KPI_COUNTS)}
+        반 에는 PRODUCTION_GROUPS 가 항상 포함 (데이터 없으면 0).
+    """
+    if df is None or df.empty:
+        grid = pd.DataFrame(
+            columns=list(KPI_COUNTS), dtype='int64',
+            index=pd.MultiIndex.from_arrays([[], []], names=['반', '모델']),
+        )
+    else:
+        keys = [pd.Categorical(df['반'].fillna('').astype(str)),
+                pd.Categorical(df['모델'].fillna('').astype(str))]
+        grid = _flags(df).groupby(keys, observed=True).sum()
+        grid.index.names = ['반', '모델']
+
+    plans = _plan_by_ban(plan_df)
+    by_ban = grid.groupby(level='반').sum() if not grid.empty else grid.droplevel('모델')
+    by_model = grid.groupby(level='모델').sum() if not grid.empty else grid.droplevel('반')
+
+    bans = list(PRODUCTION_GROUPS) + [b for b in by_ban.index if b not in PRODUCTION_GROUPS]
+    return {
+        "전체": _metrics(grid.sum(), int(plans.sum())),
+        "반": {
+            b: _metrics(by_ban.loc[b] if b in by_ban.index else {}, int(plans.get(b, 0)))
+            for b in bans
+        },
+        "모델": {mdl: _metrics(row, 0) for mdl, row in by_model.iterrows()},
+        "반모델": grid,
+    }
+
+
+def scope_metrics(kpis: dict, ban: str = "전체") -> dict:
+    """'전체' 또는 특정 반의 지표 dict."""
+    if ban in (None, "", "전체"):
+        return kpis["전체"]
+    return kpis["반"].get(ban) or _metrics({}, 0)
+
+
+def model_table(kpis: dict, ban: str = "전체") -> pd.DataFrame:
+    """모델별 지표표 (columns: 모델 + KPI_COUNTS). ban 지정 시 해당 반만."""
+    grid = kpis["반모델"]
+    if ban not in (None, "", "전체"):
+        grid = grid[grid.index.get_level_values('반') == ban]
+    if grid.empty:
+        return pd.DataFrame(columns=['모델'] + list(KPI_COUNTS))
+    return grid.groupby(level='모델').sum().reset_index()
+
+
+def load_plan_range(date_from: str, date_to: str) -> pd.DataFrame:
+    """기간 [date_from, date_to] 의 일정 — 월 단위 일정 저장소를 이어 붙여 날짜로 자름."""
+    y, m = int(date_from[:4]), int(date_from[5:7])
+    frames = []
+    while f"{y:04d}-{m:02d}" <= date_to[:7]:
+        frames.append(load_schedule_month(f"{y:04d}-{m:02d}"))
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    sch = pd.concat(frames, ignore_index=True)
+    d = sch['날짜'].astype(str).str.slice(0, 10)
+    return sch[(d >= date_from) & (d <= date_to)]
+
+
+def kpi_snapshot(date_from: str, date_to: str, version, plan_to: str = None) -> dict:
+    """기간 KPI (load_production_history + 조립계획). 실적은 date_to, 계획은 plan_to 까지.
+    version: modules.live.data_version(("production", "production_schedule")) —
+    같은 (기간, 버전) 이면 프로세스 전역 캐시 결과 반환."""
+    plan_to = plan_to or date_to
+    return render_cached(
+        "kpi", (date_from, date_to, plan_to), version,
+        lambda: compute_kpis(load_production_history(date_from, date_to),
+                             load_plan_range(date_from, plan_to)),
+    )
@@ -10,11 +10,14 @@ from modules.database import (
     get_supabase,
     _clear_plan_cache, _clear_schedule_cache,
     load_production_history, load_plan_change_log, save_production_plan,
-    load_schedule, insert_schedule, delete_schedule,
-    insert_plan_change_log,
+    load_schedule, insert_schedule, insert_schedules_batch, delete_schedule,
+    insert_plan_change_log, get_master_models, get_master_group_pns,
 )
+from modules.bulk_import import schedule_key, schedule_key_set
 from modules.auth import check_perm
 from modules.calendar_view import _xp, _rerun
+from modules.kpi import kpi_snapshot, scope_metrics, model_table, load_plan_range
+from modules.live import data_version
 
 # ── 상수 ──────────────────────────────────────────────────────────────
 KST = timezone(timedelta(hours=9))
@@ -77,7 +80,6 @@ def render_kpi_dashboard():
 </style>""", unsafe_allow_html=True)
 
     db_all    = st.session_state.production_db
-    sch_all   = st.session_state.schedule_db
     today_str = datetime.now(KST).strftime('%Y-%m-%d')
 
     # ── 상단 필터 (한 줄, 컴팩트) ─────────────────────────────────
@@ -110,34 +112,17 @@ def render_kpi_dashboard():
         db_f = db_all
 
     # KPI/실적용: production_history 포함 (완료 후 아카이브된 제품까지 반영)
-    db_kpi = load_production_history(date_from, date_to_d)
-    db_kpi_f = db_kpi[db_kpi['반'] == ban_filter] if (not db_kpi.empty and ban_filter != "전체") else db_kpi
-
-    if not sch_all.empty:
-        sch_f = sch_all[(sch_all['날짜'] >= date_from) & (sch_all['날짜'] <= plan_date_to)]
-        if ban_filter != "전체": sch_f = sch_f[sch_f['반'] == ban_filter]
-    else:
-        sch_f = sch_all
-
-    # 계획 수량은 조립계획 기준만 사용
-    # (조립계획 → 포장계획 → 출하계획은 같은 제품이 단계를 거치는 것이므로 중복 합산 금지)
-    sch_f_asm = sch_f[sch_f['카테고리'] == '조립계획'] if not sch_f.empty else sch_f
-
-    def _qty(df, col='조립수'):
-        if df.empty: return 0
-        return int(pd.to_numeric(df[col], errors='coerce').fillna(0).sum())
-
-    total_in   = len(db_kpi_f) if not db_kpi_f.empty else 0
-    total_done = len(db_kpi_f[(db_kpi_f['라인']=='포장 라인') & (db_kpi_f['상태']=='완료')]) if not db_kpi_f.empty else 0
-    total_wip  = len(db_kpi_f[db_kpi_f['상태'].isin(ACTIVE_STATES)]) if not db_kpi_f.empty else 0
-    # 불량 기준: 현재 불량/부적합 상태 OR 수리 이력 있는 제품 (모델별 불량 분석과 동일 기준)
-    total_ng   = len(db_kpi_f[
-        db_kpi_f['상태'].str.contains('불량|부적합', na=False) |
-        (db_kpi_f['수리'].astype(str).str.strip() != '')
-    ]) if not db_kpi_f.empty else 0
-    plan_qty   = _qty(sch_f_asm)
-    achieve_pct = round(total_done / plan_qty * 100, 1) if plan_qty > 0 else 0
-    defect_pct  = round(total_ng / total_in * 100, 1) if total_in > 0 else 0
+    # 계획 수량은 조립계획 기준만 사용 — 집계 기준은 modules.kpi 참고
+    kpis = kpi_snapshot(date_from, date_to_d, data_version(("production", "production_schedule")),
+                        plan_to=plan_date_to)
+    _k = scope_metrics(kpis, ban_filter)
+    total_in    = _k["총투입"]
+    total_done  = _k["최종완료"]
+    total_wip   = _k["진행중"]
+    plan_qty    = _k["계획"]
+    achieve_pct = _k["달성률"]
+    # 불량률 기준: 현재 불량/부적합 상태 OR 수리 이력 있는 제품 (모델별 불량 분석과 동일 기준)
+    defect_pct  = _k["불량률"]
 
     # ══════════════════════════════════════════════════════════════
     # [A] KPI 5개 — 한 줄
@@ -171,18 +156,14 @@ def render_kpi_dashboard():
 
     with left_col:
         st.markdown("<div class='db-section' style='background:#2471a3;'> 반별 달성률</div>", unsafe_allow_html=True)
-        # ban_filter와 무관하게 전체 반 계획 수량 필요 → 날짜만 필터링한 별도 변수 사용
-        _sch_f_all = sch_all[(sch_all['날짜'] >= date_from) & (sch_all['날짜'] <= plan_date_to)] if not sch_all.empty else sch_all
-        _sch_f_asm_all = _sch_f_all[_sch_f_all['카테고리'] == '조립계획'] if not _sch_f_all.empty else _sch_f_all
         bc = st.columns(3)
         for bi, ban in enumerate(PRODUCTION_GROUPS):
-            bdb  = db_kpi[db_kpi['반']==ban] if not db_kpi.empty else pd.DataFrame()
-            bsch = _sch_f_asm_all[_sch_f_asm_all['반']==ban] if not _sch_f_asm_all.empty else pd.DataFrame()
-            b_plan = _qty(bsch)
-            b_done = len(bdb[(bdb['라인']=='포장 라인')&(bdb['상태']=='완료')]) if not bdb.empty else 0
-            b_wip  = len(bdb[bdb['상태'].isin(ACTIVE_STATES)]) if not bdb.empty else 0
-            b_ng   = len(bdb[bdb['상태'].str.contains('불량|부적합',na=False)]) if not bdb.empty else 0
-            b_pct  = round(b_done / b_plan * 100, 1) if b_plan > 0 else 0
+            _b     = kpis["반"][ban]   # ban_filter와 무관하게 전체 반 표시
+            b_plan = _b["계획"]
+            b_done = _b["최종완료"]
+            b_wip  = _b["진행중"]
+            b_ng   = _b["불량"]
+            b_pct  = _b["달성률"]
             clr    = BAN_COLORS_D.get(ban, "#888")
             bar_w  = min(int(b_pct), 100)
             pct_clr = "#d68910"
@@ -283,21 +264,12 @@ def render_kpi_dashboard():
 
     with ng_col:
         st.markdown("<div class='db-section' style='background:#c0392b;'> 모델별 불량 분석</div>", unsafe_allow_html=True)
-        if not db_kpi_f.empty:
-            # 불량 판단 기준:
+        if total_in > 0:
+            # 불량 판단 기준 (modules.kpi 수리포함불량):
             #  ① 현재 상태가 불량/부적합 이거나
             #  ② 수리 컬럼이 채워진 경우 (수리 이력 = 불량이 있었던 제품)
-            _ng_mask = (
-                db_kpi_f['상태'].str.contains('불량|부적합', na=False) |
-                (db_kpi_f['수리'].astype(str).str.strip() != '')
-            )
-            _ng_df_src = db_kpi_f.copy()
-            _ng_df_src['_has_ng'] = _ng_mask
-            ng_df = _ng_df_src.groupby('모델').agg(
-                투입=('시리얼','count'),
-                불량=('_has_ng', 'sum')
-            ).reset_index()
-            ng_df['불량'] = ng_df['불량'].astype(int)
+            ng_df = model_table(kpis, ban_filter).rename(columns={'총투입': '투입'})
+            ng_df = ng_df[['모델', '투입']].assign(불량=ng_df['수리포함불량'].astype(int))
             ng_df['불량률'] = (ng_df['불량'] / ng_df['투입'] * 100).round(1)
             ng_df = ng_df[ng_df['불량'] > 0].sort_values('불량률', ascending=False)
             if not ng_df.empty:
@@ -1104,25 +1076,20 @@ def render_kpi_dashboard():
                         if not has_ban and not upload_ban:
                             st.error("반을 선택해주세요.")
                         else:
-                            existing = st.session_state.schedule_db
-                            success_cnt = skip_cnt = fail_cnt = 0
-                            fail_rows = []
-                            
+                            # 기존 일정 키 해시 집합 1회 생성 → 행당 O(1) 중복 판정 (등록 기간의 월만 조회)
+                            existing_keys = schedule_key_set(load_plan_range(date_from, date_to)) if "건너뜀" in dup_mode else set()
+                            skip_cnt = 0
+
                             #  진행률 표시 추가
                             progress_bar = st.progress(0)
                             status_text = st.empty()
-                            total = len(filtered)
-                            
+
                             from datetime import date as _date_cls
                             _today_str = _date_cls.today().strftime('%Y-%m-%d')
                             past_cnt = 0
 
-                            for idx, row in enumerate(filtered, 1):
-                                # 진행률 업데이트
-                                progress = idx / total
-                                progress_bar.progress(progress)
-                                status_text.text(f" 등록 중... {idx}/{total} ({int(progress*100)}%)")
-
+                            to_insert = []
+                            for row in filtered:
                                 # 과거 날짜 스킵
                                 row_date = str(row.get('날짜', ''))[:10]
                                 if row_date < _today_str:
@@ -1137,22 +1104,19 @@ def render_kpi_dashboard():
                                     skip_cnt += 1
                                     continue
                                 # 중복 체크
-                                if "건너뜀" in dup_mode and not existing.empty:
-                                    dup = existing[
-                                        (existing['날짜']   == row['날짜']) &
-                                        (existing['모델명'] == row['모델명']) &
-                                        (existing['카테고리'] == row['카테고리']) &
-                                        (existing['반']     == row['반'])
-                                    ]
-                                    if not dup.empty:
-                                        skip_cnt += 1
-                                        continue
-                                if insert_schedule(row):
-                                    success_cnt += 1
-                                else:
-                                    fail_cnt += 1
-                                    fail_rows.append(f"{row.get('날짜','')} / {row.get('모델명','')}")
-                            
+                                if schedule_key(row) in existing_keys:
+                                    skip_cnt += 1
+                                    continue
+                                to_insert.append(row)
+
+                            def _on_progress(done, total):
+                                progress_bar.progress(done / total)
+                                status_text.text(f" 등록 중... {done}/{total} ({int(done / total * 100)}%)")
+
+                            success_cnt, _failed, _master_ok = insert_schedules_batch(to_insert, on_progress=_on_progress)
+                            fail_cnt = len(_failed)
+                            fail_rows = [f"{r.get('날짜','')} / {r.get('모델명','')}" for r, _ in _failed]
+
                             # 완료 표시
                             progress_bar.progress(1.0)
                             status_text.text(f" 등록 완료!")
@@ -1168,6 +1132,8 @@ def render_kpi_dashboard():
                                 st.toast(_msg)
                             if fail_rows:
                                 st.toast("등록 실패 행:\n" + "\n".join(fail_rows))
+                            if not _master_ok:
+                                st.toast("모델 마스터 자동 등록 실패 — 마스터 관리에서 모델·품목코드를 확인해주세요.")
                             st.rerun()
                 else:
                     st.warning("파싱된 일정이 없습니다. 파일 형식을 확인해주세요.")
@@ -1178,11 +1144,8 @@ def render_kpi_dashboard():
     with sch_tab1:
         # 반 선택을 폼 밖에 두어 모델/품목 목록이 즉시 반영되도록
         sch_ban = st.selectbox("반 *", PRODUCTION_GROUPS, key="sch_form_ban")
-        _sch_models  = st.session_state.group_master_models.get(sch_ban, [])
-        _sch_all_pns = list(dict.fromkeys(
-            _pn for _m in _sch_models
-            for _pn in st.session_state.group_master_items.get(sch_ban, {}).get(_m, [])
-        ))
+        _sch_models  = get_master_models(sch_ban)
+        _sch_all_pns = get_master_group_pns(sch_ban)
 
         with st.form("schedule_form"):
             sc1, sc2 = st.columns(2)
@@ -1230,6 +1193,9 @@ def render_kpi_dashboard():
                     st.warning("모델명 또는 특이사항을 입력해주세요.")
 
     with sch_tab3:
+        # 등록 일정 전체 목록·전체 삭제 — 관리 화면이라 전체 이력이 필요 (이 화면에서만 로드)
+        if "schedule_db" not in st.session_state:
+            st.session_state.schedule_db = load_schedule()
         sch_list = st.session_state.schedule_db
         if not sch_list.empty:
             # ── 전체 삭제 버튼 ──
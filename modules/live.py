@@ -0,0 +1,227 @@
+"""
+실시간 섹션 부분 갱신 (Streamlit fragment)
+==========================================
+- 현황판 차트·입고 대기 목록·OQC KPI 등 라이브 섹션만 주기적으로 다시 그림
+  (전체 스크립트 rerun 없음 → CSS/JS 주입·관리자 iframe·입력 위젯 유지)
+- fragment 틱마다 Realtime 변경을 세션에 반영 (sync_realtime)
+- 섹션 데이터 버전(data_version)이 같으면 무거운 계산 결과를 렌더 캐시(modules.render_cache)에서 재사용
+  → 변경 없는 스테이션은 틱당 버전 비교만 수행
+- 적응형 갱신 제어 (refresh_controller): 페이지별 정책(constants.REFRESH_POLICIES)에 따라
+  탭 숨김·무입력 시 감속(감시 틱 포함), 스캔 중 가속, 주기가 돌아와도 감시 테이블 버전이 그대로면 rerun 생략
+
+사용 예:
+    @live_fragment()
+    def _render_live():
+        sync_realtime()
+        figs = render_cached("dash_figs", (), data_version(("production",)), _build_figs)
+        ...
+    _render_live()
+"""
+
+import json
+import time
+import uuid
+
+import streamlit as st
+
+from modules.realtime import (
+    new_cursor, pop_changed_tables, get_table_versions, has_changes, is_running,
+)
+from modules.database import clear_cache_for_tables, load_realtime_ledger, load_schedule
+from modules.constants import REFRESH_POLICY_DEFAULT, REFRESH_POLICIES
+
+LIVE_REFRESH_SEC = 15   # fragment 기본 갱신 주기 (Realtime 미연결 시 폴링 주기 겸용)
+SCAN_WINDOW_SEC  = 60   # 스캔(입력란 Enter) 후 가속 유지 시간
+ACTIVITY_PARAM   = "pms_act"   # 클라이언트 상태를 전달하는 URL 쿼리 파라미터
+WAKE_CHECK_SEC   = 60   # 감속(idle·hidden) 중 감시 틱 상한 — 탭 복귀·입력 재개 감지 지연 상한
+
+
+def live_fragment(run_every: float = None):
+    """st.fragment(run_every=...) 데코레이터.
+    run_every 미지정 시 갱신 제어기가 정한 현재 주기 사용.
+    Streamlit 1.33~1.36 은 experimental_fragment, 그 이전 버전은 일반 함수로 동작
+    (전체 rerun 시에만 갱신)."""
+    _frag = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+    if _frag is None:
+        return lambda fn: fn
+    if run_every is None:
+        run_every = st.session_state.get("_rc_interval") or LIVE_REFRESH_SEC
+    return _frag(run_every=run_every)
+
+
+def has_fragments() -> bool:
+    return bool(getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None))
+
+
+def sync_realtime() -> set:
+    """Realtime 변경 반영 — 캐시 무효화(프로세스 1회) + 이 세션의 production/schedule 갱신.
+    전체 rerun 과 fragment rerun 이 공용으로 호출. 반환: 이번에 반영한 변경 테이블."""
+    if "_rt_cursor" not in st.session_state:
+        st.session_state._rt_cursor = new_cursor()
+    changed = pop_changed_tables(st.session_state._rt_cursor, clear_cache_for_tables)
+    if changed and st.session_state.get("login_status"):
+        if "production" in changed:
+            st.session_state.production_db = load_realtime_ledger()
+            st.session_state["_live_local_rev"] = 0   # DB 재조회에 로컬 변경 포함
+        if "production_schedule" in changed and "schedule_db" in st.session_state:
+            st.session_state.schedule_db = load_schedule()   # 전체 이력 사본을 쓰는 관리 화면을 연 세션만
+    return changed
+
+
+def bump_local_rev() -> None:
+    """세션 내 인메모리 변경(옵티미스틱 업데이트) 표시 — data_version 에 반영됨.
+    Realtime 이벤트가 와서 재조회하기 전까지 이 세션의 버전은 다른 세션과 공유되지 않는다."""
+    if "_live_sid" not in st.session_state:
+        st.session_state["_live_sid"] = uuid.uuid4().hex
+    st.session_state["_live_local_rev"] = st.session_state.get("_live_local_rev", 0) + 1
+    st.session_state["_live_local_db"] = id(st.session_state.get("production_db"))
+
+
+def data_version(tables=("production",)) -> tuple:
+    """섹션 데이터 버전 (렌더 캐시 키로 사용).
+    (테이블별 버전, 로컬 변경, 폴링 버킷)
+    - 테이블 버전은 이 세션이 실제로 반영한 커서(_rt_cursor) 기준 — sync_realtime() 이후 도착한
+      변경은 다음 재조회 때 버전에 들어가므로, 세션 데이터보다 새 버전으로 캐시되지 않음
+    - 로컬 변경이 없으면 같은 커서의 세션끼리 키 공유, 있으면 (세션, 리비전) 으로 분리
+      (DataFrame 이 재조회로 교체되면 로컬 변경은 무효)
+    Realtime 미연결(폴링 모드)이면 갱신 주기마다 버전이 바뀌어 캐시가 만료된다."""
+    cursor = st.session_state.get("_rt_cursor")
+    if cursor is None:
+        cursor = get_table_versions()
+    local = (None, 0)
+    rev = st.session_state.get("_live_local_rev", 0)
+    if rev and st.session_state.get("_live_local_db") == id(st.session_state.get("production_db")):
+        local = (st.session_state.get("_live_sid"), rev)
+    poll = 0 if is_running() else int(time.time() // LIVE_REFRESH_SEC)
+    return tuple(cursor.get(t, 0) for t in tables) + local + (poll,)
+
+
+# =================================================================
+# 적응형 갱신 제어
+# =================================================================
+
+def refresh_policy(page: str):
+    """페이지 갱신 정책 (기본값 + 페이지 설정 병합). 자동 갱신 제외 페이지는 None."""
+    if page in REFRESH_POLICIES and REFRESH_POLICIES[page] is None:
+        return None
+    return {**REFRESH_POLICY_DEFAULT, **(REFRESH_POLICIES.get(page) or {})}
+
+
+def client_activity() -> str:
+    """브라우저가 보고한 클라이언트 상태: active / scan / idle / hidden."""
+    try:
+        mode = st.query_params.get(ACTIVITY_PARAM, "active")
+    except Exception:
+        mode = "active"
+    return mode if mode in ("active", "scan", "idle", "hidden") else "active"
+
+
+# 부모 문서 realm 에 1회 설치 (iframe 은 rerun 마다 재생성되므로 리스너를 iframe 에 두지 않음)
+_ACTIVITY_PROBE_JS = """
+(function(){
+  var w = window, d = document;
+  if (w.__pmsAct) return;
+  var a = w.__pmsAct = {lastInput: Date.now(), lastScan: 0};
+  function cfg(){ try { return JSON.parse(w.__pmsActCfg || '{}'); } catch(e) { return {}; } }
+  function mode(){
+    var c = cfg(), now = Date.now();
+    if (d.hidden) return 'hidden';
+    if (now - a.lastScan < (c.scanWindow || 60) * 1000) return 'scan';
+    if (now - a.lastInput > (c.idleAfter || 300) * 1000) return 'idle';
+    return 'active';
+  }
+  function upd(){
+    var u = new URL(w.location.href), m = mode(), p = cfg().param || 'pms_act';
+    if (u.searchParams.get(p) === m) return;
+    u.searchParams.set(p, m);
+    w.history.replaceState(w.history.state, '', u.toString());
+  }
+  function touch(){ a.lastInput = Date.now(); upd(); }
+  d.addEventListener('pointerdown', touch, true);
+  d.addEventListener('keydown', function(e){
+    a.lastInput = Date.now();
+    if (e.key === 'Enter' && e.target && e.target.tagName === 'INPUT') a.lastScan = Date.now();
+    upd();
+  }, true);
+  d.addEventListener('visibilitychange', upd);
+  w.setInterval(upd, 5000);
+  upd();
+})();
+"""
+
+
+def _inject_activity_probe(policy: dict) -> None:
+    """클라이언트 상태(탭 숨김·무입력·스캔) 감지 스크립트 주입 — 상태는 URL 쿼리로 서버에 전달."""
+    import streamlit.components.v1 as components
+    _cfg = json.dumps({"idleAfter": policy["idle_after"], "scanWindow": SCAN_WINDOW_SEC,
+                       "param": ACTIVITY_PARAM})
+    components.html(
+        "<script>(function(){"
+        "var w=window.parent, d=w.document;"
+        f"w.__pmsActCfg={json.dumps(_cfg)};"
+        "if(d.getElementById('pms_act_probe'))return;"
+        "var s=d.createElement('script');s.id='pms_act_probe';"
+        f"s.textContent={json.dumps(_ACTIVITY_PROBE_JS)};"
+        "d.head.appendChild(s);"
+        "})();</script>",
+        height=0,
+    )
+
+
+def _watch_interval(policy: dict, mode: str) -> float:
+    """감시 fragment 주기 — 감속 상태에서는 늘리되 복귀 감지를 위해 WAKE_CHECK_SEC 이하로 유지."""
+    if mode in ("idle", "hidden"):
+        return min(policy[mode], WAKE_CHECK_SEC)
+    return min(policy["scan"], policy["active"])
+
+
+def refresh_controller(page: str) -> None:
+    """페이지별 적응형 자동 갱신 (스크립트 상단에서 매 전체 rerun 마다 1회 호출).
+
+    - 감시 fragment 주기도 클라이언트 상태를 따름: active·scan 은 min(scan, active),
+      idle·hidden 은 min(해당 주기, WAKE_CHECK_SEC) 로 늘려 숨은 탭·무입력 탭의 서버 rerun 을 줄임
+      (감시 주기 구간이 바뀌면 1회 전체 rerun 으로 재설정, 복귀는 다음 감시 틱 또는 위젯 조작 시 반영)
+    - 주기가 돌아오면 클라이언트 상태에 맞는 갱신 주기가 지났을 때만 판단
+    - full_rerun 페이지: 감시 테이블 버전이 바뀐 경우에만 전체 rerun (폴링 모드는 주기마다)
+    - 라이브 fragment 페이지: fragment 가 현재 상태 주기로 갱신, 상태가 바뀌면 주기 재설정을 위해 1회 rerun
+    """
+    policy = refresh_policy(page)
+    if policy is None:
+        st.session_state["_rc_interval"] = None
+        return
+
+    mode = client_activity()
+    interval = policy[mode]
+    st.session_state["_rc_mode"] = mode
+    st.session_state["_rc_interval"] = interval
+    st.session_state["_rc_last"] = time.time()   # 전체 rerun = 갱신 완료 시점
+    _inject_activity_probe(policy)
+
+    if not has_fragments():
+        from streamlit_autorefresh import st_autorefresh
+        st_autorefresh(interval=int(interval * 1000), key="pms_auto_refresh")
+        return
+
+    tables = set(policy["tables"])
+
+    @live_fragment(run_every=_watch_interval(policy, mode))
+    def _watch():
+        now_mode = client_activity()
+        prev_mode = st.session_state.get("_rc_mode")
+        if now_mode != prev_mode:
+            st.session_state["_rc_mode"] = now_mode
+            st.session_state["_rc_interval"] = policy[now_mode]
+            if (not policy["full_rerun"]
+                    or _watch_interval(policy, now_mode) != _watch_interval(policy, prev_mode)):
+                st.rerun()   # 라이브 fragment·감시 주기 재설정
+        now = time.time()
+        if now - st.session_state["_rc_last"] < policy[now_mode]:
+            return
+        st.session_state["_rc_last"] = now
+        if not policy["full_rerun"]:
+            return
+        cursor = st.session_state.get("_rt_cursor") or {}
+        if not is_running() or has_changes(cursor, tables):
+            st.rerun()
+
+    _watch()
@@ -171,8 +171,10 @@ def render_worker_manual():
         <b>③ 조립 완료 처리</b>
         <ul style='margin:4px 0 10px;padding-left:1.4em;'>
           <li>이력 목록에서 완료된 항목 체크박스 선택</li>
-          <li><b>조립 완료</b> 버튼 클릭 → 상태가 <b>검사대기</b>로 자동 전환</li>
-          <li>불량 발생 시 <b>불량 처리</b> 버튼 클릭 → 불량 공정으로 이동</li>
+          <li><b>일괄 완료</b> 버튼 클릭 → 상태가 <b>검사대기</b>로 자동 전환</li>
+          <li>불량 발생 시 불량 원인 선택 후 <b>일괄 불량</b> 버튼 클릭 → 불량 공정으로 이동</li>
+          <li>1대만 처리할 때는 목록 아래 <b>개별 처리</b>에서 시리얼 선택 후 <b>완료</b> / <b>불량</b>(원인 입력 후 확정)</li>
+          <li>목록은 50건씩 페이지로 나뉘며, 시리얼 스캔 시 해당 페이지로 이동해 자동 체크됩니다.</li>
         </ul>
         <b>④ 자재 시리얼 등록</b>
         <ul style='margin:4px 0 0;padding-left:1.4em;'>
@@ -194,6 +196,7 @@ def render_worker_manual():
           <li>수리 완료 후 재투입된 제품도 검사대기 목록에 포함됩니다.</li>
           <li>시리얼 번호 스캔/검색으로 빠른 조회</li>
           <li>체크박스 선택 후 <b>일괄 입고</b> 버튼 → <b>검사중</b>으로 전환</li>
+          <li>1대만 입고할 때는 목록 아래에서 시리얼 선택 후 <b>입고</b> 버튼</li>
         </ul>
         <b>② 검사 판정</b>
         <ul style='margin:4px 0 0;padding-left:1.4em;'>
@@ -223,6 +226,7 @@ def render_worker_manual():
         <ul style='margin:4px 0 10px;padding-left:1.4em;'>
           <li>OQC 합격(출하승인) 제품이 목록에 표시됩니다.</li>
           <li>체크박스 선택 후 <b>일괄 입고</b> 버튼 → <b>포장중</b>으로 전환</li>
+          <li>1대만 입고할 때는 목록 아래에서 시리얼 선택 후 <b>입고</b> 버튼</li>
         </ul>
         <b>② 포장 완료 처리</b>
         <ul style='margin:4px 0 0;padding-left:1.4em;'>
@@ -0,0 +1,319 @@
+"""
+Prometheus 메트릭 내보내기 (사이드카 HTTP 서버)
+===============================================
+앱 프로세스 안에서 표준 라이브러리 HTTP 서버 스레드로 /metrics 를 제공 (프로세스당 1회 시작).
+
+  공장 KPI (WIP 스냅샷 — 스크레이프 주기당 DB 조회 1회, 결과 텍스트 캐시)
+    pms_wip{ban,state}                    진행 중 제품 수
+    pms_wip_stuck{ban,state}              STUCK_HOURS 이상 상태 변경 없는 제품 수
+    pms_wip_oldest_age_seconds{ban,state} 가장 오래 머문 제품의 경과 시간
+  처리량 (카운터 — rate() 로 분당 처리량)
+    pms_state_transitions_total{state}    이 프로세스가 기록한 상태 전환 (스캔·판정)
+    pms_realtime_events_total{table}      Realtime 변경 이벤트 (전 스테이션 쓰기 포함)
+    pms_notify_messages_total{result}     텔레그램 outbox 처리 (sent / retry / coalesced / dropped)
+  앱 상태
+    pms_realtime_lag_seconds              commit → 콜백 수신 지연 히스토그램
+    pms_realtime_connected / _reconnects_total / _gap_recoveries_total
+    pms_loader_seconds{loader}            DB 로더 소요 시간 히스토그램 (캐시 미스만)
+    pms_render_cache_{hits,misses}_total / pms_render_cache_entries
+    pms_notify_pending                    텔레그램 outbox 대기 메시지 수
+    pms_metrics_snapshot_seconds / pms_metrics_snapshot_errors_total
+
+설정 (없으면 서버를 띄우지 않음):
+    st.secrets["metrics_port"] 또는 환경변수 PMS_METRICS_PORT  (예: 9464)
+    PMS_METRICS_HOST  바인드 주소 (기본 127.0.0.1 — 같은 호스트의 Prometheus/에이전트용)
+
+사용 예:
+    start_metrics_server()                     # 메인 스크립트 — 이미 실행 중이면 무시
+
+    @st.cache_data(ttl=120)
+    @timed_loader("realtime_ledger")           # 캐시 미스(실제 DB 조회)만 측정
+    def load_realtime_ledger(): ...
+"""
+
+import functools
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+log = logging.getLogger(__name__)
+
+SCRAPE_INTERVAL_SEC = 15     # 스냅샷·응답 텍스트 재사용 주기 (Prometheus scrape_interval 과 맞춤)
+STUCK_HOURS         = 8      # monitor/monitor.py 기본값과 동일
+_KST                = timezone(timedelta(hours=9))
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LAG_BUCKETS     = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0)
+
+
+# =================================================================
+# 메트릭 타입 (스레드 안전, 레이블 값 조합별 보관)
+# =================================================================
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _num(v) -> str:
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class Counter:
+    def __init__(self, name: str, help_: str, labelnames=()):
+        self.name, self.help, self.labelnames = name, help_, tuple(labelnames)
+        self._values: dict = {}
+        self._lock = threading.Lock()
+        _REGISTRY.append(self)
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list:
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_labels(self.labelnames, k)} {_num(v)}" for k, v in items]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_: str, buckets, labelnames=()):
+        self.name, self.help, self.labelnames = name, help_, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._data: dict = {}      # 레이블 → [버킷별 개수..., 합계, 개수]
+        self._lock = threading.Lock()
+        _REGISTRY.append(self)
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            d = self._data.get(key)
+            if d is None:
+                d = self._data[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, b in enumerate(self.buckets):
+                if value <= b:
+                    d[i] += 1
+            d[-2] += value
+            d[-1] += 1
+
+    def render(self) -> list:
+        with self._lock:
+            items = sorted((k, list(d)) for k, d in self._data.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, d in items:
+            for b, n in zip(self.buckets, d):
+                le = _labels(self.labelnames, key, f'le="{b}"')
+                lines.append(f"{self.name}_bucket{le} {n}")
+            le = _labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {d[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_num(round(d[-2], 6))}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {d[-1]}")
+        return lines
+
+
+_REGISTRY: list = []
+
+STATE_TRANSITIONS = Counter(
+    "pms_state_transitions_total", "이 프로세스가 기록한 제품 상태 전환 수", ("state",))
+REALTIME_EVENTS = Counter(
+    "pms_realtime_events_total", "Realtime 테이블 변경 이벤트 수", ("table",))
+SNAPSHOT_ERRORS = Counter(
+    "pms_metrics_snapshot_errors_total", "WIP 스냅샷 조회 실패 수")
+REALTIME_LAG = Histogram(
+    "pms_realtime_lag_seconds", "Realtime commit → 콜백 수신 지연", LAG_BUCKETS)
+NOTIFY_MESSAGES = Counter(
+    "pms_notify_messages_total", "텔레그램 outbox 메시지 처리 결과", ("result",))
+LOADER_SECONDS = Histogram(
+    "pms_loader_seconds", "DB 로더 소요 시간 (캐시 미스)", LATENCY_BUCKETS, ("loader",))
+
+
+def timed_loader(name: str):
+    """로더 소요 시간을 pms_loader_seconds{loader=name} 에 기록하는 데코레이터.
+    st.cache_data 아래(안쪽)에 두면 캐시 미스 — 실제 DB 조회 — 만 측정."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                LOADER_SECONDS.observe(time.perf_counter() - t0, loader=name)
+        return wrapper
+    return deco
+
+
+def count_transition(state) -> None:
+    """production insert/update 성공 시 새 상태값 기록 (상태 없는 수정은 무시)."""
+    if state:
+        STATE_TRANSITIONS.inc(state=state)
+
+
+# =================================================================
+# 스냅샷 (WIP 게이지 + 앱 상태) — 스크레이프 주기당 1회 계산
+# =================================================================
+
+def _gauge(name: str, help_: str, samples, labelnames=()) -> list:
+    lines = [f"# HELP {name} {help_}", f"# TYPE {name} gauge"]
+    lines += [f"{name}{_labels(labelnames, k)} {_num(v)}" for k, v in samples]
+    return lines
+
+
+def _wip_lines() -> list:
+    """진행 중 제품을 반·상태별로 집계 (활성 상태 행만 페이징 조회)."""
+    from modules.constants import ACTIVE_STATES
+    from modules.database import _select_paged, get_supabase
+
+    sb = get_supabase()
+    rows = _select_paged(lambda: (
+        sb.table("production").select("반,상태,시간")
+          .is_("deleted_at", "null").in_("상태", list(ACTIVE_STATES)).order("id")
+    ))
+    now = datetime.now(_KST).replace(tzinfo=None)
+    cutoff = (now - timedelta(hours=STUCK_HOURS)).strftime("%Y-%m-%d %H:%M:%S")
+    wip, stuck, oldest = {}, {}, {}
+    for r in rows:
+        key = (r.get("반") or "", r.get("상태") or "")
+        wip[key] = wip.get(key, 0) + 1
+        ts = str(r.get("시간") or "")[:19].replace("T", " ")
+        if not ts:
+            continue
+        if ts <= cutoff:
+            stuck[key] = stuck.get(key, 0) + 1
+        if ts < oldest.get(key, "9999"):
+            oldest[key] = ts
+    ages = []
+    for key, ts in sorted(oldest.items()):
+        try:
+            ages.append((key, round((now - datetime.strptime(ts, "%Y-%m-%d %H:%M:%S")).total_seconds())))
+        except ValueError:
+            continue
+    names = ("ban", "state")
+    return (
+        _gauge("pms_wip", "진행 중 제품 수", sorted(wip.items()), names)
+        + _gauge("pms_wip_stuck", f"{STUCK_HOURS}시간 이상 상태 변경 없는 제품 수",
+                 sorted((k, stuck.get(k, 0)) for k in wip), names)
+        + _gauge("pms_wip_oldest_age_seconds", "가장 오래 머문 제품의 경과 시간", ages, names)
+    )
+
+
+def _health_lines() -> list:
+    from modules.realtime import get_health
+    from modules.render_cache import render_cache_stats
+    from modules.notify import outbox_stats
+
+    h = get_health()
+    rc = render_cache_stats()
+    lines = _gauge("pms_realtime_connected", "Realtime 연결 여부", [((), int(bool(h.get("connected"))))])
+    for name, key, help_ in (
+        ("pms_realtime_reconnects_total", "reconnects", "Realtime 재연결 횟수"),
+        ("pms_realtime_gap_recoveries_total", "gap_recoveries", "재연결 후 끊김 구간 따라잡기 횟수"),
+        ("pms_render_cache_hits_total", None, "렌더 캐시 적중 수"),
+        ("pms_render_cache_misses_total", None, "렌더 캐시 미스 수"),
+    ):
+        value = h.get(key, 0) if key else rc["hit" if "hits" in name else "miss"]
+        lines += [f"# HELP {name} {help_}", f"# TYPE {name} counter", f"{name} {value or 0}"]
+    if h.get("last_applied_at"):
+        lines += _gauge("pms_realtime_staleness_seconds", "Realtime 반영 보장 시각 이후 경과",
+                        [((), round(time.time() - h["last_applied_at"], 3))])
+    lines += _gauge("pms_render_cache_entries", "렌더 캐시 항목 수", [((), rc["size"])])
+    lines += _gauge("pms_notify_pending", "텔레그램 outbox 대기 메시지 수",
+                    [((), outbox_stats()["pending"])])
+    return lines
+
+
+_snapshot = {"at": 0.0, "body": b""}
+_snapshot_lock = threading.Lock()
+
+
+def render_metrics() -> bytes:
+    """Prometheus 텍스트 형식 응답. SCRAPE_INTERVAL_SEC 안의 반복 요청은 같은 결과 재사용
+    (동시 요청은 락에서 합쳐져 DB 조회 1회)."""
+    with _snapshot_lock:
+        if time.time() - _snapshot["at"] < SCRAPE_INTERVAL_SEC and _snapshot["body"]:
+            return _snapshot["body"]
+        t0 = time.perf_counter()
+        lines = []
+        try:
+            lines += _wip_lines()
+        except Exception as exc:
+            SNAPSHOT_ERRORS.inc()
+            log.warning("메트릭 WIP 스냅샷 실패: %s", exc)
+        try:
+            lines += _health_lines()
+        except Exception as exc:
+            log.warning("메트릭 앱 상태 수집 실패: %s", exc)
+        for metric in _REGISTRY:
+            lines += metric.render()
+        lines += _gauge("pms_metrics_snapshot_seconds", "스냅샷 계산 소요 시간",
+                        [((), round(time.perf_counter() - t0, 4))])
+        _snapshot["body"] = ("\n".join(lines) + "\n").encode("utf-8")
+        _snapshot["at"] = time.time()
+        return _snapshot["body"]
+
+
+# =================================================================
+# HTTP 서버 (프로세스당 1회)
+# =================================================================
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_metrics()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):   # 스크레이프마다 stderr 로그 남기지 않음
+        log.debug("metrics %s", fmt % args)
+
+
+_server: ThreadingHTTPServer | None = None
+_server_lock = threading.Lock()
+
+
+def _configured_port():
+    port = None
+    try:
+        import streamlit as st
+        port = st.secrets.get("metrics_port")
+    except Exception:
+        pass
+    port = port or os.getenv("PMS_METRICS_PORT")
+    return int(port) if port else None
+
+
+def start_metrics_server() -> bool:
+    """설정된 포트로 /metrics 서버 스레드 시작. 포트 미설정·바인드 실패 시 False (이미 실행 중이면 True)."""
+    global _server
+    with _server_lock:
+        if _server is not None:
+            return True
+        port = _configured_port()
+        if not port:
+            return False
+        host = os.getenv("PMS_METRICS_HOST", "127.0.0.1")
+        try:
+            _server = ThreadingHTTPServer((host, port), _Handler)
+        except OSError as exc:
+            log.warning("메트릭 서버 시작 실패 (%s:%s): %s", host, port, exc)
+            return False
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, daemon=True, name="metrics-http").start()
+        log.info("메트릭 서버 시작: http://%s:%s/metrics", host, port)
+        return True
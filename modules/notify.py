@@ -0,0 +1,223 @@
+"""
+텔레그램 알림 outbox (백그라운드 전송)
+======================================
+- enqueue_telegram(): 메시지를 대기열에 넣고 즉시 반환 — 버튼 클릭 처리 중 HTTP 대기 없음
+- 프로세스당 전송 스레드 1개가 대기열을 비움 (첫 enqueue 때 시작, rerun 간 유지)
+  · 묶음: 첫 메시지 후 BATCH_WINDOW_SEC 동안 모인 메시지를 4096자 한도 안에서 1건으로 합쳐 전송
+  · 합치기: 같은 key 는 최신 내용 1건 + 반복 횟수 (같은 작업자의 같은 요청 반복, 같은 문구 반복)
+  · 4096자 초과 메시지는 HTML 태그·엔티티 경계에서 자르고 열린 태그를 닫음 (parse_mode=HTML 오류 방지)
+  · 속도 제한: MIN_INTERVAL_SEC 간격, 최근 60초 PER_MINUTE 건 이하 (Telegram 그룹 채팅 한도 20건/분)
+  · 재시도: 429 는 응답의 retry_after 만큼 기다린 뒤, 네트워크 오류·5xx 는 지수 백오프로 MAX_ATTEMPTS 회
+  · 전송 중 쌓인 메시지는 다음 묶음으로 합쳐지므로 알림이 몰려도 호출 수는 속도 한도 안에서 유지
+- 프로세스 종료 시 대기열에 남은 메시지는 전송되지 않음
+- 처리 결과는 pms_notify_messages_total{result}, 대기열 길이는 outbox_stats() 로 조회
+
+사용 예:
+    from modules.notify import enqueue_telegram
+
+    status = enqueue_telegram("🆘 <b>관리자 도움 요청</b> ...", key=f"help:{user_id}:{message}")
+    # 'ok' — 대기열 등록 (전송은 백그라운드), 그 외 — 등록 실패 사유
+"""
+
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+
+import requests
+
+from modules.metrics import NOTIFY_MESSAGES
+from modules.utils import _get_tg_creds
+
+log = logging.getLogger(__name__)
+
+MAX_PENDING      = 200    # 대기 중인 key 수 상한 (넘으면 등록 거부)
+BATCH_WINDOW_SEC = 2.0    # 첫 메시지 후 함께 묶을 대기 시간
+MAX_TEXT         = 4096   # Telegram sendMessage 본문 최대 길이
+MIN_INTERVAL_SEC = 1.0    # 연속 전송 최소 간격
+PER_MINUTE       = 20     # 최근 60초 전송 상한
+MAX_ATTEMPTS     = 5      # 메시지 1건당 전송 시도 횟수
+BACKOFF_MAX_SEC  = 60     # 재시도 대기 상한
+SEPARATOR        = "\n\n"
+_TAG_RE          = re.compile(r"<(/?)([A-Za-z][\w-]*)[^>]*>")
+
+_pending: "OrderedDict[str, list]" = OrderedDict()   # key → [메시지, 반복 횟수]
+_cond = threading.Condition()
+_thread: threading.Thread | None = None
+_sent_at: deque = deque()          # 최근 60초 전송 시각 (전송 스레드 전용)
+_HTTP = requests.Session()         # 연결 재사용
+_stats = {"sent": 0, "coalesced": 0, "retries": 0, "dropped": 0, "last_error": ""}
+
+
+def enqueue_telegram(message: str, key: str | None = None) -> str:
+    """메시지를 outbox 에 등록하고 즉시 반환. 성공 시 'ok', 실패 시 사유 문자열 (_send_telegram 과 같은 규약).
+    key: 같은 key 로 아직 전송 전인 메시지가 있으면 최신 내용으로 교체하고 반복 횟수만 늘림
+         (생략 시 메시지 본문 기준 — 같은 문구 반복은 1건으로 합쳐짐)."""
+    token, chat = _get_tg_creds()
+    if not token or not chat:
+        return "TELEGRAM 시크릿 미설정"
+    key = key or "text:" + hashlib.sha1(message.encode("utf-8")).hexdigest()
+    with _cond:
+        item = _pending.get(key)
+        if item is not None:
+            item[0] = message
+            item[1] += 1
+            _stats["coalesced"] += 1
+            NOTIFY_MESSAGES.inc(result="coalesced")
+        elif len(_pending) >= MAX_PENDING:
+            _stats["dropped"] += 1
+            NOTIFY_MESSAGES.inc(result="dropped")
+            return "알림 대기열 가득 참"
+        else:
+            _pending[key] = [message, 1]
+        _cond.notify()
+    _ensure_worker()
+    return "ok"
+
+
+def outbox_stats() -> dict:
+    """{'pending', 'sent', 'coalesced', 'retries', 'dropped', 'last_error', 'running'} — 관리 화면·메트릭용."""
+    with _cond:
+        return {**_stats, "pending": len(_pending),
+                "running": _thread is not None and _thread.is_alive()}
+
+
+# =================================================================
+# 전송 스레드
+# =================================================================
+
+def _ensure_worker() -> None:
+    global _thread
+    with _cond:
+        if _thread is not None and _thread.is_alive():
+            return
+        _thread = threading.Thread(target=_worker, daemon=True, name="tg-outbox")
+        _thread.start()
+
+
+def _worker() -> None:
+    while True:
+        with _cond:
+            while not _pending:
+                _cond.wait()
+        time.sleep(BATCH_WINDOW_SEC)       # 묶음 창 — 그동안 들어온 메시지까지 함께
+        with _cond:
+            items = list(_pending.values())
+            _pending.clear()
+        for text in _pack(items):
+            try:
+                _deliver(text)
+            except Exception as exc:       # 전송 스레드는 어떤 경우에도 유지
+                log.exception("텔레그램 outbox 전송 오류: %s", exc)
+
+
+def _pack(items: list) -> list:
+    """[메시지, 반복 횟수] 목록 → MAX_TEXT 이하 본문 목록 (순서 유지, 가능한 한 적은 건수)."""
+    texts, cur = [], ""
+    for message, count in items:
+        suffix = "" if count == 1 else f"\n<i>(같은 알림 {count}회)</i>"
+        text = _truncate_html(message, MAX_TEXT - len(suffix)) + suffix
+        if cur and len(cur) + len(SEPARATOR) + len(text) > MAX_TEXT:
+            texts.append(cur)
+            cur = ""
+        cur = f"{cur}{SEPARATOR}{text}" if cur else text
+    if cur:
+        texts.append(cur)
+    return texts
+
+
+def _truncate_html(text: str, limit: int) -> str:
+    """limit 자 이하로 자르기 — 태그·엔티티 중간에서 자르지 않고 열린 태그를 닫아 HTML 유효성 유지."""
+    if len(text) <= limit:
+        return text
+    end = limit - 1
+    while end > 0:
+        cut = text[:end]
+        if cut.rfind("<") > cut.rfind(">"):       # 태그 중간
+            cut = cut[:cut.rfind("<")]
+        if cut.rfind("&") > cut.rfind(";"):       # 엔티티 중간 (&amp; 등)
+            cut = cut[:cut.rfind("&")]
+        opened = []
+        for closing, tag in _TAG_RE.findall(cut):
+            tag = tag.lower()
+            if not closing:
+                opened.append(tag)
+            elif tag in opened:
+                del opened[len(opened) - 1 - opened[::-1].index(tag)]
+        out = cut + "…" + "".join(f"</{t}>" for t in reversed(opened))
+        if len(out) <= limit:
+            return out
+        end -= len(out) - limit
+    return ""
+
+
+def _wait_for_slot() -> None:
+    """MIN_INTERVAL_SEC 간격과 분당 PER_MINUTE 한도를 지킬 때까지 대기."""
+    while True:
+        now = time.monotonic()
+        while _sent_at and now - _sent_at[0] >= 60:
+            _sent_at.popleft()
+        wait = _sent_at[-1] + MIN_INTERVAL_SEC - now if _sent_at else 0.0
+        if len(_sent_at) >= PER_MINUTE:
+            wait = max(wait, _sent_at[0] + 60 - now)
+        if wait <= 0:
+            return
+        time.sleep(wait)
+
+
+def _retry_after(res) -> float:
+    """429 응답의 대기 시간(초) — 본문 parameters.retry_after → Retry-After 헤더 → 5초."""
+    try:
+        return float(res.json()["parameters"]["retry_after"])
+    except Exception:
+        pass
+    try:
+        return float(res.headers.get("Retry-After", 5))
+    except (TypeError, ValueError):
+        return 5.0
+
+
+def _deliver(text: str) -> bool:
+    """본문 1건 전송 (속도 제한 + 재시도). 최종 실패 시 로그를 남기고 버림."""
+    err = ""
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        token, chat = _get_tg_creds()
+        if not token or not chat:
+            err = "TELEGRAM 시크릿 미설정"
+            break
+        _wait_for_slot()
+        _sent_at.append(time.monotonic())
+        try:
+            res = _HTTP.post(f"https://api.telegram.org/bot{token}/sendMessage",
+                             json={"chat_id": chat, "text": text, "parse_mode": "HTML"},
+                             timeout=10)
+        except Exception as exc:
+            err, delay = str(exc), min(BACKOFF_MAX_SEC, 2 ** attempt)
+        else:
+            if res.ok:
+                with _cond:
+                    _stats["sent"] += 1
+                NOTIFY_MESSAGES.inc(result="sent")
+                return True
+            err = f"HTTP {res.status_code}: {res.text[:200]}"
+            if res.status_code == 429:
+                delay = min(BACKOFF_MAX_SEC, _retry_after(res))
+            elif res.status_code >= 500:
+                delay = min(BACKOFF_MAX_SEC, 2 ** attempt)
+            else:
+                break                      # 400·401·403 — 재시도해도 같은 결과
+        if attempt < MAX_ATTEMPTS:
+            with _cond:
+                _stats["retries"] += 1
+            NOTIFY_MESSAGES.inc(result="retry")
+            log.warning("텔레그램 전송 실패 (%d/%d) — %.1fs 후 재시도: %s",
+                        attempt, MAX_ATTEMPTS, delay, err)
+            time.sleep(delay)
+    with _cond:
+        _stats["dropped"] += 1
+        _stats["last_error"] = err
+    NOTIFY_MESSAGES.inc(result="dropped")
+    log.error("텔레그램 알림 폐기: %s", err)
+    return False
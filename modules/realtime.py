@@ -2,35 +2,47 @@
 Supabase Realtime 백그라운드 리스너
 ====================================
 - 모듈 레벨로 관리 → Streamlit rerun 사이에서도 스레드 유지
-- DB 테이블 변경 감지 시 테이블명을 _changed 집합에 추가
-- 메인 앱은 pop_changed_tables() 로 변경 목록을 가져간 뒤
-  해당 테이블의 캐시만 초기화
+- DB 테이블 변경 감지 시 테이블별 버전(단조 증가)을 갱신하는 변경 로그
+- 세션마다 자기 커서(테이블 → 마지막으로 본 버전)를 보관하므로
+  모든 세션이 모든 변경을 정확히 1회씩 인지 (먼저 rerun 한 세션이 독식하지 않음)
+- 프로세스 공유 캐시 무효화는 변경 버전당 1회만 실행
+- 감시 테이블 전체를 채널 1개로 멀티플렉싱 구독, 주기적 생존 확인(heartbeat)
+- 이벤트 지연(commit → 콜백)·재연결 횟수 등 상태는 get_health() 로 조회
+- 재연결 시 끊겨 있던 구간의 변경을 테이블별 delta 조회로 따라잡음 (gap recovery)
 
 사용 예:
-    from modules.realtime import start_realtime, pop_changed_tables
+    from modules.realtime import start_realtime, new_cursor, pop_changed_tables
 
     # 앱 최초 실행 시 1회 (이미 실행 중이면 무시)
+    register_tables("users")      # 선택: 기본 WATCHED_TABLES 외 추가 테이블
     start_realtime(url, key)
 
-    # 매 rerun 마다
-    changed = pop_changed_tables()   # set[str] – 변경된 테이블 목록
-    if changed:
-        clear_cache_for_tables(changed)
+    # 세션 최초 1회
+    st.session_state._rt_cursor = new_cursor()
+
+    # 매 rerun 마다 — 캐시 무효화(프로세스 1회) + 이 세션이 아직 못 본 변경 테이블
+    changed = pop_changed_tables(st.session_state._rt_cursor, clear_cache_for_tables)
 """
 
 import asyncio
 import logging
 import threading
-from typing import Set
+import time
+from datetime import datetime, timezone, timedelta
+from typing import Callable, Dict, Optional, Set
+
+from modules.metrics import REALTIME_EVENTS, REALTIME_LAG
 
 log = logging.getLogger(__name__)
 
 # ── 모듈 레벨 상태 (rerun 간 유지) ─────────────────────────────────
-_changed: Set[str] = set()
+_seq = 0                                 # 전역 변경 시퀀스 (이벤트마다 +1)
+_versions: Dict[str, int] = {}           # 테이블 → 마지막 변경 시퀀스
+_invalidated: Dict[str, int] = {}        # 테이블 → 캐시 무효화까지 반영된 시퀀스
 _lock = threading.Lock()
 _thread: threading.Thread | None = None
 
-# 실시간 감시 테이블 목록
+# 실시간 감시 테이블 목록 (기본값 — register_tables() 로 추가 가능)
 WATCHED_TABLES = [
     "production",
     "production_schedule",
@@ -38,22 +50,115 @@ WATCHED_TABLES = [
     "material_serial",
     "production_plan",
     "plan_change_log",
+    "model_master",
+    "production_stoppage_log",
+    "help_requests",
+    "access_requests",
 ]
 
+CHANNEL_NAME      = "rt-pms"   # 멀티플렉싱 채널 (테이블별 바인딩을 채널 1개에 등록)
+HEARTBEAT_SEC     = 15         # 생존 확인 주기
+_LAG_EWMA_ALPHA   = 0.2        # 평균 지연 지수이동평균 가중치
+
+# gap recovery delta 조회용 변경시각 컬럼 (값: KST 'YYYY-MM-DD HH:MM:SS' 문자열)
+# 컬럼이 없는 테이블(일정·계획·마스터 등)과 delete 는 delta 로 감지할 수 없으므로
+# 재연결 시 무조건 변경으로 간주해 캐시를 무효화한다.
+GAP_TS_COLUMNS = {
+    "production":              "시간",
+    "audit_log":               "시간",
+    "material_serial":         "시간",
+    "plan_change_log":         "시간",
+    "production_stoppage_log": "등록시간",
+    "help_requests":           "created_at",
+    "access_requests":         "created_at",
+}
+GAP_MARGIN_SEC    = 30         # 시계 오차·커밋 지연 대비 delta 조회 시작 시각 여유
+_KST              = timezone(timedelta(hours=9))
+
+_tables: list = list(WATCHED_TABLES)
+_resubscribe = threading.Event()          # 실행 중 테이블 추가 → 재구독 요청
+
+# 연결 상태 / 지연 지표 (get_health() 로 복사본 조회)
+_health: dict = {
+    "connected":         False,
+    "connected_at":      None,   # epoch 초
+    "last_heartbeat_at": None,   # 마지막 생존 확인 성공 시각
+    "last_event_at":     None,
+    "events":            0,
+    "reconnects":        0,
+    "last_applied_at":   None,   # 반영이 보장된 마지막 시각 (이벤트 commit 시각 / 생존 확인 시각)
+    "gap_recoveries":    0,
+    "last_gap_tables":   [],
+    "lag_ms_last":       None,   # commit_timestamp → 콜백 수신 지연
+    "lag_ms_avg":        None,
+    "lag_ms_max":        None,
+    "last_error":        "",
+}
+
 
 # ── 공개 API ────────────────────────────────────────────────────────
 
-def pop_changed_tables() -> Set[str]:
-    """변경된 테이블 집합을 반환하고 내부 집합 초기화."""
+def get_table_versions() -> Dict[str, int]:
+    """테이블별 현재 버전 스냅샷 (변경 없던 테이블은 포함되지 않음 → 0 취급)."""
     with _lock:
-        result = set(_changed)
-        _changed.clear()
-    return result
+        return dict(_versions)
+
 
+def new_cursor() -> Dict[str, int]:
+    """새 세션용 커서 — 현재 시점까지의 변경은 이미 본 것으로 간주."""
+    return get_table_versions()
 
-def has_changes() -> bool:
+
+def pop_changed_tables(cursor: Dict[str, int],
+                       invalidate: Optional[Callable[[Set[str]], None]] = None) -> Set[str]:
+    """cursor 이후 변경된 테이블 집합을 반환하고 cursor 를 현재 버전으로 전진.
+
+    invalidate: 프로세스 공유 캐시 무효화 함수 (예: clear_cache_for_tables).
+      아직 무효화되지 않은 변경 테이블에 대해 변경 버전당 1회만 호출되며,
+      락 안에서 실행되므로 반환된 테이블을 재조회하면 항상 무효화 이후 데이터를 읽는다.
+    """
     with _lock:
-        return bool(_changed)
+        if invalidate is not None:
+            stale = {t for t, v in _versions.items() if v > _invalidated.get(t, 0)}
+            if stale:
+                try:
+                    invalidate(stale)
+                finally:
+                    _invalidated.update({t: _versions[t] for t in stale})
+        changed = {t for t, v in _versions.items() if v > cursor.get(t, 0)}
+        for t in changed:
+            cursor[t] = _versions[t]
+    return changed
+
+
+def has_changes(cursor: Dict[str, int], tables=None) -> bool:
+    """cursor 이후 변경 여부 (cursor 는 전진하지 않음). tables 지정 시 해당 테이블만 확인."""
+    with _lock:
+        return any(v > cursor.get(t, 0) for t, v in _versions.items()
+                   if tables is None or t in tables)
+
+
+def register_tables(*tables: str) -> None:
+    """감시 테이블 추가. 리스너 실행 중이면 다음 생존 확인 시 재구독."""
+    with _lock:
+        added = [t for t in tables if t and t not in _tables]
+        _tables.extend(added)
+    if added and is_running():
+        _resubscribe.set()
+
+
+def watched_tables() -> list:
+    with _lock:
+        return list(_tables)
+
+
+def get_health() -> dict:
+    """연결 상태·지연 지표 스냅샷."""
+    with _lock:
+        h = dict(_health)
+        h["tables"] = list(_tables)
+    h["running"] = is_running()
+    return h
 
 
 def is_running() -> bool:
@@ -78,17 +183,96 @@ def start_realtime(url: str, key: str) -> None:
 # ── 내부 구현 ────────────────────────────────────────────────────────
 
 def _mark_changed(table: str):
+    global _seq
+    with _lock:
+        _seq += 1
+        _versions[table] = _seq
+    log.debug("Realtime 변경 감지: %s (v%d)", table, _seq)
+
+
+def _parse_commit_ts(payload) -> Optional[float]:
+    """Postgres Changes payload 의 commit_timestamp → epoch 초 (없으면 None)."""
+    if not isinstance(payload, dict):
+        return None
+    data = payload.get("data", payload)
+    ts = data.get("commit_timestamp") if isinstance(data, dict) else None
+    if not ts:
+        return None
+    try:
+        return datetime.fromisoformat(str(ts).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def _record_event(payload) -> None:
+    now = time.time()
+    commit_ts = _parse_commit_ts(payload)
     with _lock:
-        _changed.add(table)
-    log.debug("Realtime 변경 감지: %s", table)
+        _health["events"] += 1
+        _health["last_event_at"] = now
+        _health["last_applied_at"] = max(_health["last_applied_at"] or 0.0, commit_ts or now)
+        if commit_ts is not None:
+            lag_ms = max(0.0, (now - commit_ts) * 1000)
+            REALTIME_LAG.observe(lag_ms / 1000)
+            avg = _health["lag_ms_avg"]
+            _health["lag_ms_last"] = lag_ms
+            _health["lag_ms_avg"] = lag_ms if avg is None else avg + _LAG_EWMA_ALPHA * (lag_ms - avg)
+            _health["lag_ms_max"] = max(_health["lag_ms_max"] or 0.0, lag_ms)
 
 
 def _make_callback(table: str):
     def _cb(payload):
+        REALTIME_EVENTS.inc(table=table)
+        _record_event(payload)
         _mark_changed(table)
     return _cb
 
 
+def _flag(obj, name: str):
+    """버전별로 메서드/프로퍼티가 다른 상태 플래그 조회 (없으면 None)."""
+    v = getattr(obj, name, None)
+    if callable(v):
+        try:
+            v = v()
+        except Exception:
+            return None
+    return v
+
+
+def _is_alive(client, channel) -> bool:
+    """소켓 연결 + 채널 join 상태 확인. 확인 불가한 플래그는 살아있는 것으로 간주."""
+    rt = getattr(client, "realtime", None)
+    sock_ok = _flag(rt, "is_connected") if rt is not None else None
+    chan_ok = _flag(channel, "is_joined")
+    return sock_ok is not False and chan_ok is not False
+
+
+async def _catch_up(client, since: float, tables: list) -> Set[str]:
+    """끊김 구간(since 이후) 변경을 테이블별 delta 조회(limit 1)로 확인해 변경 표시.
+    조회 실패 / 시각 컬럼 없는 테이블은 변경으로 간주 (stale 캐시보다 재조회가 안전)."""
+    since_str = datetime.fromtimestamp(since - GAP_MARGIN_SEC, _KST).strftime('%Y-%m-%d %H:%M:%S')
+    changed: Set[str] = set()
+    for table in tables:
+        col = GAP_TS_COLUMNS.get(table)
+        if not col:
+            changed.add(table)
+            continue
+        try:
+            res = await client.table(table).select(col).gte(col, since_str).limit(1).execute()
+            if res.data:
+                changed.add(table)
+        except Exception as exc:
+            log.debug("gap recovery 조회 실패 (%s): %s", table, exc)
+            changed.add(table)
+    for table in changed:
+        _mark_changed(table)
+    with _lock:
+        _health["gap_recoveries"] += 1
+        _health["last_gap_tables"] = sorted(changed)
+    log.info("Realtime gap recovery: %s 이후 변경 %d/%d 테이블", since_str, len(changed), len(tables))
+    return changed
+
+
 def _listener_loop(url: str, key: str) -> None:
     """백그라운드 스레드 진입점 – asyncio 루프를 직접 실행."""
     asyncio.run(_async_listener(url, key))
@@ -96,13 +280,16 @@ def _listener_loop(url: str, key: str) -> None:
 
 async def _async_listener(url: str, key: str) -> None:
     """
-    Supabase async 클라이언트로 Postgres Changes 구독.
-    연결 오류 시 지수 백오프로 재시도.
+    Supabase async 클라이언트로 Postgres Changes 구독 (채널 1개에 전 테이블 바인딩).
+    HEARTBEAT_SEC 마다 소켓·채널 생존을 확인하고, 끊김/구독 오류 시 지수 백오프로 재연결.
     """
     backoff = 5  # 초기 재시도 대기 (초)
+    attempts = 0
 
     while True:
         client = None
+        channel = None
+        sub_error: list = []
         try:
             # supabase-py v2 비동기 클라이언트
             try:
@@ -112,39 +299,87 @@ async def _async_listener(url: str, key: str) -> None:
                 # 구버전 호환
                 from supabase import create_async_client as acreate_client  # type: ignore
 
-            client = await acreate_client(url, key)
-            channels = []
+            if attempts:
+                with _lock:
+                    _health["reconnects"] += 1
+            attempts += 1
+            _resubscribe.clear()
 
-            for table in WATCHED_TABLES:
-                ch = client.channel(f"rt-{table}")
-                ch.on_postgres_changes(
+            client = await acreate_client(url, key)
+            tables = watched_tables()
+            channel = client.channel(CHANNEL_NAME)
+            for table in tables:
+                channel.on_postgres_changes(
                     event="*",
                     schema="public",
                     table=table,
                     callback=_make_callback(table),
                 )
-                await ch.subscribe()
-                channels.append(ch)
 
-            log.info(
-                "Supabase Realtime 연결 완료 (%d 테이블 구독)", len(WATCHED_TABLES)
-            )
+            def _on_subscribe(status, err=None):
+                # SUBSCRIBED 외 상태(CHANNEL_ERROR / TIMED_OUT / CLOSED) → 재연결
+                if str(getattr(status, "value", status)).upper() != "SUBSCRIBED":
+                    sub_error.append(f"{status}: {err}" if err else str(status))
+
+            await channel.subscribe(_on_subscribe)
+
+            now = time.time()
+            with _lock:
+                since = _health["last_applied_at"]
+                _health.update(connected=True, connected_at=now, last_heartbeat_at=now, last_error="")
+            log.info("Supabase Realtime 연결 완료 (채널 1개, %d 테이블 구독)", len(tables))
             backoff = 5  # 성공 시 백오프 초기화
 
-            # 연결 유지 (30초마다 살아있음 확인)
+            # 재연결: 구독 완료 후 끊김 구간 delta 조회 (구독 전에 하면 그 사이 변경을 놓침)
+            if since is not None:
+                await _catch_up(client, since, tables)
+            with _lock:
+                _health["last_applied_at"] = max(_health["last_applied_at"] or 0.0, now)
+
+            # 연결 유지 — HEARTBEAT_SEC 마다 생존 확인
             while True:
-                await asyncio.sleep(30)
+                await asyncio.sleep(HEARTBEAT_SEC)
+                if sub_error:
+                    raise ConnectionError(f"채널 구독 오류: {sub_error[-1]}")
+                if not _is_alive(client, channel):
+                    raise ConnectionError("Realtime 소켓/채널 연결 끊김 감지")
+                if _resubscribe.is_set():
+                    log.info("감시 테이블 변경 — 재구독")
+                    break
+                now = time.time()
+                with _lock:
+                    _health["last_heartbeat_at"] = now
+                    _health["last_applied_at"] = max(_health["last_applied_at"] or 0.0, now)
 
         except Exception as exc:
+            with _lock:
+                _health.update(connected=False, last_error=str(exc))
             log.warning(
                 "Realtime 연결 오류 – %ds 후 재시도: %s", backoff, exc
             )
-            # 채널 정리 시도
-            if client and "channels" in dir(client):
-                try:
-                    for ch in channels:  # type: ignore[name-defined]
-                        await client.remove_channel(ch)
-                except Exception:
-                    pass
+            await _close(client, channel)
             await asyncio.sleep(backoff)
             backoff = min(backoff * 2, 60)  # 최대 60초 대기
+            continue
+
+        # 재구독 요청 (정상 종료) — 대기 없이 즉시 재연결
+        with _lock:
+            _health["connected"] = False
+        await _close(client, channel)
+
+
+async def _close(client, channel) -> None:
+    """채널·소켓 정리 (실패해도 무시)."""
+    if client is None:
+        return
+    try:
+        if channel is not None:
+            await client.remove_channel(channel)
+    except Exception:
+        pass
+    try:
+        rt = getattr(client, "realtime", None)
+        if rt is not None and hasattr(rt, "close"):
+            await rt.close()
+    except Exception:
+        pass
@@ -0,0 +1,60 @@
+"""
+렌더 결과 캐시 (figure·HTML 문자열)
+===================================
+- 키: (섹션, 필터, 데이터 버전) → 같은 키면 plotly figure·HTML 을 다시 만들지 않음
+- 프로세스 전역 LRU — 같은 화면을 보는 모든 세션·fragment 틱이 결과 공유
+  (버전별 항목을 함께 보관 — 커서가 다른 세션끼리 서로의 항목을 지우지 않음)
+  (현황판 모니터 여러 대가 떠 있어도 데이터 변경 1회당 빌드 1회)
+- 데이터 버전은 modules.live.data_version (세션이 반영한 Realtime 커서 + 로컬 변경 + 폴링 버킷)
+- 캐시 값은 읽기 전용으로 취급 (호출 측에서 figure 를 수정하지 말 것)
+
+사용 예:
+    ver = data_version(("production",))
+    fig = render_cached("dash_figs", (date.today().isoformat(),), ver, lambda: _build(db))
+"""
+
+import threading
+from collections import OrderedDict
+
+RENDER_CACHE_MAX = 128   # 보관 항목 수 (섹션 × 필터 조합)
+
+_CACHE: "OrderedDict[tuple, object]" = OrderedDict()
+_LOCK = threading.Lock()
+_STATS = {"hit": 0, "miss": 0}
+
+
+def render_cached(section: str, filters: tuple, version, build):
+    """(section, filters, version) 키로 build() 결과 재사용.
+    build 는 락 밖에서 실행 — 동시 미스 시 중복 빌드는 허용 (마지막 결과 보관)."""
+    key = (section, tuple(filters), version)
+    with _LOCK:
+        if key in _CACHE:
+            _CACHE.move_to_end(key)
+            _STATS["hit"] += 1
+            return _CACHE[key]
+        _STATS["miss"] += 1
+    value = build()
+    with _LOCK:
+        # 다른 버전은 지우지 않음 — 세션마다 커서·로컬 변경이 달라 여러 버전이 동시에 쓰임.
+        # 오래된 버전은 LRU 상한(RENDER_CACHE_MAX)으로 밀려남
+        _CACHE[key] = value
+        _CACHE.move_to_end(key)
+        while len(_CACHE) > RENDER_CACHE_MAX:
+            _CACHE.popitem(last=False)
+    return value
+
+
+def clear_render_cache(section: str = None) -> None:
+    """렌더 캐시 비우기. section 지정 시 해당 섹션만."""
+    with _LOCK:
+        if section is None:
+            _CACHE.clear()
+        else:
+            for k in [k for k in _CACHE if k[0] == section]:
+                del _CACHE[k]
+
+
+def render_cache_stats() -> dict:
+    """적중/미스 횟수와 현재 항목 수 (모니터링용)."""
+    with _LOCK:
+        return {**_STATS, "size": len(_CACHE)}
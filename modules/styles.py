@@ -1,10 +1,10 @@
 import streamlit as st
 
+from modules.assets import inject_head_assets
 
-def inject_styles():
-    """CSS 스타일 주입"""
-    st.markdown("""
-    <style>
+
+# 공통 CSS — 세션당 1회 부모 문서 head 에 설치 (modules.assets)
+STYLES_CSS = """
     /* ════════════════════════════════════════
        산업/공장 테마 (v2.0.0)
        배경: 콘크리트 회색
@@ -410,8 +410,12 @@ def inject_styles():
         .cal-day-num { font-size: 0.78rem; }
         .cal-event { font-size: 0.52rem; }
     }
-    </style>
-""", unsafe_allow_html=True)
+"""
+
+
+def inject_styles():
+    """CSS 스타일 주입 — 내용 해시 기준 세션당 1회 전송 (이후 rerun 은 전송 없음)"""
+    inject_head_assets([("styles", "css", STYLES_CSS)])
 
 
 def inject_js():
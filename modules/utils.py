@@ -6,6 +6,9 @@
 - Google Drive 업로드
 """
 
+import threading
+import time
+
 import requests
 import streamlit as st
 from datetime import datetime, timezone, timedelta
@@ -142,7 +145,23 @@ def notify_new_arrivals(curr_cnt: int, notif_key: str, label: str):
 # 텔레그램 알림
 # =================================================================
 
-def _get_tg_creds():
+_TG_CREDS_TTL_SEC = 300          # secrets 재탐색 주기 (secrets.toml 수정 반영)
+_tg_creds_cache = {"at": 0.0, "creds": ("", "")}
+_tg_creds_lock = threading.Lock()
+
+
+def _get_tg_creds(refresh: bool = False):
+    """(TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID) — _scan_tg_creds 결과를 _TG_CREDS_TTL_SEC 동안 재사용.
+    전송마다 secrets 전체 섹션을 다시 훑지 않음. refresh=True 면 즉시 재탐색."""
+    with _tg_creds_lock:
+        at = _tg_creds_cache["at"]
+        if refresh or not at or time.monotonic() - at >= _TG_CREDS_TTL_SEC:
+            _tg_creds_cache["creds"] = _scan_tg_creds()
+            _tg_creds_cache["at"] = time.monotonic()
+        return _tg_creds_cache["creds"]
+
+
+def _scan_tg_creds():
     """TELEGRAM_BOT_TOKEN / TELEGRAM_CHAT_ID를 secrets 의 어느 위치에 있든 찾아 반환.
     우선순위: 최상위 → 모든 서브섹션 순차 탐색.
     어떤 예외가 발생해도 "" 를 반환한다 (Streamlit 버전별 예외 차이 대응)."""
@@ -183,9 +202,10 @@ except Exception:
 
 
 def _send_telegram(message: str) -> str:
-    """텔레그램 메시지 전송. 성공 시 'ok', 실패 시 오류 사유 문자열 반환.
+    """텔레그램 메시지 동기 전송 (최대 10초 대기). 성공 시 'ok', 실패 시 오류 사유 문자열 반환.
     호출자가 상황에 맞게 '전송 실패:' 등 접두사를 붙일 수 있도록
-    오류 문자열 자체에는 접두사를 포함하지 않는다."""
+    오류 문자열 자체에는 접두사를 포함하지 않는다.
+    사용자 클릭 처리 중에는 modules.notify.enqueue_telegram (백그라운드 outbox) 사용."""
     _token, _chat = _get_tg_creds()
     if not _token or not _chat:
         return "TELEGRAM 시크릿 미설정"
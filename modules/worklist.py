@@ -0,0 +1,109 @@
+"""
+라인 페이지 작업 목록 (페이지 분할 + 일괄 선택)
+===============================================
+- 행마다 st.columns/체크박스/버튼을 만들지 않고 현재 페이지 구간만 st.data_editor 1개로 표시
+  → 재공(WIP) 수백 대여도 위젯 수·렌더 시간 일정
+- 선택 상태는 기존과 같은 dict (production_db 인덱스 문자열 → bool) 에 보관
+  → 스캔 자동 체크·일괄 처리 버튼 로직은 그대로 사용
+- data_editor 에 넘기는 data 는 체크할 때마다 바꾸지 않음 (Streamlit 이 data 를 위젯 id 에 포함하는
+  버전에서는 data 가 바뀌면 편집기가 초기화되어 연속 클릭이 사라짐)
+  → 표시 행·내용·version 이 바뀔 때만 선택 기준값을 다시 찍고, 체크 변경은 편집기의 edited_rows 로 반영
+- 스캔으로 체크된 행이 있는 페이지로 자동 이동 (goto_row)
+
+사용 예:
+    view = wait_list.sort_values('시간', ascending=False)
+    page_df = page_slice(view, "wait_x")
+    selection_editor(page_df, "wait_x", st.session_state[ck_key], {"시리얼": "시리얼", ...}, ver)
+"""
+
+import pandas as pd
+import streamlit as st
+
+WORKLIST_PAGE_SIZE = 50   # 페이지당 행 수
+SELECT_COL = "선택"
+
+
+def _page_key(key: str) -> str:
+    return f"_wl_page_{key}"
+
+
+def _shift_page(key: str, delta: int, n_pages: int) -> None:
+    cur = st.session_state.get(_page_key(key), 0)
+    st.session_state[_page_key(key)] = min(max(cur + delta, 0), n_pages - 1)
+
+
+def goto_row(df: pd.DataFrame, key: str, idx, page_size: int = WORKLIST_PAGE_SIZE) -> None:
+    """df(표시 순서) 안에서 인덱스 idx 가 있는 페이지로 이동."""
+    try:
+        pos = df.index.get_loc(idx)
+    except KeyError:
+        return
+    if isinstance(pos, int):
+        st.session_state[_page_key(key)] = pos // page_size
+
+
+def page_slice(df: pd.DataFrame, key: str, page_size: int = WORKLIST_PAGE_SIZE) -> pd.DataFrame:
+    """표시 순서로 정렬된 df 에서 현재 페이지 구간만 잘라 반환 + 페이지 이동 UI.
+    1페이지로 충분하면 이동 UI 생략."""
+    n_pages = max((len(df) - 1) // page_size + 1, 1)
+    page = min(st.session_state.get(_page_key(key), 0), n_pages - 1)
+    st.session_state[_page_key(key)] = page
+    if n_pages > 1:
+        p1, p2, p3 = st.columns([1, 3, 1])
+        p1.button("◀ 이전", key=f"_wl_prev_{key}", use_container_width=True,
+                  disabled=page == 0, on_click=_shift_page, args=(key, -1, n_pages))
+        p2.markdown(
+            f"<p style='text-align:center;margin:6px 0;font-size:0.82rem;color:#8a7f72;'>"
+            f"{page + 1} / {n_pages} 페이지  ·  총 {len(df)}건</p>",
+            unsafe_allow_html=True)
+        p3.button("다음 ▶", key=f"_wl_next_{key}", use_container_width=True,
+                  disabled=page >= n_pages - 1, on_click=_shift_page, args=(key, 1, n_pages))
+    return df.iloc[page * page_size:(page + 1) * page_size]
+
+
+def selection_editor(page_df: pd.DataFrame, key: str, checked: dict, columns: dict,
+                     version: int = 0, selectable: pd.Series = None,
+                     column_config: dict = None) -> None:
+    """page_df 를 체크박스 열이 붙은 data_editor 로 표시하고 선택 결과를 checked 에 반영.
+
+    columns:    {표시 컬럼명: page_df 컬럼명} — 표시 순서대로
+    version:    외부에서 checked 를 바꿨을 때(스캔·일괄 처리·해제) 올리는 값 → 편집 상태 초기화
+    selectable: page_df 와 같은 인덱스의 bool Series — False 인 행은 체크해도 선택되지 않음
+
+    편집기 세대(generation): 표시 행·표시 내용·version 중 하나가 바뀌면 checked 로 기준 선택을 다시 찍고
+    새 key 의 편집기를 만듦. 같은 세대 안에서는 data·key 가 그대로이고 체크는 edited_rows 로만 들어옴.
+    """
+    if page_df.empty:
+        return
+    view = pd.DataFrame({label: page_df[src].astype(str).values for label, src in columns.items()},
+                        index=page_df.index)
+
+    sig = (str(version), tuple(page_df.index), hash(tuple(view.itertuples(index=False, name=None))))
+    gen_key, sig_key, base_key = f"_wl_gen_{key}", f"_wl_sig_{key}", f"_wl_base_{key}"
+    if st.session_state.get(sig_key) != sig:
+        st.session_state[sig_key] = sig
+        st.session_state[gen_key] = st.session_state.get(gen_key, 0) + 1
+        st.session_state[base_key] = [bool(checked.get(str(i), False)) for i in page_df.index]
+    base = st.session_state[base_key]
+    editor_key = f"_wl_ed_{key}_{st.session_state[gen_key]}"
+    view.insert(0, SELECT_COL, base)
+
+    cfg = {SELECT_COL: st.column_config.CheckboxColumn(SELECT_COL, width="small")}
+    cfg.update(column_config or {})
+    st.data_editor(
+        view,
+        key=editor_key,
+        hide_index=True,
+        use_container_width=True,
+        disabled=list(columns.keys()),
+        column_config=cfg,
+    )
+    edits = (st.session_state.get(editor_key) or {}).get("edited_rows", {})
+    for pos, i in enumerate(page_df.index):
+        row_edit = edits.get(pos, edits.get(str(pos), {}))
+        v = row_edit.get(SELECT_COL, base[pos])
+        ok = bool(v) and (selectable is None or bool(selectable.get(i, False)))
+        if ok:
+            checked[str(i)] = True
+        else:
+            checked.pop(str(i), None)
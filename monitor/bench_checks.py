@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+감시 함수 벤치마크 — 합성 스냅샷으로 scan_snapshot 선형 확장 확인
+==================================================================
+실제 DB 없이 production 활성 레코드 형태의 합성 행을 만들어
+scan_snapshot(1회 순회) 소요 시간과 행당 비용(µs)을 측정합니다.
+행당 비용이 규모와 관계없이 거의 일정하면 선형입니다.
+
+--legacy 지정 시 이전 방식(Counter + 중복 시리얼마다 전체 재순회, O(n × 중복 수))도
+작은 규모에서 함께 측정하고, 두 방식의 중복 시리얼·정합성 결과가 같은지 검증합니다.
+(정체 판정은 이전의 전역 STUCK_HOURS 대신 상태별 SLA 라 비교에서 제외 — 건수만 출력)
+
+실행 방법:
+  python bench_checks.py                        # 10만 / 100만 행
+  python bench_checks.py --rows 10000 100000 --legacy
+  python bench_checks.py --dup-rate 0.05        # 중복 시리얼 비율 5%
+"""
+
+import argparse
+import random
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from monitor import ACTIVE_STATES, KST, VALID_STATES, _hours_ago, _ts, scan_snapshot
+
+_BANS = ["제조1반", "제조2반", "제조3반"]
+_MODELS = [f"MD-{i:03d}" for i in range(40)]
+_STATES = sorted(VALID_STATES)
+
+
+def make_snapshot(n: int, dup_rate: float = 0.01, bad_rate: float = 0.001,
+                  seed: int = 42) -> list[dict]:
+    """합성 스냅샷 n행. dup_rate 비율은 기존 시리얼 재사용, bad_rate 비율은 빈 시리얼·잘못된 상태·반 누락."""
+    rnd = random.Random(seed)
+    now = datetime.now(KST)
+    rows = []
+    for i in range(n):
+        sn = f"SN-{i:08d}"
+        if i and rnd.random() < dup_rate:
+            sn = rows[rnd.randrange(i)]["시리얼"]
+        ban = rnd.choice(_BANS)
+        state = rnd.choice(_STATES)
+        if rnd.random() < bad_rate:
+            kind = rnd.randrange(3)
+            if kind == 0:
+                sn = ""
+            elif kind == 1:
+                state = "알수없음"
+            else:
+                ban = ""
+        ts = now - timedelta(minutes=rnd.randrange(60 * 24))
+        rows.append({
+            "id": i + 1, "시리얼": sn, "반": ban, "모델": rnd.choice(_MODELS),
+            "상태": state, "시간": ts.strftime("%Y-%m-%d %H:%M:%S"),
+        })
+    return rows
+
+
+def legacy_scan(data: list[dict], stuck_hours: int) -> tuple[list, list, list]:
+    """이전 구현 재현 (비교용) — 항목별 개별 순회 + 중복 시리얼마다 전체 재순회."""
+    counts = Counter(r["시리얼"] for r in data if (r.get("시리얼") or "").strip())
+    duplicates = []
+    for sn, cnt in counts.items():
+        if cnt > 1:
+            rows = [r for r in data if r.get("시리얼") == sn]
+            duplicates.append({
+                "시리얼": sn, "건수": cnt,
+                "상태목록": [r.get("상태", "?") for r in rows],
+                "반목록": list({r.get("반", "?") for r in rows}),
+            })
+    cutoff = _hours_ago(stuck_hours)
+    stuck = [r for r in data if r.get("상태") in ACTIVE_STATES and r.get("시간")
+             and _ts(r["시간"]) <= cutoff]
+    integrity = []
+    empty_sn = [r for r in data if not (r.get("시리얼") or "").strip()]
+    if empty_sn:
+        bans = ", ".join(sorted({r.get("반") or "?" for r in empty_sn}))
+        integrity.append(f"빈 시리얼 {len(empty_sn)}건 (반: {bans})")
+    invalid = [r for r in data if r.get("상태", "") not in VALID_STATES]
+    if invalid:
+        bad = ", ".join(sorted({str(r.get("상태")) for r in invalid}))
+        integrity.append(f"잘못된 상태값 {len(invalid)}건: [{bad}]")
+    no_ban = [r for r in data if not (r.get("반") or "").strip()]
+    if no_ban:
+        integrity.append(f"반(班) 필드 누락 {len(no_ban)}건")
+    return duplicates, stuck, integrity
+
+
+def _timed(fn, *args, repeat: int = 3):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="감시 함수 합성 스냅샷 벤치마크")
+    ap.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    ap.add_argument("--dup-rate", type=float, default=0.01)
+    ap.add_argument("--stuck-hours", type=int, default=8, help="이전 구현의 전역 정체 기준(h)")
+    ap.add_argument("--legacy", action="store_true", help="이전 구현도 측정 (규모 ≤ --legacy-max)")
+    ap.add_argument("--legacy-max", type=int, default=100_000)
+    args = ap.parse_args(argv)
+
+    print(f"{'rows':>10}{'scan':>10}{'µs/row':>9}{'dups':>8}{'stuck':>8}{'legacy':>10}")
+    for n in args.rows:
+        data = make_snapshot(n, args.dup_rate)
+        sec, (dups, stuck, integ) = _timed(scan_snapshot, data)
+        legacy = ""
+        if args.legacy and n <= args.legacy_max:
+            lsec, lres = _timed(legacy_scan, data, args.stuck_hours, repeat=1)
+            if (lres[0], lres[2]) != (dups, integ):
+                print(f"결과 불일치 (rows={n})")
+                return 1
+            legacy = f"{lsec:.2f}s"
+        print(f"{n:>10,}{sec:>9.2f}s{sec / n * 1e6:>9.2f}{len(dups):>8,}{len(stuck):>8,}{legacy:>10}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+모니터링 상태·이슈 이력 저장소 (SQLite, 표준 라이브러리만 사용)
+================================================================
+monitor.db 한 파일에 보관:
+  kv      — 모니터 상태 (열린 이슈 집합·워터마크 등, 기존 monitor_state.json 내용)
+  issues  — 이슈 1건의 발생~해결 구간 (key, 종류, 발생/해결/알림 시각)
+            → 이슈별 중복 알림 방지, 해결 소요 시간 측정
+  runs    — 감시 작업 실행 기록 (작업명, 소요 ms, 성공 여부, 이슈 건수)
+
+조회 CLI:
+  python issue_store.py open                      # 현재 열린 이슈
+  python issue_store.py history --days 7 --kind dup
+  python issue_store.py stats --days 30           # 종류별 발생·해결 건수, 해결 소요 시간
+  python issue_store.py runs --limit 20           # 최근 실행 + 작업별 소요 시간 요약
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+
+KST = timezone(timedelta(hours=9))
+
+DB_PATH              = os.getenv("MONITOR_DB", "monitor.db")
+LEGACY_STATE_FILE    = "monitor_state.json"
+RUN_RETENTION_DAYS   = 90     # runs 보관 기간 (issues 는 영구 보관)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS issues (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    key         TEXT NOT NULL,
+    kind        TEXT NOT NULL,
+    detail      TEXT,
+    opened_at   REAL NOT NULL,
+    closed_at   REAL,
+    notified_at REAL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS issues_open_key ON issues(key) WHERE closed_at IS NULL;
+CREATE INDEX IF NOT EXISTS issues_opened_at ON issues(opened_at);
+CREATE TABLE IF NOT EXISTS runs (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    job         TEXT NOT NULL,
+    started_at  REAL NOT NULL,
+    duration_ms REAL NOT NULL,
+    ok          INTEGER NOT NULL,
+    summary     TEXT,
+    n_dup       INTEGER,
+    n_stuck     INTEGER,
+    n_integrity INTEGER,
+    error       TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_started_at ON runs(started_at);
+"""
+
+
+class IssueStore:
+    """monitor.db 접근 — 연결 1개를 만든 스레드(이벤트 루프)에서만 사용."""
+
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+        self._import_legacy_state()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # ── 상태 (kv) ─────────────────────────────────────────────────────────────
+    def load_state(self) -> dict:
+        row = self.conn.execute("SELECT value FROM kv WHERE key = 'state'").fetchone()
+        return json.loads(row["value"]) if row else {}
+
+    def save_state(self, state: dict) -> None:
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO kv(key, value) VALUES('state', ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (json.dumps(state, ensure_ascii=False),),
+            )
+
+    def _import_legacy_state(self) -> None:
+        """monitor_state.json 이 있고 저장소가 비어 있으면 1회 가져옴 (이슈 해시는 버림)."""
+        if not os.path.exists(LEGACY_STATE_FILE) or self.conn.execute(
+            "SELECT 1 FROM kv WHERE key = 'state'"
+        ).fetchone():
+            return
+        try:
+            with open(LEGACY_STATE_FILE, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        state.pop("last_issue_hash", None)
+        self.save_state(state)
+
+    # ── 이슈 구간 ─────────────────────────────────────────────────────────────
+    def sync_issues(self, current: dict, kinds, now: float = None) -> tuple[list, list]:
+        """
+        kinds 범위의 열린 이슈를 current({key: (종류, 상세)}) 와 맞춤.
+        새 key 는 발생, 사라진 key 는 해결로 기록. Returns (발생 key 목록, 해결 key 목록).
+        """
+        now = time.time() if now is None else now
+        kinds = tuple(kinds)
+        marks = ",".join("?" * len(kinds))
+        open_rows = dict(self.conn.execute(
+            f"SELECT key, id FROM issues WHERE closed_at IS NULL AND kind IN ({marks})", kinds
+        ).fetchall())
+        opened = [k for k in current if k not in open_rows]
+        closed = [k for k in open_rows if k not in current]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO issues(key, kind, detail, opened_at) VALUES(?, ?, ?, ?)",
+                [(k, current[k][0], json.dumps(current[k][1], ensure_ascii=False, default=str), now)
+                 for k in opened],
+            )
+            self.conn.executemany(
+                "UPDATE issues SET closed_at = ? WHERE id = ?",
+                [(now, open_rows[k]) for k in closed],
+            )
+        return opened, closed
+
+    def unnotified(self, kinds) -> list[str]:
+        """알림을 아직 보내지 못한 열린 이슈 key (전송 실패분은 다음 판정 때 재시도)."""
+        kinds = tuple(kinds)
+        marks = ",".join("?" * len(kinds))
+        return [r[0] for r in self.conn.execute(
+            f"SELECT key FROM issues WHERE closed_at IS NULL AND notified_at IS NULL "
+            f"AND kind IN ({marks}) ORDER BY id", kinds
+        )]
+
+    def mark_notified(self, keys, now: float = None) -> None:
+        now = time.time() if now is None else now
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE issues SET notified_at = ? WHERE key = ? AND closed_at IS NULL",
+                [(now, k) for k in keys],
+            )
+
+    def open_count(self, kinds) -> int:
+        kinds = tuple(kinds)
+        marks = ",".join("?" * len(kinds))
+        return self.conn.execute(
+            f"SELECT COUNT(*) FROM issues WHERE closed_at IS NULL AND kind IN ({marks})", kinds
+        ).fetchone()[0]
+
+    # ── 실행 기록 ─────────────────────────────────────────────────────────────
+    def record_run(self, job: str, started_at: float, duration_ms: float, ok: bool,
+                   summary: str = "", counts: tuple = (None, None, None),
+                   error: str = None) -> None:
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO runs(job, started_at, duration_ms, ok, summary, "
+                "n_dup, n_stuck, n_integrity, error) VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job, started_at, round(duration_ms, 1), int(ok), summary, *counts, error),
+            )
+
+    def prune_runs(self, days: int = RUN_RETENTION_DAYS) -> None:
+        with self.conn:
+            self.conn.execute("DELETE FROM runs WHERE started_at < ?",
+                              (time.time() - days * 86400,))
+
+    # ── 조회 ─────────────────────────────────────────────────────────────────
+    def query_open(self) -> list:
+        return self.conn.execute(
+            "SELECT key, kind, detail, opened_at, notified_at FROM issues "
+            "WHERE closed_at IS NULL ORDER BY opened_at"
+        ).fetchall()
+
+    def query_history(self, since: float, kind: str = None) -> list:
+        sql = ("SELECT key, kind, opened_at, closed_at FROM issues WHERE opened_at >= ?"
+               + (" AND kind = ?" if kind else "") + " ORDER BY opened_at DESC")
+        return self.conn.execute(sql, (since, kind) if kind else (since,)).fetchall()
+
+    def query_stats(self, since: float) -> list:
+        """종류별 발생·해결·미해결 건수와 해결 소요 시간(분) 평균·최대."""
+        return self.conn.execute(
+            """
+            SELECT kind,
+                   COUNT(*)                                         AS opened,
+                   SUM(closed_at IS NOT NULL)                       AS closed,
+                   SUM(closed_at IS NULL)                           AS still_open,
+                   AVG((closed_at - opened_at) / 60.0)              AS avg_min,
+                   MAX((closed_at - opened_at) / 60.0)              AS max_min
+            FROM issues WHERE opened_at >= ?
+            GROUP BY kind ORDER BY opened DESC
+            """,
+            (since,),
+        ).fetchall()
+
+    def query_runs(self, limit: int) -> list:
+        return self.conn.execute(
+            "SELECT * FROM runs ORDER BY id DESC LIMIT ?", (limit,)
+        ).fetchall()
+
+    def query_run_summary(self, since: float) -> list:
+        return self.conn.execute(
+            """
+            SELECT job, COUNT(*) AS runs, SUM(ok = 0) AS failed,
+                   AVG(duration_ms) AS avg_ms, MAX(duration_ms) AS max_ms
+            FROM runs WHERE started_at >= ? GROUP BY job ORDER BY job
+            """,
+            (since,),
+        ).fetchall()
+
+
+# ─── 조회 CLI ─────────────────────────────────────────────────────────────────
+def _fmt_ts(epoch) -> str:
+    return datetime.fromtimestamp(epoch, KST).strftime("%m-%d %H:%M") if epoch else "-"
+
+
+def _fmt_min(minutes) -> str:
+    if minutes is None:
+        return "-"
+    return f"{minutes:,.0f}m" if minutes < 120 else f"{minutes / 60:,.1f}h"
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="모니터링 이슈 이력·실행 기록 조회")
+    ap.add_argument("--db", default=DB_PATH, help="저장소 경로 (기본: monitor.db)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("open", help="현재 열린 이슈")
+    p = sub.add_parser("history", help="기간 내 발생한 이슈와 해결 시각")
+    p.add_argument("--days", type=float, default=7)
+    p.add_argument("--kind", help="dup / stuck / empty_sn / bad_state / no_ban / db")
+    p = sub.add_parser("stats", help="종류별 해결 소요 시간")
+    p.add_argument("--days", type=float, default=30)
+    p = sub.add_parser("runs", help="최근 실행 기록 + 작업별 소요 시간")
+    p.add_argument("--limit", type=int, default=20)
+    p.add_argument("--days", type=float, default=1, help="작업별 요약 기간")
+    args = ap.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        print(f"저장소 없음: {args.db}")
+        return 1
+    store = IssueStore(args.db)
+    now = time.time()
+
+    if args.cmd == "open":
+        rows = store.query_open()
+        print(f"{'열린 시각':<13}{'경과':>8}  {'알림':<5}{'종류':<11}key")
+        for r in rows:
+            print(f"{_fmt_ts(r['opened_at']):<13}{_fmt_min((now - r['opened_at']) / 60):>8}  "
+                  f"{'Y' if r['notified_at'] else '-':<5}{r['kind']:<11}{r['key']}")
+        print(f"— {len(rows)}건")
+
+    elif args.cmd == "history":
+        rows = store.query_history(now - args.days * 86400, args.kind)
+        print(f"{'발생':<13}{'해결':<13}{'소요':>8}  {'종류':<11}key")
+        for r in rows:
+            dur = ((r["closed_at"] or now) - r["opened_at"]) / 60
+            print(f"{_fmt_ts(r['opened_at']):<13}{_fmt_ts(r['closed_at']):<13}"
+                  f"{_fmt_min(dur):>8}  {r['kind']:<11}{r['key']}")
+        print(f"— {len(rows)}건")
+
+    elif args.cmd == "stats":
+        print(f"{'종류':<11}{'발생':>7}{'해결':>7}{'미해결':>7}{'평균 해결':>11}{'최대 해결':>11}")
+        for r in store.query_stats(now - args.days * 86400):
+            print(f"{r['kind']:<11}{r['opened']:>7}{r['closed']:>7}{r['still_open']:>7}"
+                  f"{_fmt_min(r['avg_min']):>11}{_fmt_min(r['max_min']):>11}")
+
+    elif args.cmd == "runs":
+        print(f"{'시작':<13}{'작업':<12}{'ms':>9}  {'결과':<4}{'중복':>5}{'정체':>6}{'정합':>5}  요약")
+        for r in store.query_runs(args.limit):
+            print(f"{_fmt_ts(r['started_at']):<13}{r['job']:<12}{r['duration_ms']:>9,.0f}  "
+                  f"{'ok' if r['ok'] else 'ERR':<4}{r['n_dup'] if r['n_dup'] is not None else '-':>5}"
+                  f"{r['n_stuck'] if r['n_stuck'] is not None else '-':>6}"
+                  f"{r['n_integrity'] if r['n_integrity'] is not None else '-':>5}  "
+                  f"{r['summary'] or r['error'] or ''}")
+        print(f"\n최근 {args.days:g}일 작업별 요약")
+        print(f"{'작업':<12}{'실행':>6}{'실패':>6}{'평균 ms':>10}{'최대 ms':>10}")
+        for r in store.query_run_summary(now - args.days * 86400):
+            print(f"{r['job']:<12}{r['runs']:>6}{r['failed']:>6}{r['avg_ms']:>10,.0f}{r['max_ms']:>10,.0f}")
+
+    store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -6,22 +6,38 @@ Supabase 데이터를 주기적으로 감시하고 Telegram으로 알림을 보
 
 감시 항목:
   1. 중복 시리얼  — 동일 S/N이 활성 레코드에 2건 이상 존재
-  2. 상태 이상    — STUCK_HOURS 이상 진행 상태로 멈춰있는 레코드
+  2. 상태 이상    — 현재 상태 체류 시간이 상태별 SLA(STATE_SLA_HOURS)를 넘은 시리얼
   3. DB 연결 오류 — Supabase 연결 실패
   4. 데이터 정합성 — NULL 시리얼, 잘못된 상태값, 반 필드 누락
 
+조회 방식 (증분 감시 — 테이블 크기와 무관하게 실행 시간·API 호출 일정):
+  - 열린 이슈 집합(중복 시리얼·정체·정합성 행)을 상태 파일에 보관
+  - 평소: 워터마크(마지막으로 본 '시간') 이후 변경된 행 + 영향받은 시리얼 그룹만 조회해
+    이슈 집합을 갱신
+  - 체류 시간: production '시간'은 같은 상태 내 수정에도 다시 써지므로 상태 진입 시각으로 쓸 수 없음
+    → audit_log 상태 전환을 감사 워터마크 이후분만 읽어 시리얼별 (현재 상태, 진입 시각)을 유지하고
+    상태별 SLA 초과를 판정 (재공 수에 선형, audit_log 전체는 읽지 않음)
+  - FULL_SCAN_EVERY_SEC 마다 전체 대조: 활성 레코드 스냅샷을 페이징 조회(fetch_snapshot)해
+    1회 순회(scan_rows)로 이슈 집합을 다시 만듦 — 삭제·'시간' 미변경 수정 등 증분으로 못 보는 변화 보정
+  성능 확인: python bench_checks.py  (합성 10만/100만 행)
+
 실행 방법:
-  python monitor.py          # 상시 루프 (standalone)
+  python monitor.py          # 상시 실행 (asyncio daemon — 작업별 주기 동시 실행, 연결 재사용)
   python monitor.py --once   # 1회 실행 (GitHub Actions / cron)
+
+상시 실행 작업 주기 (환경변수):
+  DUP_INTERVAL_SEC    30    변경 행 → 중복 시리얼·정합성
+  STUCK_INTERVAL_SEC  300   audit_log 상태 전환 → 상태별 SLA (기본값 CHECK_INTERVAL_SEC)
+  FULL_SCAN_EVERY_SEC 3600  전체 대조
+  재시작 시 monitor.db(IssueStore) 의 이슈 집합·워터마크에서 이어서 시작
 """
 
 import os
 import sys
-import json
+import asyncio
+import threading
 import time
-import hashlib
 import logging
-from collections import Counter
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
@@ -29,6 +45,8 @@ import requests
 from dotenv import load_dotenv
 from supabase import create_client, Client
 
+from issue_store import IssueStore
+
 load_dotenv()
 
 # ─── 설정 ─────────────────────────────────────────────────────────────────────
@@ -36,8 +54,24 @@ SUPABASE_URL        = os.getenv("SUPABASE_URL", "")
 SUPABASE_KEY        = os.getenv("SUPABASE_KEY", "")
 TELEGRAM_BOT_TOKEN  = os.getenv("TELEGRAM_BOT_TOKEN", "")
 TELEGRAM_CHAT_ID    = os.getenv("TELEGRAM_CHAT_ID", "")
-CHECK_INTERVAL_SEC  = int(os.getenv("CHECK_INTERVAL_SEC", "300"))   # 기본 5분
-STUCK_HOURS         = int(os.getenv("STUCK_HOURS", "8"))            # 기본 8시간
+CHECK_INTERVAL_SEC  = int(os.getenv("CHECK_INTERVAL_SEC", "300"))   # 기본 5분 (STUCK_INTERVAL_SEC 기본값)
+STUCK_HOURS         = int(os.getenv("STUCK_HOURS", "8"))            # SLA 미지정 상태의 체류 한도 (기본 8시간)
+SNAPSHOT_PAGE_ROWS  = 1000   # PostgREST 기본 max-rows — 페이지 크기가 이보다 크면 잘림
+SNAPSHOT_COLUMNS    = "id,시리얼,반,모델,상태,시간"
+AUDIT_COLUMNS       = "id,시간,시리얼,모델,반,이후상태"
+FULL_SCAN_EVERY_SEC = int(os.getenv("FULL_SCAN_EVERY_SEC", "3600"))  # 전체 대조 주기 (기본 1시간)
+WATERMARK_OVERLAP_SEC = 120  # 워터마크 재조회 겹침 — 늦게 커밋된 쓰기 보정 (재처리는 멱등)
+IN_FILTER_CHUNK     = 100    # in_() 필터 1회당 값 수 (URL 길이 제한 대응)
+TG_MIN_INTERVAL_SEC = 1.0    # Telegram 연속 전송 최소 간격 (같은 채팅 1건/초)
+TG_MAX_ATTEMPTS     = 3      # 429·5xx·네트워크 오류 재시도 포함 전송 시도 횟수
+TG_MAX_WAIT_SEC     = 30     # 재시도 1회 대기 상한 — 넘으면 포기하고 다음 판정 때 재전송
+
+# 상시 실행(daemon) 작업별 주기(초)
+JOB_INTERVALS = {
+    "duplicates": int(os.getenv("DUP_INTERVAL_SEC", "30")),       # 변경 행 → 중복 시리얼·정합성
+    "stuck":      int(os.getenv("STUCK_INTERVAL_SEC", str(CHECK_INTERVAL_SEC))),  # 상태 전환 → SLA
+    "reconcile":  FULL_SCAN_EVERY_SEC,                            # 전체 대조
+}
 
 KST = timezone(timedelta(hours=9))
 
@@ -54,6 +88,31 @@ ACTIVE_STATES = {
     "출하승인", "포장대기", "포장중", "수리 완료(재투입)", "불량 처리 중",
 }
 
+
+def _parse_sla(text: str) -> dict:
+    """'상태=시간,상태=시간' → {상태: 시간}. 진행 상태가 아니거나 숫자가 아닌 항목은 무시."""
+    sla = {}
+    for part in text.split(","):
+        state, _, hours = part.partition("=")
+        try:
+            if state.strip() in ACTIVE_STATES:
+                sla[state.strip()] = float(hours)
+        except ValueError:
+            continue
+    return sla
+
+
+# 상태별 체류 SLA(h) — 미지정 상태는 STUCK_HOURS
+#   환경변수로 덮어쓰기: STATE_SLA_HOURS="OQC대기=2,불량 처리 중=24,포장대기=4"
+STATE_SLA_HOURS = {
+    **{s: float(STUCK_HOURS) for s in ACTIVE_STATES},
+    "OQC대기": 2.0,
+    "불량 처리 중": 24.0,
+    **_parse_sla(os.getenv("STATE_SLA_HOURS", "")),
+}
+# 감사 워터마크가 없을 때(최초 실행) 다시 읽을 audit_log 구간 — 가장 긴 SLA 만큼
+DWELL_LOOKBACK_HOURS = max(STATE_SLA_HOURS.values())
+
 # ─── 로거 ─────────────────────────────────────────────────────────────────────
 logging.basicConfig(
     level=logging.INFO,
@@ -75,158 +134,323 @@ def get_client() -> Client:
 
 
 # ─── Telegram 알림 ────────────────────────────────────────────────────────────
+_HTTP = requests.Session()   # 상시 실행 시 연결 재사용
+_TG_LOCK = threading.Lock()  # 작업들이 동시에 보내도 1건씩 간격을 두고 전송
+_tg_last_sent = [0.0]
+
+
+def _tg_retry_after(resp) -> float:
+    """429 응답의 대기 시간(초) — 본문 parameters.retry_after, 없으면 5초."""
+    try:
+        return float(resp.json()["parameters"]["retry_after"])
+    except Exception:
+        return 5.0
+
+
 def send_telegram(message: str) -> bool:
-    """Telegram 봇으로 메시지 전송. 성공 시 True."""
+    """
+    Telegram 봇으로 메시지 전송. 성공 시 True.
+    TG_MIN_INTERVAL_SEC 간격으로 순차 전송, 429 는 retry_after 만큼·5xx/네트워크 오류는 지수 백오프로 재시도.
+    대기가 TG_MAX_WAIT_SEC 를 넘거나 시도를 다 쓰면 False — 알리지 않은 이슈로 남아 다음 판정 때 재전송.
+    """
     if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
         log.warning("Telegram 미설정 — 콘솔 출력으로 대체:\n%s", message)
         return False
-    try:
-        url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-        resp = requests.post(
-            url,
-            json={"chat_id": TELEGRAM_CHAT_ID, "text": message, "parse_mode": "HTML"},
-            timeout=10,
-        )
-        if resp.status_code == 200:
-            log.info("Telegram 알림 전송 완료")
-            return True
-        log.error("Telegram 전송 실패: HTTP %s — %s", resp.status_code, resp.text[:200])
-        return False
-    except Exception as exc:
-        log.error("Telegram 예외: %s", exc)
+    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+    with _TG_LOCK:
+        for attempt in range(1, TG_MAX_ATTEMPTS + 1):
+            wait = _tg_last_sent[0] + TG_MIN_INTERVAL_SEC - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                resp = _HTTP.post(
+                    url,
+                    json={"chat_id": TELEGRAM_CHAT_ID, "text": message, "parse_mode": "HTML"},
+                    timeout=10,
+                )
+            except Exception as exc:
+                err, delay = f"예외 {exc}", 2 ** attempt
+            else:
+                _tg_last_sent[0] = time.monotonic()
+                if resp.status_code == 200:
+                    log.info("Telegram 알림 전송 완료")
+                    return True
+                err = f"HTTP {resp.status_code} — {resp.text[:200]}"
+                if resp.status_code == 429:
+                    delay = _tg_retry_after(resp)
+                elif resp.status_code >= 500:
+                    delay = 2 ** attempt
+                else:
+                    log.error("Telegram 전송 실패: %s", err)
+                    return False
+            if attempt == TG_MAX_ATTEMPTS or delay > TG_MAX_WAIT_SEC:
+                break
+            log.warning("Telegram 전송 실패 (%d/%d) — %.0fs 후 재시도: %s",
+                        attempt, TG_MAX_ATTEMPTS, delay, err)
+            time.sleep(delay)
+        log.error("Telegram 전송 실패: %s", err)
         return False
 
 
-# ─── 중복 알림 방지 (상태 파일) ───────────────────────────────────────────────
-_STATE_FILE = "monitor_state.json"
+# ─── 조회 (id 순 range 페이징) ────────────────────────────────────────────────
+def _paged(make_query) -> list[dict]:
+    """make_query() 가 만든 조회의 결과 전체를 id 순 페이지로 모음. 조회 실패 시 예외를 그대로 올림."""
+    rows, start = [], 0
+    while True:
+        batch = (
+            make_query().order("id").range(start, start + SNAPSHOT_PAGE_ROWS - 1).execute()
+        ).data or []
+        rows += batch
+        if len(batch) < SNAPSHOT_PAGE_ROWS:
+            return rows
+        start += SNAPSHOT_PAGE_ROWS
 
 
-def load_state() -> dict:
-    if os.path.exists(_STATE_FILE):
-        try:
-            with open(_STATE_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            pass
-    return {}
+def _fetch_paged(sb: Client, where=lambda q: q) -> list[dict]:
+    """production 에서 deleted_at IS NULL 행 중 where(query) 조건에 맞는 행 전체."""
+    return _paged(lambda: where(
+        sb.table("production").select(SNAPSHOT_COLUMNS).is_("deleted_at", "null")
+    ))
 
 
-def save_state(state: dict) -> None:
-    try:
-        with open(_STATE_FILE, "w", encoding="utf-8") as f:
-            json.dump(state, f, ensure_ascii=False, indent=2)
-    except Exception as exc:
-        log.error("상태 파일 저장 실패: %s", exc)
+def fetch_snapshot(sb: Client) -> list[dict]:
+    """활성 레코드 전체 (전체 대조용)."""
+    return _fetch_paged(sb)
 
 
-def issue_hash(issues: list) -> str:
-    """이슈 목록 → MD5 해시 (동일 이슈 재알림 방지)"""
-    payload = json.dumps(sorted(issues), ensure_ascii=False).encode()
-    return hashlib.md5(payload).hexdigest()
+def fetch_changed(sb: Client, since: str) -> list[dict]:
+    """'시간' >= since 인 행 (워터마크 이후 변경)."""
+    return _fetch_paged(sb, lambda q: q.gte("시간", since))
 
 
-# ─── 감시 함수 ────────────────────────────────────────────────────────────────
-def check_db_connection(sb: Client) -> tuple[bool, str]:
-    """Supabase 연결 확인. (성공 여부, 에러 메시지) 반환."""
-    try:
-        sb.table("production").select("시리얼").limit(1).execute()
-        return True, ""
-    except Exception as exc:
-        return False, str(exc)
+def fetch_transitions(sb: Client, since: str) -> list[dict]:
+    """audit_log 에서 '시간' >= since 인 상태 전환 (감사 워터마크 이후분)."""
+    return _paged(lambda: sb.table("audit_log").select(AUDIT_COLUMNS).gte("시간", since))
 
 
-def check_duplicate_serials(sb: Client) -> list[dict]:
-    """
-    deleted_at IS NULL 레코드에서 동일 시리얼이 2건 이상인 경우 반환.
-    [{"시리얼": "...", "건수": 2, "상태목록": [...]}]
-    """
-    try:
-        res = (
-            sb.table("production")
-            .select("시리얼,반,모델,상태")
-            .is_("deleted_at", "null")
-            .execute()
-        )
-        data = res.data or []
-        counts = Counter(r["시리얼"] for r in data if r.get("시리얼", "").strip())
-        result = []
-        for sn, cnt in counts.items():
-            if cnt > 1:
-                rows = [r for r in data if r.get("시리얼") == sn]
-                result.append(
-                    {
-                        "시리얼": sn,
-                        "건수": cnt,
-                        "상태목록": [r.get("상태", "?") for r in rows],
-                        "반목록": list({r.get("반", "?") for r in rows}),
-                    }
-                )
-        return result
-    except Exception as exc:
-        log.error("중복 시리얼 체크 오류: %s", exc)
-        return []
+def fetch_serial_groups(sb: Client, serials) -> dict:
+    """{시리얼: [활성 행]} — 중복 판정을 다시 할 시리얼만 조회."""
+    serials = sorted(serials)
+    groups = {sn: [] for sn in serials}
+    for i in range(0, len(serials), IN_FILTER_CHUNK):
+        chunk = serials[i:i + IN_FILTER_CHUNK]
+        for r in _fetch_paged(sb, lambda q, c=chunk: q.in_("시리얼", c)):
+            groups.setdefault(r.get("시리얼"), []).append(r)
+    return groups
 
 
-def check_stuck_records(sb: Client, hours: int) -> list[dict]:
-    """
-    ACTIVE_STATES 상태에서 hours 시간 이상 변경 없는 레코드 반환.
-    """
-    try:
-        cutoff = (datetime.now(KST) - timedelta(hours=hours)).strftime(
-            "%Y-%m-%dT%H:%M:%S"
-        )
-        res = (
-            sb.table("production")
-            .select("시리얼,모델,반,상태,시간")
-            .in_("상태", list(ACTIVE_STATES))
-            .is_("deleted_at", "null")
-            .lte("시간", cutoff)
-            .execute()
-        )
-        return res.data or []
-    except Exception as exc:
-        log.error("정체 레코드 체크 오류: %s", exc)
-        return []
+# ─── 열린 이슈 집합 ───────────────────────────────────────────────────────────
+# 상태 파일(JSON)에 그대로 저장되는 구조 — 행 id 는 문자열 키
+#   dup       : {시리얼: [{"id", "상태", "반"}]}   동일 시리얼 2건 이상
+#   stuck     : {시리얼: 체류 항목 + "sla_h"}       상태별 SLA 초과 (sla_breaches)
+#   empty_sn  : {id: 반}                            빈 시리얼
+#   bad_state : {id: 상태}                          잘못된 상태값
+#   no_ban    : {id: 1}                             반(班) 필드 누락
+_ROW_ISSUE_KINDS = ("empty_sn", "bad_state", "no_ban")
+
+
+ISSUE_KINDS = ("dup", "stuck") + _ROW_ISSUE_KINDS
+
+
+def new_open_issues() -> dict:
+    return {"dup": {}, "stuck": {}, "empty_sn": {}, "bad_state": {}, "no_ban": {}}
+
+
+def _ts(value) -> str:
+    """'시간' 값 정규화 — 'YYYY-MM-DD HH:MM:SS' / ISO 형식 모두 앞 19자리 공백 구분으로 비교."""
+    return str(value)[:19].replace("T", " ")
+
+
+def _hours_ago(hours: float, now: Optional[datetime] = None) -> str:
+    return ((now or datetime.now(KST)) - timedelta(hours=hours)).strftime("%Y-%m-%d %H:%M:%S")
 
 
-def check_data_integrity(sb: Client) -> list[str]:
+def _overlap_since(watermark: str) -> str:
+    """워터마크에서 WATERMARK_OVERLAP_SEC 만큼 앞선 재조회 시작 시각."""
+    return (datetime.strptime(watermark, "%Y-%m-%d %H:%M:%S")
+            - timedelta(seconds=WATERMARK_OVERLAP_SEC)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _add_row_issues(open_: dict, r: dict) -> None:
+    """행 단위 규칙(빈 시리얼·잘못된 상태·반 누락) 판정 결과를 이슈 집합에 추가."""
+    rid = str(r.get("id"))
+    ban = r.get("반") or ""
+    if not (r.get("시리얼") or "").strip():
+        open_["empty_sn"][rid] = ban or "?"
+    if r.get("상태") not in VALID_STATES:
+        open_["bad_state"][rid] = str(r.get("상태"))
+    if not ban.strip():
+        open_["no_ban"][rid] = 1
+
+
+def _dup_rows(rows: list[dict]) -> list[dict]:
+    return [{"id": str(r.get("id")), "상태": r.get("상태", "?"), "반": r.get("반", "?")} for r in rows]
+
+
+def scan_rows(data: list[dict]) -> dict:
     """
-    데이터 정합성 이슈 탐지.
-    - 빈/NULL 시리얼
-    - 허용되지 않는 상태값
-    - 반(班) 필드 누락
+    스냅샷을 1번만 순회해 열린 이슈 집합 생성 (행 수에 선형, 시리얼 dict 그룹핑).
+    stuck 은 비워 둠 — 체류 집합에서 sla_breaches 로 채움.
     """
-    issues = []
-    try:
-        res = (
-            sb.table("production")
-            .select("시리얼,반,모델,상태")
-            .is_("deleted_at", "null")
-            .execute()
-        )
-        data = res.data or []
+    open_ = new_open_issues()
+    first: dict = {}      # 시리얼 → 첫 행
+    groups: dict = {}     # 시리얼 → 행 목록 (2건째부터 생성 — 중복 시리얼만 보관)
+    for r in data:
+        _add_row_issues(open_, r)
+        sn = r.get("시리얼") or ""
+        if sn.strip():
+            if sn in groups:
+                groups[sn].append(r)
+            elif sn in first:
+                groups[sn] = [first[sn], r]
+            else:
+                first[sn] = r
+    for sn in first:                 # 시리얼 첫 등장 순서 유지
+        rows = groups.get(sn)
+        if rows:
+            open_["dup"][sn] = _dup_rows(rows)
+    return open_
+
+
+def apply_changes(open_: dict, changed: list[dict], serial_groups: dict) -> None:
+    """
+    증분 갱신 — 변경 행은 행 단위 규칙을 다시 판정,
+    serial_groups(영향받은 시리얼의 현재 활성 행)로 중복 시리얼 항목 교체.
+    """
+    changed_ids = {str(r.get("id")) for r in changed}
+    for kind in _ROW_ISSUE_KINDS:
+        for rid in changed_ids & open_[kind].keys():
+            del open_[kind][rid]
+    for r in changed:
+        _add_row_issues(open_, r)
+    for sn, rows in serial_groups.items():
+        if len(rows) > 1:
+            open_["dup"][sn] = _dup_rows(rows)
+        else:
+            open_["dup"].pop(sn, None)
 
-        # 1. 빈/NULL 시리얼
-        empty_sn = [r for r in data if not r.get("시리얼", "").strip()]
-        if empty_sn:
-            bans = ", ".join(sorted({r.get("반", "?") for r in empty_sn}))
-            issues.append(f"빈 시리얼 {len(empty_sn)}건 (반: {bans})")
 
-        # 2. 유효하지 않은 상태값
-        invalid = [r for r in data if r.get("상태", "") not in VALID_STATES]
-        if invalid:
-            bad = ", ".join(sorted({r.get("상태", "?") for r in invalid}))
-            issues.append(f"잘못된 상태값 {len(invalid)}건: [{bad}]")
+def affected_serials(open_: dict, changed: list[dict]) -> set:
+    """중복 판정을 다시 할 시리얼 — 변경 행의 현재 시리얼 + 변경 행이 속해 있던 중복 그룹."""
+    changed_ids = {str(r.get("id")) for r in changed}
+    serials = {r["시리얼"] for r in changed if (r.get("시리얼") or "").strip()}
+    serials |= {sn for sn, rows in open_["dup"].items()
+                if any(x["id"] in changed_ids for x in rows)}
+    return serials
 
-        # 3. 반(班) 필드 누락
-        no_ban = [r for r in data if not r.get("반", "").strip()]
-        if no_ban:
-            issues.append(f"반(班) 필드 누락 {len(no_ban)}건")
 
-    except Exception as exc:
-        log.error("정합성 체크 오류: %s", exc)
-        issues.append(f"정합성 체크 실패: {exc}")
-    return issues
+# ─── 체류 시간 (상태별 SLA) ───────────────────────────────────────────────────
+# 체류 집합 dwell: {시리얼: {"상태", "since", "반", "모델"}} — since 는 현재 상태 진입 시각
+#   audit_log 상태 전환(apply_transitions)과 production 행(observe_rows) 관측을 같은 규칙으로 합침.
+#   완료·교체됨 등 종료 상태 항목은 늦게 도착한 이전 관측을 걸러내는 용도로 남았다가 전체 대조 때 정리.
+def observe_state(dwell: dict, sn: str, state: str, at: str, ban: str = "", model: str = "") -> None:
+    """
+    '시리얼 sn 이 at 시각에 state 상태' 관측 반영.
+      - 같은 상태: 진입 시각은 더 이른 쪽 (같은 상태 내 수정으로 '시간'이 다시 써져도 체류 시간 유지)
+      - 다른 상태: at 이 현재 진입 시각 이후일 때만 전환 (늦게 도착한 이전 관측은 무시)
+    """
+    cur = dwell.get(sn)
+    if cur is None or (cur["상태"] != state and at >= cur["since"]):
+        dwell[sn] = {"상태": state, "since": at, "반": ban or "?", "모델": model or ""}
+    elif cur["상태"] == state:
+        cur["since"] = min(cur["since"], at)
+        if ban:
+            cur["반"] = ban
+
+
+def apply_transitions(dwell: dict, transitions: list[dict]) -> None:
+    """audit_log 상태 전환을 시간·id 순으로 반영 (겹침 구간 재조회분은 같은 결과 — 멱등)."""
+    for t in sorted(transitions, key=lambda t: (_ts(t.get("시간")), t.get("id") or 0)):
+        sn = (t.get("시리얼") or "").strip()
+        if sn and t.get("이후상태") and t.get("시간"):
+            observe_state(dwell, sn, t["이후상태"], _ts(t["시간"]), t.get("반") or "", t.get("모델") or "")
+
+
+def observe_rows(dwell: dict, rows: list[dict]) -> None:
+    """production 행의 (상태, '시간') 반영 — audit_log 에 남지 않은 전환 보정."""
+    for r in rows:
+        sn = (r.get("시리얼") or "").strip()
+        if sn and r.get("상태") and r.get("시간"):
+            observe_state(dwell, sn, r["상태"], _ts(r["시간"]), r.get("반") or "", r.get("모델") or "")
+
+
+def rebuild_dwell(dwell: dict, snapshot: list[dict]) -> dict:
+    """전체 대조 — 스냅샷에 있는 시리얼의 기존 진입 시각은 유지하고, 진행 상태 시리얼만 남김."""
+    serials = {(r.get("시리얼") or "").strip() for r in snapshot}
+    fresh = {sn: dwell[sn] for sn in serials if sn in dwell}
+    observe_rows(fresh, snapshot)
+    return {sn: e for sn, e in fresh.items() if e["상태"] in ACTIVE_STATES}
+
+
+def sla_breaches(dwell: dict, now: Optional[datetime] = None) -> dict:
+    """체류 집합 → {시리얼: 항목 + "sla_h"} — 현재 상태 체류가 상태별 SLA 를 넘은 시리얼.
+    상태별 기준 시각을 미리 계산해 문자열 비교 1회씩 (진행 중 재공 수에 선형)."""
+    now = now or datetime.now(KST)
+    cutoffs = {s: _hours_ago(h, now) for s, h in STATE_SLA_HOURS.items()}
+    return {
+        sn: {**e, "sla_h": STATE_SLA_HOURS[e["상태"]]}
+        for sn, e in dwell.items()
+        if e["상태"] in cutoffs and e["since"] <= cutoffs[e["상태"]]
+    }
+
+
+def issue_index(open_: dict) -> dict:
+    """이슈 집합 → {이슈 key: (종류, 상세)} — 이슈 이력 저장소의 발생/해결 판정 단위.
+    key: 'dup:<시리얼>' / 'stuck:<시리얼>' / '<종류>:<행 id>'"""
+    index = {f"dup:{sn}": ("dup", rows) for sn, rows in open_["dup"].items()}
+    index.update({f"stuck:{sn}": ("stuck", e) for sn, e in open_["stuck"].items()})
+    for kind in _ROW_ISSUE_KINDS:
+        index.update({f"{kind}:{rid}": (kind, v) for rid, v in open_[kind].items()})
+    return index
+
+
+def subset_issues(open_: dict, keys) -> dict:
+    """keys 에 해당하는 이슈만 담은 이슈 집합 (신규 이슈 알림용)."""
+    sub = new_open_issues()
+    for key in keys:
+        kind, ident = key.split(":", 1)
+        if kind in sub and ident in open_[kind]:
+            sub[kind][ident] = open_[kind][ident]
+    return sub
+
+
+def summarize_issues(open_: dict) -> tuple[list, list, list]:
+    """
+    이슈 집합 → 알림용 목록.
+
+    Returns (duplicates, stuck, integrity)
+      duplicates : [{"시리얼", "건수", "상태목록", "반목록"}]  — 동일 시리얼 2건 이상
+      stuck      : [{"시리얼", "상태", "since", "반", "모델", "sla_h"}]  — 상태별 SLA 초과 체류
+      integrity  : [메시지]  — 빈 시리얼 / 잘못된 상태값 / 반(班) 필드 누락
+    """
+    duplicates = [
+        {
+            "시리얼": sn,
+            "건수": len(rows),
+            "상태목록": [x["상태"] for x in rows],
+            "반목록": list({x["반"] for x in rows}),
+        }
+        for sn, rows in open_["dup"].items()
+    ]
+    stuck = [{"시리얼": sn, **e} for sn, e in open_["stuck"].items()]
+
+    integrity = []
+    if open_["empty_sn"]:
+        bans = ", ".join(sorted(set(open_["empty_sn"].values())))
+        integrity.append(f"빈 시리얼 {len(open_['empty_sn'])}건 (반: {bans})")
+    if open_["bad_state"]:
+        bad = ", ".join(sorted(set(open_["bad_state"].values())))
+        integrity.append(f"잘못된 상태값 {len(open_['bad_state'])}건: [{bad}]")
+    if open_["no_ban"]:
+        integrity.append(f"반(班) 필드 누락 {len(open_['no_ban'])}건")
+    return duplicates, stuck, integrity
+
+
+def scan_snapshot(data: list[dict], now: Optional[datetime] = None) -> tuple[list, list, list]:
+    """스냅샷 전체 판정 (scan_rows + 행 '시간' 기준 체류 집합의 SLA 초과 + summarize_issues)."""
+    open_ = scan_rows(data)
+    open_["stuck"] = sla_breaches(rebuild_dwell({}, data), now)
+    return summarize_issues(open_)
 
 
 # ─── 메시지 포맷 ──────────────────────────────────────────────────────────────
@@ -234,10 +458,21 @@ def _now() -> str:
     return datetime.now(KST).strftime("%Y-%m-%d %H:%M KST")
 
 
+def _dwell_hours(since: str) -> str:
+    """진입 시각 since 부터 지금까지 체류 시간 표시 ('12.5h')."""
+    try:
+        entered = datetime.strptime(since, "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return "?h"
+    hours = (datetime.now(KST).replace(tzinfo=None) - entered).total_seconds() / 3600
+    return f"{hours:.1f}h"
+
+
 def build_alert_message(
-    duplicates: list, stuck: list, integrity: list
+    duplicates: list, stuck: list, integrity: list, open_total: Optional[int] = None
 ) -> Optional[str]:
-    """이슈가 1건 이상일 때만 알림 메시지 반환, 없으면 None."""
+    """이슈가 1건 이상일 때만 알림 메시지 반환, 없으면 None.
+    open_total: 신규 이슈만 보낼 때 현재 열린 이슈 전체 건수 (마지막 줄에 표시)."""
     if not duplicates and not stuck and not integrity:
         return None
 
@@ -256,14 +491,13 @@ def build_alert_message(
         lines.append("")
 
     if stuck:
-        lines.append(
-            f"⏰ <b>장시간 정체 {len(stuck)}건</b>  ({STUCK_HOURS}h 이상 미처리)"
-        )
+        lines.append(f"⏰ <b>상태별 SLA 초과 {len(stuck)}건</b>")
         for r in stuck[:5]:
-            ts = str(r.get("시간", ""))[:16]
             lines.append(
                 f"  • <code>{r.get('시리얼','?')}</code>  "
-                f"[{r.get('반','?')}]  {r.get('상태','?')}  {ts}"
+                f"[{r.get('반','?')}]  {r.get('상태','?')}  "
+                f"{_dwell_hours(r.get('since', ''))} / SLA {r.get('sla_h', 0):g}h  "
+                f"(진입 {str(r.get('since', ''))[:16]})"
             )
         if len(stuck) > 5:
             lines.append(f"  … 외 {len(stuck) - 5}건")
@@ -273,6 +507,10 @@ def build_alert_message(
         lines.append("🔴 <b>데이터 정합성 이슈</b>")
         for iss in integrity:
             lines.append(f"  • {iss}")
+        lines.append("")
+
+    if open_total is not None:
+        lines.append(f"📋 열린 이슈 전체 {open_total}건 (신규만 표시)")
 
     return "\n".join(lines)
 
@@ -281,83 +519,236 @@ def build_recovery_message() -> str:
     return f"✅ <b>모든 이슈 해결됨</b>\n🕐 {_now()}\n생산 시스템이 정상 상태입니다."
 
 
-# ─── 메인 로직 ────────────────────────────────────────────────────────────────
-def run_once() -> None:
-    """한 번 실행 (GitHub Actions / cron 단일 호출용)."""
-    log.info("━━━ 모니터링 체크 시작 ━━━")
-    state = load_state()
+# ─── 감시 작업 (asyncio — 조회는 스레드에서, 이슈 집합 수정은 이벤트 루프에서만) ──
+class MonitorRunner:
+    """
+    감시 작업 3종을 동시에 실행하며 열린 이슈 집합(state["open"])과 체류 집합(state["dwell"])을 갱신.
+
+      duplicates : 워터마크 이후 변경 행 → 행 단위 규칙 + 영향받은 시리얼 중복 재판정 + 체류 관측
+      stuck      : 감사 워터마크 이후 audit_log 상태 전환 → 체류 집합 → 상태별 SLA 초과 재판정
+      reconcile  : 전체 스냅샷으로 이슈 집합·체류 집합 재생성 (삭제 등 증분으로 못 보는 변화 보정)
+
+    동시 실행 규칙 (낙관적 병합 — 조회 중에는 잠그지 않음):
+      - 조회 도중 reconcile 이 반영되면 그 결과는 버림 (더 새 스냅샷이 이미 반영됨)
+      - 체류 집합은 관측 시각으로 병합 (observe_state) — 작업 간 반영 순서가 바뀌어도 이전 관측이 덮어쓰지 않음
+      - 같은 작업은 동시에 1개만 실행 (작업별 스케줄 루프가 순차 실행)
+    Supabase 클라이언트·HTTP 세션은 프로세스 동안 재사용.
+    상태·이슈 이력·실행 기록은 IssueStore(monitor.db) 에 저장.
+    """
 
-    # ── DB 연결 확인 ──────────────────────────────────────────────────────────
+    def __init__(self, sb: Client, store: IssueStore):
+        self.sb = sb
+        self.store = store
+        self.state = store.load_state()
+        self.reconciles = 0              # reconcile 반영 횟수
+        self._alert_lock = asyncio.Lock()
+
+    # ── 작업 ──────────────────────────────────────────────────────────────────
+    def full_due(self) -> bool:
+        st = self.state
+        return (
+            st.get("open") is None or st.get("dwell") is None
+            or not st.get("watermark") or not st.get("audit_watermark")
+            or time.time() - st.get("last_full", 0) >= FULL_SCAN_EVERY_SEC
+        )
+
+    async def job_reconcile(self) -> str:
+        started = time.time()
+        snapshot = await asyncio.to_thread(fetch_snapshot, self.sb)
+        dwell = rebuild_dwell(self.state.get("dwell") or {}, snapshot)
+        open_ = scan_rows(snapshot)
+        open_["stuck"] = sla_breaches(dwell)
+        self.state["open"], self.state["dwell"] = open_, dwell
+        self.state["watermark"] = max(
+            (_ts(r["시간"]) for r in snapshot if r.get("시간")), default=_hours_ago(0)
+        )
+        if not self.state.get("audit_watermark"):   # 최초 — 가장 긴 SLA 구간의 전환부터 읽음
+            self.state["audit_watermark"] = _hours_ago(DWELL_LOOKBACK_HOURS)
+        self.state["last_full"] = started
+        self.reconciles += 1
+        self.store.prune_runs()
+        return f"전체 대조 {len(snapshot)}건"
+
+    async def job_duplicates(self) -> str:
+        if self.full_due():
+            return "전체 대조 대기"
+        gen = self.reconciles
+        changed = await asyncio.to_thread(
+            fetch_changed, self.sb, _overlap_since(self.state["watermark"])
+        )
+        if gen != self.reconciles:
+            return "전체 대조와 겹침 — 건너뜀"
+        serials = affected_serials(self.state["open"], changed)
+        groups = await asyncio.to_thread(fetch_serial_groups, self.sb, serials)
+        if gen != self.reconciles:
+            return "전체 대조와 겹침 — 건너뜀"
+        apply_changes(self.state["open"], changed, groups)
+        observe_rows(self.state["dwell"], changed)
+        self.state["open"]["stuck"] = sla_breaches(self.state["dwell"])
+        self.state["watermark"] = max(
+            [self.state["watermark"]] + [_ts(r["시간"]) for r in changed if r.get("시간")]
+        )
+        return f"변경 {len(changed)}건 / 시리얼 재확인 {len(serials)}건"
+
+    async def job_stuck(self) -> str:
+        if self.full_due():
+            return "전체 대조 대기"
+        gen = self.reconciles
+        transitions = await asyncio.to_thread(
+            fetch_transitions, self.sb, _overlap_since(self.state["audit_watermark"])
+        )
+        if gen != self.reconciles:
+            return "전체 대조와 겹침 — 건너뜀"
+        apply_transitions(self.state["dwell"], transitions)
+        self.state["open"]["stuck"] = sla_breaches(self.state["dwell"])
+        self.state["audit_watermark"] = max(
+            [self.state["audit_watermark"]] + [_ts(t["시간"]) for t in transitions if t.get("시간")]
+        )
+        return f"상태 전환 {len(transitions)}건 / SLA 초과 {len(self.state['open']['stuck'])}건"
+
+    # ── 실행 · 알림 ──────────────────────────────────────────────────────────
+    async def run_job(self, name: str) -> None:
+        """작업 1회 실행 → DB 오류/복구 알림 → 이슈 알림 판정 → 상태·실행 기록 저장.
+        어느 단계의 예외도 로그·실행 기록으로 남기고 삼킴 (schedule 루프·gather 유지)."""
+        started, t0 = time.time(), time.perf_counter()
+        try:
+            summary = await getattr(self, f"job_{name}")()
+        except Exception as exc:
+            try:
+                await self._on_db_error(name, str(exc))
+            except Exception as alert_exc:
+                log.exception("[%s] DB 오류 알림 처리 실패: %s", name, alert_exc)
+            self._record_run(name, started, t0, False, error=str(exc)[:500])
+            return
+        log.info("[%s] %s / %.1fs", name, summary, time.perf_counter() - t0)
+        try:
+            async with self._alert_lock:
+                self.store.sync_issues({}, ("db",))
+                if self.state.pop("last_db_error", None):
+                    await asyncio.to_thread(send_telegram, f"✅ <b>DB 연결 복구됨</b>\n🕐 {_now()}")
+                await self._evaluate_alerts()
+                self.store.save_state(self.state)
+        except Exception as exc:
+            log.exception("[%s] 알림 판정·상태 저장 실패: %s", name, exc)
+            self._record_run(name, started, t0, False, summary, error=f"후처리: {exc}"[:500])
+            return
+        open_ = self.state.get("open") or new_open_issues()
+        counts = (len(open_["dup"]), len(open_["stuck"]),
+                  sum(len(open_[k]) for k in ("empty_sn", "bad_state", "no_ban")))
+        self._record_run(name, started, t0, True, summary, counts)
+
+    def _record_run(self, name: str, started: float, t0: float, ok: bool,
+                    summary: str = "", counts: tuple = (None, None, None), error: str = None) -> None:
+        """실행 기록 저장 — 저장소 오류는 로그만 남김."""
+        try:
+            self.store.record_run(name, started, (time.perf_counter() - t0) * 1000,
+                                  ok, summary, counts, error=error)
+        except Exception as exc:
+            log.exception("[%s] 실행 기록 저장 실패: %s", name, exc)
+
+    async def _on_db_error(self, name: str, err: str) -> None:
+        log.error("[%s] DB 조회 실패: %s", name, err)
+        async with self._alert_lock:
+            self.store.sync_issues({"db": ("db", err)}, ("db",))
+            if self.state.get("last_db_error") != err:
+                await asyncio.to_thread(
+                    send_telegram, f"🔴 <b>DB 연결 오류</b>\n🕐 {_now()}\n<code>{err}</code>"
+                )
+                self.state["last_db_error"] = err
+                self.store.save_state(self.state)
+
+    async def _evaluate_alerts(self) -> None:
+        """
+        이슈별 알림 — 이슈 집합을 이력 저장소와 맞춰 발생/해결을 기록하고,
+        아직 알리지 않은 열린 이슈만 모아 1건의 메시지로 전송 (이미 알린 이슈는 재알림 없음).
+        전송 실패 시 다음 판정 때 재시도. 열린 이슈가 모두 해결되면 복구 알림.
+        """
+        if self.state.get("open") is None:
+            return
+        current = issue_index(self.state["open"])
+        opened, closed = self.store.sync_issues(current, ISSUE_KINDS)
+        if opened or closed:
+            log.info("이슈 — 신규 %d건 / 해결 %d건 / 열림 %d건", len(opened), len(closed), len(current))
+
+        pending = self.store.unnotified(ISSUE_KINDS)
+        if pending:
+            duplicates, stuck, integrity = summarize_issues(
+                subset_issues(self.state["open"], pending)
+            )
+            msg = build_alert_message(duplicates, stuck, integrity, open_total=len(current))
+            sent = await asyncio.to_thread(send_telegram, msg) if msg else True
+            if sent or not (TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID):
+                self.store.mark_notified(pending)
+        elif closed and not current:
+            await asyncio.to_thread(send_telegram, build_recovery_message())
+
+    async def schedule(self, name: str, interval: int, delay: float = 0) -> None:
+        """name 작업을 interval 초마다 실행 (실행 시간만큼 대기 단축)."""
+        await asyncio.sleep(delay)
+        loop = asyncio.get_running_loop()
+        while True:
+            t0 = loop.time()
+            try:
+                await self.run_job(name)
+            except Exception as exc:      # 최후 방어 — 한 작업의 오류로 루프가 끝나지 않게
+                log.exception("[%s] 작업 실행 오류: %s", name, exc)
+            await asyncio.sleep(max(0.0, interval - (loop.time() - t0)))
+
+
+# ─── 메인 로직 ────────────────────────────────────────────────────────────────
+def _make_runner() -> Optional[MonitorRunner]:
     try:
-        sb = get_client()
+        return MonitorRunner(get_client(), IssueStore())
     except ValueError as exc:
         log.error("설정 오류: %s", exc)
-        return
+        return None
 
-    ok, err = check_db_connection(sb)
-    if not ok:
-        log.error("DB 연결 실패: %s", err)
-        if state.get("last_db_error") != err:
-            send_telegram(
-                f"🔴 <b>DB 연결 오류</b>\n🕐 {_now()}\n<code>{err}</code>"
-            )
-            state["last_db_error"] = err
-            save_state(state)
+
+async def _run_once_async() -> None:
+    runner = _make_runner()
+    if runner is None:
         return
+    try:
+        if runner.full_due():
+            await runner.run_job("reconcile")
+        else:
+            await asyncio.gather(runner.run_job("duplicates"), runner.run_job("stuck"))
+    finally:
+        runner.store.close()
 
-    # DB 연결 복구 시 알림
-    if state.pop("last_db_error", None):
-        send_telegram(f"✅ <b>DB 연결 복구됨</b>\n🕐 {_now()}")
 
-    # ── 각 항목 체크 ──────────────────────────────────────────────────────────
-    duplicates = check_duplicate_serials(sb)
-    stuck      = check_stuck_records(sb, STUCK_HOURS)
-    integrity  = check_data_integrity(sb)
+def run_once() -> None:
+    """한 번 실행 (GitHub Actions / cron 단일 호출용) — 전체 대조 주기면 reconcile, 아니면 증분 작업."""
+    log.info("━━━ 모니터링 체크 시작 ━━━")
+    asyncio.run(_run_once_async())
+    log.info("━━━ 모니터링 체크 완료 ━━━")
 
-    log.info(
-        "결과 — 중복시리얼: %d건 / 정체레코드: %d건 / 정합성이슈: %d건",
-        len(duplicates), len(stuck), len(integrity),
-    )
 
-    # ── 중복 알림 방지 ────────────────────────────────────────────────────────
-    current_keys = (
-        [f"dup:{d['시리얼']}" for d in duplicates]
-        + [f"stuck:{r.get('시리얼','?')}:{r.get('상태','?')}" for r in stuck]
-        + [f"int:{i}" for i in integrity]
+async def _run_daemon_async() -> None:
+    runner = _make_runner()
+    if runner is None:
+        return
+    if runner.full_due():
+        await runner.run_job("reconcile")
+    next_full = max(0.0, runner.state.get("last_full", 0) + FULL_SCAN_EVERY_SEC - time.time())
+    await asyncio.gather(
+        runner.schedule("duplicates", JOB_INTERVALS["duplicates"]),
+        runner.schedule("stuck", JOB_INTERVALS["stuck"]),
+        runner.schedule("reconcile", JOB_INTERVALS["reconcile"], delay=next_full),
     )
-    h = issue_hash(current_keys)
-    had_issues = bool(state.get("last_issue_hash"))
-
-    if current_keys:
-        if h != state.get("last_issue_hash"):
-            msg = build_alert_message(duplicates, stuck, integrity)
-            if msg:
-                send_telegram(msg)
-            state["last_issue_hash"] = h
-        else:
-            log.info("동일 이슈 재감지 — 중복 알림 건너뜀")
-    else:
-        if had_issues:
-            send_telegram(build_recovery_message())
-        state["last_issue_hash"] = ""
-
-    save_state(state)
-    log.info("━━━ 모니터링 체크 완료 ━━━")
 
 
-def run_loop() -> None:
-    """상시 루프 실행 (standalone 서버용)."""
+def run_daemon() -> None:
+    """상시 실행 (standalone 서버용) — 작업별 주기로 동시 실행, 상태 파일에서 이어서 시작."""
     log.info(
-        "모니터링 봇 시작  |  주기: %ds  |  정체 기준: %dh",
-        CHECK_INTERVAL_SEC,
-        STUCK_HOURS,
+        "모니터링 봇 시작  |  주기: %s  |  상태별 SLA: %s",
+        ", ".join(f"{k} {v}s" for k, v in JOB_INTERVALS.items()),
+        ", ".join(f"{k} {v:g}h" for k, v in sorted(STATE_SLA_HOURS.items())),
     )
-    while True:
-        try:
-            run_once()
-        except Exception as exc:
-            log.exception("예외 발생: %s", exc)
-        time.sleep(CHECK_INTERVAL_SEC)
+    try:
+        asyncio.run(_run_daemon_async())
+    except KeyboardInterrupt:
+        log.info("모니터링 봇 종료")
 
 
 # ─── 진입점 ───────────────────────────────────────────────────────────────────
@@ -365,4 +756,4 @@ if __name__ == "__main__":
     if "--once" in sys.argv:
         run_once()
     else:
-        run_loop()
+        run_daemon()
@@ -0,0 +1,40 @@
+"""modules.bulk_import — 엑셀 파싱·검증 테스트."""
+
+import io
+
+import openpyxl
+
+from modules.bulk_import import MAT_IMPORT_COLS, parse_material_serial_excel, validate_material_serials
+
+
+def _xlsx(rows) -> bytes:
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(MAT_IMPORT_COLS)
+    for r in rows:
+        ws.append(r)
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def test_row_numbers_survive_blank_rows():
+    data = _xlsx([
+        ["M1", "A", "제조1반", "보드", "S1"],
+        [None] * 5,
+        [None] * 5,
+        ["", "A", "제조1반", "보드", "S2"],      # 엑셀 5행 — 메인시리얼 누락
+        ["M3", "A", "제조1반", "보드", "S3"],
+    ])
+    df = parse_material_serial_excel(data)
+    assert df['행'].tolist() == [2, 5, 6]
+
+    _, reject = validate_material_serials(df, set())
+    assert reject['행'].tolist() == [5]
+    assert reject['사유'].tolist() == ["메인시리얼 누락"]
+
+
+def test_numeric_serial_normalized():
+    df = parse_material_serial_excel(_xlsx([[123.0, "A", "제조1반", "보드", 456]]))
+    assert df.loc[0, '메인시리얼'] == "123"
+    assert df.loc[0, '자재시리얼'] == "456"